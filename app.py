@@ -5,6 +5,7 @@ import sys
 import aws_cdk as cdk
 
 from ssm_ec2_rdp.ssm_ec2_rdp_stack import SsmEc2RdpStack
+from ssm_ec2_rdp.network_stack import SsmEc2RdpNetworkStack
 from ssm_ec2_rdp.configuration_manager import ConfigurationManager
 from ssm_ec2_rdp.types import ConfigurationError
 
@@ -21,7 +22,15 @@ def main():
         print(f"AMI設定: {config.ami}")
         print(f"インスタンス設定: {config.instance}")
         
-        SsmEc2RdpStack(app, "SsmEc2RdpDynamicStack-Takasato", config,
+        # VPC・エンドポイント・EICEは長期間維持するネットワークスタックに分離し、
+        # インスタンス設定の変更時はコンピュートスタックのみを再デプロイする
+        # （existing-network指定時は既存ネットワークを参照するため作成しない）
+        network = None
+        if config.network is None:
+            network_stack = SsmEc2RdpNetworkStack(app, "SsmEc2RdpNetworkStack-Takasato", config)
+            network = network_stack.network
+        
+        SsmEc2RdpStack(app, "SsmEc2RdpDynamicStack-Takasato", config, network=network,
             # If you don't specify 'env', this stack will be environment-agnostic.
             # Account/Region-dependent features and context lookups will not work,
             # but a single synthesized template can be deployed anywhere.
@@ -62,6 +71,8 @@ def print_configuration_help():
     "ami-id": "ami-0123456789abcdef0",          // 直接AMI IDを指定
     // または
     "ami-parameter": "/aws/service/ami-windows-latest/Windows_Server-2022-Japanese-Full-Base",
+    // または（マルチリージョン展開用）
+    "ami-region-map": {"ap-northeast-1": "ami-0123456789abcdef0", "us-east-1": "ami-0fedcba9876543210"},
 
     // 必須: インスタンスタイプ
     "instance-type": "t3.medium",
@@ -69,6 +80,9 @@ def print_configuration_help():
     // オプション: サブネットタイプ（デフォルト: "private"）
     "subnet-type": "private",  // "private" または "public"
 
+    // オプション: S3ゲートウェイエンドポイント（デフォルト: false）
+    "s3-gateway-endpoint": true,  // privateサブネットからAmazon Linuxのリポジトリを利用
+
     // オプション: Key Pair名（SSM Session Manager使用時は不要）
     "key-pair-name": "my-key-pair"
   }
@@ -76,6 +90,7 @@ def print_configuration_help():
 
 📖 設定の詳細:
 • AMI設定: 直接AMI IDを指定するか、SSMパラメータパスを使用
+  - ami-region-map: リージョン別AMIをCfnMappingとして出力し、1つのテンプレートを全リージョンで利用
 • インスタンスタイプ: EC2インスタンスタイプ（例: t3.medium, m5.large, c5.xlarge）
 • サブネットタイプ: "private"（プライベートサブネット）または "public"（パブリックサブネット）
   - private: VPCエンドポイント経由でSSM接続のみ（デフォルト）
@@ -161,9 +161,9 @@ if aws cloudformation describe-stacks --stack-name $STACK_NAME --region $REGION
         # CDKでスタックを削除
         print_info "CDKスタックを削除しています..."
         if [ -n "$AWS_PROFILE" ]; then
-            DESTROY_CMD="cdk destroy --profile $AWS_PROFILE --force"
+            DESTROY_CMD="cdk destroy --all --profile $AWS_PROFILE --force"
         else
-            DESTROY_CMD="cdk destroy --force"
+            DESTROY_CMD="cdk destroy --all --force"
         fi
         
         if $DESTROY_CMD; then
@@ -212,9 +212,9 @@ if [ "$answer" = "y" ]; then
     
     # デプロイ実行
     if [ -n "$AWS_PROFILE" ]; then
-        DEPLOY_CMD="cdk deploy --profile $AWS_PROFILE --require-approval never"
+        DEPLOY_CMD="cdk deploy --all --profile $AWS_PROFILE --require-approval never"
     else
-        DEPLOY_CMD="cdk deploy --require-approval never"
+        DEPLOY_CMD="cdk deploy --all --require-approval never"
     fi
     
     if $DEPLOY_CMD; then
@@ -256,9 +256,9 @@ if [ "$answer" = "y" ]; then
         print_info ""
         print_info "4. リソースを削除する場合:"
         if [ -n "$AWS_PROFILE" ]; then
-            print_info "   cdk destroy --profile $AWS_PROFILE"
+            print_info "   cdk destroy --all --profile $AWS_PROFILE"
         else
-            print_info "   cdk destroy"
+            print_info "   cdk destroy --all"
         fi
         print_info ""
         print_warning "注意: 使用完了後は必ずリソースを削除してコストを防止してください"
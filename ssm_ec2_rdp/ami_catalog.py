@@ -0,0 +1,114 @@
+"""
+AMIカタログクラス
+リージョン間でコピーしたAMI IDをローカルのJSONファイルに記録し、synth時に参照する
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+
+class AMICatalog:
+    """コピー元AMIとリージョン別コピーAMIの対応を管理するクラス
+    
+    ファイル形式:
+        {
+          "ami-0123456789abcdef0": {
+            "source_region": "ap-northeast-1",
+            "copies": {"us-east-1": "ami-0fedcba9876543210", "us-west-2": "ami-0123456789fedcba0"},
+            "pending": ["us-west-2"]
+          }
+        }
+    
+    pendingには、コピーを開始したがまだ利用可能（available）になっていないリージョンを記録する。
+    """
+    
+    def __init__(self, path: str):
+        """
+        AMICatalogを初期化（ファイルが存在しない場合は空のカタログ）
+        
+        Args:
+            path: カタログファイルのパス
+        """
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+    
+    def record_copy(self, source_ami_id: str, source_region: str,
+                    target_region: str, copied_ami_id: str, pending: bool = False) -> None:
+        """
+        コピーしたAMI IDを記録
+        
+        Args:
+            source_ami_id: コピー元AMI ID
+            source_region: コピー元リージョン
+            target_region: コピー先リージョン
+            copied_ami_id: コピー先のAMI ID
+            pending: コピー先のAMIがまだ利用可能になっていない場合True
+        """
+        entry = self.entries.setdefault(source_ami_id, {"source_region": source_region, "copies": {}})
+        entry["source_region"] = source_region
+        entry["copies"][target_region] = copied_ami_id
+        pending_regions = [region for region in entry.get("pending", []) if region != target_region]
+        if pending:
+            pending_regions.append(target_region)
+        if pending_regions:
+            entry["pending"] = sorted(pending_regions)
+        else:
+            entry.pop("pending", None)
+    
+    def lookup(self, source_ami_id: str, region: str) -> Optional[str]:
+        """
+        指定リージョンに記録済みのAMI IDを取得（利用可能になっていないコピーを含む）
+        
+        Args:
+            source_ami_id: コピー元AMI ID
+            region: リージョン
+            
+        Returns:
+            Optional[str]: AMI ID（未記録の場合はNone）
+        """
+        return self.get_region_map(source_ami_id, include_pending=True).get(region)
+    
+    def get_pending_copies(self, source_ami_id: str) -> Dict[str, str]:
+        """
+        利用可能になっていないコピーのリージョン→AMI IDのマッピングを取得
+        
+        Args:
+            source_ami_id: コピー元AMI ID
+            
+        Returns:
+            Dict[str, str]: リージョン→AMI IDのマッピング（該当がない場合は空）
+        """
+        entry = self.entries.get(source_ami_id) or {}
+        copies = entry.get("copies", {})
+        return {region: copies[region] for region in entry.get("pending", []) if region in copies}
+    
+    def get_region_map(self, source_ami_id: str, include_pending: bool = False) -> Dict[str, str]:
+        """
+        コピー元を含むリージョン→AMI IDのマッピングを取得
+        
+        Args:
+            source_ami_id: コピー元AMI ID
+            include_pending: 利用可能になっていないコピーを含めるか
+            
+        Returns:
+            Dict[str, str]: リージョン→AMI IDのマッピング（未記録の場合は空）
+        """
+        entry = self.entries.get(source_ami_id)
+        if not entry:
+            return {}
+        region_map = {entry["source_region"]: source_ami_id}
+        region_map.update(entry.get("copies", {}))
+        if not include_pending:
+            for region in self.get_pending_copies(source_ami_id):
+                region_map.pop(region, None)
+        return region_map
+    
+    def save(self) -> None:
+        """カタログをファイルに保存"""
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+            f.write("\n")
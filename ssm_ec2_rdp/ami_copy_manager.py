@@ -0,0 +1,187 @@
+"""
+AMIリージョン間コピー管理クラス
+デプロイ前にカスタムAMIを対象リージョンへコピーし、AMIカタログに記録する
+
+使用例:
+    python -m ssm_ec2_rdp.ami_copy_manager \\
+        --ami-id ami-0123456789abcdef0 --source-region ap-northeast-1 \\
+        --target-regions us-east-1,us-west-2 --catalog ami-catalog.json
+"""
+
+import argparse
+import hashlib
+import sys
+from typing import Dict, List, Optional, Protocol
+from .ami_catalog import AMICatalog
+from .types import AMIConfiguration, AMINotFoundError, InvalidValueError
+
+
+class AMICopyClient(Protocol):
+    """AMIコピーを実行するクライアントのインターフェース"""
+    
+    def copy_image(self, source_ami_id: str, source_region: str, target_region: str, name: str) -> str:
+        """AMIをコピーしてコピー先のAMI IDを返す"""
+        ...
+    
+    def is_image_available(self, ami_id: str, region: str) -> bool:
+        """AMIが利用可能（available）かどうかを返す"""
+        ...
+
+
+class Boto3AMICopyClient:
+    """boto3でEC2 CopyImage APIを呼び出すクライアント"""
+    
+    def __init__(self, wait: bool = True):
+        """
+        Boto3AMICopyClientを初期化
+        
+        Args:
+            wait: コピー先AMIが利用可能になるまで待機するか
+        """
+        try:
+            import boto3
+        except ImportError as e:
+            raise AMINotFoundError(
+                "AMIのコピーにはboto3が必要です。pip install boto3 を実行してください。"
+            ) from e
+        self._boto3 = boto3
+        self.wait = wait
+    
+    def copy_image(self, source_ami_id: str, source_region: str, target_region: str, name: str) -> str:
+        ec2_client = self._boto3.client("ec2", region_name=target_region)
+        response = ec2_client.copy_image(
+            SourceImageId=source_ami_id,
+            SourceRegion=source_region,
+            Name=name
+        )
+        copied_ami_id = response["ImageId"]
+        if self.wait:
+            ec2_client.get_waiter("image_available").wait(ImageIds=[copied_ami_id])
+        return copied_ami_id
+    
+    def is_image_available(self, ami_id: str, region: str) -> bool:
+        ec2_client = self._boto3.client("ec2", region_name=region)
+        images = ec2_client.describe_images(ImageIds=[ami_id])["Images"]
+        return bool(images) and images[0]["State"] == "available"
+
+
+class StubAMICopyClient:
+    """テスト・ドライラン用のAMIコピークライアント（AWS APIを呼び出さない）"""
+    
+    def __init__(self):
+        """StubAMICopyClientを初期化"""
+        self.calls: List[Dict[str, str]] = []
+    
+    def copy_image(self, source_ami_id: str, source_region: str, target_region: str, name: str) -> str:
+        self.calls.append({
+            "source_ami_id": source_ami_id,
+            "source_region": source_region,
+            "target_region": target_region,
+            "name": name
+        })
+        # コピー元とコピー先リージョンから決定的なAMI IDを生成
+        digest = hashlib.sha256(f"{source_ami_id}:{target_region}".encode("utf-8")).hexdigest()
+        return f"ami-{digest[:17]}"
+    
+    def is_image_available(self, ami_id: str, region: str) -> bool:
+        return True
+
+
+class AMICopyManager:
+    """カスタムAMIのリージョン間コピーとカタログ記録を担当するクラス"""
+    
+    def __init__(self, catalog: AMICatalog, client: AMICopyClient, save: bool = True):
+        """
+        AMICopyManagerを初期化
+        
+        Args:
+            catalog: コピー結果を記録するAMIカタログ
+            client: AMIコピーを実行するクライアント
+            save: コピー結果をカタログファイルに保存するか（ドライラン時はFalse）
+        """
+        self.catalog = catalog
+        self.client = client
+        self.save = save
+    
+    def copy_to_regions(self, source_ami_id: str, source_region: str,
+                        target_regions: List[str]) -> Dict[str, str]:
+        """
+        AMIを対象リージョンへコピーし、カタログに記録
+        
+        カタログに記録済みのリージョンはコピーをスキップする。利用可能になる前に記録した
+        コピー（pending）は、利用可能になっていればpendingを解除する。
+        
+        Args:
+            source_ami_id: コピー元AMI ID
+            source_region: コピー元リージョン
+            target_regions: コピー先リージョンのリスト
+            
+        Returns:
+            Dict[str, str]: コピー元を含むリージョン→AMI IDのマッピング（利用可能なAMIのみ）
+            
+        Raises:
+            InvalidValueError: AMI IDまたはリージョン名が無効な場合
+        """
+        if not AMIConfiguration._is_valid_ami_id(source_ami_id):
+            raise InvalidValueError(f"無効なAMI ID形式です: {source_ami_id}")
+        
+        for region in [source_region] + list(target_regions):
+            if not AMIConfiguration._is_valid_region(region):
+                raise InvalidValueError(f"無効なリージョン名です: {region}")
+        
+        pending_copies = self.catalog.get_pending_copies(source_ami_id)
+        for region in target_regions:
+            if region == source_region:
+                continue
+            if region in pending_copies:
+                copied_ami_id = pending_copies[region]
+            elif self.catalog.lookup(source_ami_id, region):
+                continue
+            else:
+                copied_ami_id = self.client.copy_image(
+                    source_ami_id, source_region, region,
+                    name=f"{source_ami_id}-copy-from-{source_region}"
+                )
+            self.catalog.record_copy(
+                source_ami_id, source_region, region, copied_ami_id,
+                pending=not self.client.is_image_available(copied_ami_id, region)
+            )
+            # 途中で失敗してもコピー済みの結果を失わないよう都度保存
+            if self.save:
+                self.catalog.save()
+        
+        return self.catalog.get_region_map(source_ami_id)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """AMIコピーのコマンドラインエントリポイント"""
+    parser = argparse.ArgumentParser(description="カスタムAMIを対象リージョンへ事前コピーする")
+    parser.add_argument("--ami-id", required=True, help="コピー元AMI ID")
+    parser.add_argument("--source-region", required=True, help="コピー元リージョン")
+    parser.add_argument("--target-regions", required=True, help="コピー先リージョン（カンマ区切り）")
+    parser.add_argument("--catalog", default="ami-catalog.json", help="AMIカタログファイルのパス")
+    parser.add_argument("--stub", action="store_true",
+                        help="AWS APIを呼び出さずにスタブでコピーする（カタログファイルは更新しない）")
+    parser.add_argument("--no-wait", action="store_true", help="コピー完了を待機しない")
+    args = parser.parse_args(argv)
+    
+    client = StubAMICopyClient() if args.stub else Boto3AMICopyClient(wait=not args.no_wait)
+    # スタブが生成したAMI IDは実在しないため、スタックが参照するカタログには保存しない
+    manager = AMICopyManager(AMICatalog(args.catalog), client, save=not args.stub)
+    target_regions = [region.strip() for region in args.target_regions.split(",") if region.strip()]
+    
+    try:
+        region_map = manager.copy_to_regions(args.ami_id, args.source_region, target_regions)
+    except (InvalidValueError, AMINotFoundError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    
+    for region, ami_id in sorted(region_map.items()):
+        print(f"{region}: {ami_id}")
+    for region, ami_id in sorted(manager.catalog.get_pending_copies(args.ami_id).items()):
+        print(f"{region}: {ami_id} (pending: 利用可能になった後に再実行してください)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,14 +3,19 @@ AMI解決クラス
 AMI設定からMachineImageオブジェクトを生成する
 """
 
-from typing import Tuple, Optional
-from aws_cdk import Stack, aws_ec2 as ec2
-from .types import AMIConfiguration, AMIInfo, OSType, AMINotFoundError
+from typing import Dict, Tuple, Optional
+from aws_cdk import Annotations, Aws, CfnMapping, Stack, aws_ec2 as ec2
+from .ami_catalog import AMICatalog
+from .types import AMIConfiguration, AMIInfo, LinuxDistro, OSType, AMINotFoundError
 
 
 class AMIResolver:
     """AMI設定からMachineImageオブジェクトを生成するクラス"""
     
+    # リージョン別AMIマッピングのCfnMapping論理ID・キー名
+    REGION_MAP_ID = "AmiRegionMap"
+    REGION_MAP_KEY = "ami"
+    
     def __init__(self, stack: Stack):
         """
         AMIResolverを初期化
@@ -38,6 +43,8 @@ class AMIResolver:
                 return self._resolve_by_ami_id(ami_config.ami_id)
             elif ami_config.ami_parameter:
                 return self._resolve_by_parameter(ami_config.ami_parameter)
+            elif ami_config.ami_region_map:
+                return self._resolve_by_region_map(ami_config.ami_region_map)
             else:
                 # この状況は通常起こらない（AMIConfigurationでバリデーション済み）
                 raise AMINotFoundError("AMI設定が指定されていません。")
@@ -107,7 +114,31 @@ class AMIResolver:
         ami_info = AMIInfo(
             ami_id=parameter_path,  # パラメータパスを一時的にami_idとして保存
             os_type=os_type,
-            description=f"SSM Parameter ({parameter_path})"
+            description=f"SSM Parameter ({parameter_path})",
+            distro=self._detect_distro_from_parameter(parameter_path)
+        )
+        
+        return machine_image, ami_info
+    
+    def _resolve_by_region_map(self, ami_region_map: Dict[str, str]) -> Tuple[ec2.MachineImage, AMIInfo]:
+        """
+        リージョン→AMI IDマッピングからMachineImageを作成
+        
+        Args:
+            ami_region_map: リージョン名をキー、AMI IDを値とする辞書
+            
+        Returns:
+            Tuple[ec2.MachineImage, AMIInfo]: (MachineImage, AMI情報)
+        """
+        # カスタムAMIのマッピングのため、AMI ID指定と同様にOS種別は判定不可
+        os_type = OSType.UNKNOWN
+        
+        machine_image = ec2.MachineImage.generic_linux(ami_region_map)
+        
+        ami_info = AMIInfo(
+            ami_id=self.REGION_MAP_ID,  # 実際のAMI IDはデプロイ先リージョンで決まる
+            os_type=os_type,
+            description=f"Region AMI Map ({', '.join(sorted(ami_region_map))})"
         )
         
         return machine_image, ami_info
@@ -166,6 +197,32 @@ class AMIResolver:
         # 判定できない場合はUNKNOWN
         return OSType.UNKNOWN
     
+    def _detect_distro_from_parameter(self, parameter_path: str) -> LinuxDistro:
+        """
+        SSMパラメータパスからLinuxディストリビューションを推測
+        
+        AWS公式パラメータパスのパターン（al2023-ami-*、amzn2-ami-*、canonical/ubuntu/*）から判定する。
+        
+        Args:
+            parameter_path: SSMパラメータパス
+            
+        Returns:
+            LinuxDistro: 推測されたディストリビューション（判定できない場合はUNKNOWN）
+        """
+        parameter_lower = parameter_path.lower()
+        
+        if self._detect_os_from_parameter(parameter_path) != OSType.LINUX:
+            return LinuxDistro.UNKNOWN
+        
+        # al2023はal2を含むため先に判定する
+        if 'al2023' in parameter_lower:
+            return LinuxDistro.AMAZON_LINUX_2023
+        if 'amzn2' in parameter_lower or 'amazon-linux-2' in parameter_lower:
+            return LinuxDistro.AMAZON_LINUX_2
+        if 'ubuntu' in parameter_lower or 'canonical' in parameter_lower:
+            return LinuxDistro.UBUNTU
+        return LinuxDistro.UNKNOWN
+    
     def get_ami_info_only(self, ami_config: AMIConfiguration) -> AMIInfo:
         """
         MachineImageを作成せずにAMI情報のみを取得
@@ -191,11 +248,112 @@ class AMIResolver:
             return AMIInfo(
                 ami_id=ami_config.ami_parameter,
                 os_type=os_type,
-                description=f"SSM Parameter ({ami_config.ami_parameter})"
+                description=f"SSM Parameter ({ami_config.ami_parameter})",
+                distro=self._detect_distro_from_parameter(ami_config.ami_parameter)
+            )
+        elif ami_config.ami_region_map:
+            return AMIInfo(
+                ami_id=self.REGION_MAP_ID,
+                os_type=OSType.UNKNOWN,
+                description=f"Region AMI Map ({', '.join(sorted(ami_config.ami_region_map))})"
             )
         else:
             raise AMINotFoundError("AMI設定が指定されていません。")
     
+    def get_image_id(self, ami_config: AMIConfiguration) -> str:
+        """
+        CfnInstanceのImageIdに指定する値を取得
+        
+        SSMパラメータ指定の場合は動的参照（{{resolve:ssm:...}}）を返し、
+        デプロイ時にCloudFormationがAMI IDを解決する。
+        synth時のcontext lookupが不要になり、テンプレートがリージョン非依存となる。
+        
+        リージョン別AMIマッピング指定の場合はCfnMappingを1つ生成し、
+        AWS::Region をキーとした Fn::FindInMap のトークンを返す。
+        AMI ID指定でAMIカタログにリージョン間コピーが記録されている場合も同様に
+        コピー元とコピー先のAMIをマッピングとして出力する。
+        
+        Args:
+            ami_config: AMI設定オブジェクト
+            
+        Returns:
+            str: AMI ID、SSM動的参照文字列、またはFn::FindInMapトークン
+            
+        Raises:
+            AMINotFoundError: AMI設定が指定されていない場合
+        """
+        if ami_config.ami_id:
+            catalog_map = self._get_catalog_region_map(ami_config)
+            if catalog_map:
+                mapping = self._get_or_create_region_mapping(catalog_map)
+                return mapping.find_in_map(Aws.REGION, self.REGION_MAP_KEY)
+            return ami_config.ami_id
+        elif ami_config.ami_parameter:
+            return self._build_ssm_dynamic_reference(ami_config.ami_parameter)
+        elif ami_config.ami_region_map:
+            mapping = self._get_or_create_region_mapping(ami_config.ami_region_map)
+            return mapping.find_in_map(Aws.REGION, self.REGION_MAP_KEY)
+        else:
+            raise AMINotFoundError("AMI設定が指定されていません。")
+    
+    def _get_catalog_region_map(self, ami_config: AMIConfiguration) -> Dict[str, str]:
+        """
+        AMIカタログからAMI IDのリージョン別マッピングを取得
+        
+        Args:
+            ami_config: AMI設定オブジェクト
+            
+        利用可能（available）になる前に記録したコピーは使用しない。
+        
+        Returns:
+            Dict[str, str]: リージョン→AMI IDのマッピング（カタログ未指定・未記録の場合は空）
+        """
+        if not ami_config.ami_catalog:
+            return {}
+        catalog = AMICatalog(ami_config.ami_catalog)
+        pending_copies = catalog.get_pending_copies(ami_config.ami_id)
+        if pending_copies:
+            Annotations.of(self.stack).add_warning(
+                f"AMIカタログの {', '.join(sorted(pending_copies))} のコピーは利用可能になっていないため使用しません。"
+                "コピーの完了後にami_copy_managerを再実行してください。"
+            )
+        return catalog.get_region_map(ami_config.ami_id)
+    
+    def _get_or_create_region_mapping(self, ami_region_map: Dict[str, str]) -> CfnMapping:
+        """
+        リージョン別AMIマッピングのCfnMappingを取得（未作成の場合は作成）
+        
+        Args:
+            ami_region_map: リージョン名をキー、AMI IDを値とする辞書
+            
+        Returns:
+            CfnMapping: スタック内で単一のAMIマッピング
+        """
+        existing = self.stack.node.try_find_child(self.REGION_MAP_ID)
+        if existing is not None:
+            return existing
+        
+        return CfnMapping(
+            self.stack, self.REGION_MAP_ID,
+            mapping={
+                region: {self.REGION_MAP_KEY: ami_id}
+                for region, ami_id in sorted(ami_region_map.items())
+            }
+        )
+    
+    @staticmethod
+    def _build_ssm_dynamic_reference(parameter_path: str) -> str:
+        """
+        SSMパラメータの動的参照文字列を生成
+        
+        Args:
+            parameter_path: SSMパラメータパス
+            
+        Returns:
+            str: {{resolve:ssm:パラメータパス}} 形式の文字列
+        """
+        return f"{{{{resolve:ssm:{parameter_path}}}}}"
+    
     def is_windows_ami(self, ami_config: AMIConfiguration) -> bool:
         """
         指定されたAMI設定がWindows AMIかどうかを判定
@@ -0,0 +1,237 @@
+"""
+起動タイムライン解析ツール
+ユーザーデータが記録したタイムラインログを集計し、フェーズごとの所要時間のパーセンタイルを算出する
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, Iterable, List, Optional
+
+
+# 集計するパーセンタイル
+DEFAULT_PERCENTILES = [50, 90, 99]
+
+# パッケージインストールに該当するフェーズ（プロファイルによりフェーズ構成が異なるため合計で比較する）
+INSTALL_PHASES = ['SystemUpdate', 'BasicTools', 'Docker', 'InstallPackages',
+                  'PackageManagerConfig', 'Packages', 'DeferredPackages']
+
+# バックグラウンドで実行され、起動の所要時間に含めないフェーズ
+BACKGROUND_PHASES = ['DeferredPackages']
+
+# フェーズ合計の集計名
+INSTALL_TOTAL = 'install (total)'
+BOOT_TOTAL = 'boot (total)'
+
+
+def parse_timeline(lines: Iterable[str]) -> Dict[str, List[int]]:
+    """
+    タイムラインログからフェーズごとの所要時間を取り出す
+
+    JSONとして解釈できない行や終了イベント以外の行は無視する。
+
+    Args:
+        lines: タイムラインログの各行
+
+    Returns:
+        Dict[str, List[int]]: フェーズ名 -> 所要時間（ミリ秒）のリスト
+    """
+    durations: Dict[str, List[int]] = {}
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(record, dict) or record.get('event') != 'end':
+            continue
+        phase = record.get('phase')
+        duration_ms = record.get('duration_ms')
+        if not isinstance(phase, str) or not isinstance(duration_ms, int):
+            continue
+        durations.setdefault(phase, []).append(duration_ms)
+    return durations
+
+
+def percentile(values: List[int], p: float) -> float:
+    """
+    線形補間によるパーセンタイルを算出
+
+    Args:
+        values: 値のリスト（空でないこと）
+        p: パーセンタイル（0〜100）
+
+    Returns:
+        float: パーセンタイル値
+
+    Raises:
+        ValueError: 値のリストが空の場合
+    """
+    if not values:
+        raise ValueError("パーセンタイルを算出する値がありません。")
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(durations: Dict[str, List[int]],
+              percentiles: Optional[List[int]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    フェーズごとの所要時間をパーセンタイルに集計
+
+    Args:
+        durations: フェーズ名 -> 所要時間（ミリ秒）のリスト
+        percentiles: 集計するパーセンタイル（省略時は50, 90, 99）
+
+    Returns:
+        Dict[str, Dict[str, float]]: フェーズ名 -> {'count', 'p50', ...}
+    """
+    percentiles = percentiles or DEFAULT_PERCENTILES
+    summary = {}
+    for phase, values in durations.items():
+        if not values:
+            continue
+        stats: Dict[str, float] = {'count': len(values)}
+        for p in percentiles:
+            stats[f"p{p}"] = percentile(values, p)
+        summary[phase] = stats
+    return summary
+
+
+def add_install_total(durations: Dict[str, List[int]]) -> Dict[str, List[int]]:
+    """
+    1ホスト分の所要時間にパッケージインストールフェーズの合計を追加
+
+    Args:
+        durations: 1ホスト分のフェーズ名 -> 所要時間（ミリ秒）のリスト
+
+    Returns:
+        Dict[str, List[int]]: インストールフェーズがあれば合計を追加した所要時間
+    """
+    install = [sum(durations[phase]) for phase in INSTALL_PHASES if phase in durations]
+    if not install:
+        return durations
+    return {**durations, INSTALL_TOTAL: [sum(install)]}
+
+
+def add_boot_total(durations: Dict[str, List[int]]) -> Dict[str, List[int]]:
+    """
+    1ホスト分の所要時間にユーザーデータ全体（バックグラウンドのフェーズを除く）の合計を追加
+
+    焼き込みモードと通常モードのようにフェーズ構成が大きく異なる場合でも、
+    合計同士で起動の所要時間を比較できるようにする。
+
+    Args:
+        durations: 1ホスト分のフェーズ名 -> 所要時間（ミリ秒）のリスト
+
+    Returns:
+        Dict[str, List[int]]: フェーズがあれば合計を追加した所要時間
+    """
+    boot = [sum(values) for phase, values in durations.items() if phase not in BACKGROUND_PHASES]
+    if not boot:
+        return durations
+    return {**durations, BOOT_TOTAL: [sum(boot)]}
+
+
+def compare(baseline: Dict[str, List[int]], candidate: Dict[str, List[int]],
+            p: float = 50) -> Dict[str, Dict[str, float]]:
+    """
+    2つのホスト群のフェーズごとの所要時間を比較
+
+    両方に存在するフェーズのみを比較する。speedupは「ベースラインの所要時間 / 比較対象の所要時間」で、
+    1より大きいほど比較対象が速い。
+
+    Args:
+        baseline: ベースラインのフェーズ名 -> 所要時間（ミリ秒）のリスト
+        candidate: 比較対象のフェーズ名 -> 所要時間（ミリ秒）のリスト
+        p: 比較に使用するパーセンタイル
+
+    Returns:
+        Dict[str, Dict[str, float]]: フェーズ名 -> {'baseline', 'candidate', 'speedup'}
+    """
+    result = {}
+    for phase, values in candidate.items():
+        if not values or not baseline.get(phase):
+            continue
+        before = percentile(baseline[phase], p)
+        after = percentile(values, p)
+        result[phase] = {
+            'baseline': before,
+            'candidate': after,
+            'speedup': before / after if after else float('inf')
+        }
+    return result
+
+
+def load_logs(paths: List[str]) -> Dict[str, List[int]]:
+    """
+    タイムラインログを読み込み、全ホストのフェーズごとの所要時間をまとめる
+
+    Args:
+        paths: タイムラインログのパス（1ファイル = 1ホスト）
+
+    Returns:
+        Dict[str, List[int]]: フェーズ名 -> 所要時間（ミリ秒）のリスト
+
+    Raises:
+        OSError: ログを読み込めない場合
+    """
+    durations: Dict[str, List[int]] = {}
+    for path in paths:
+        # WindowsのAdd-Contentで書かれたログにBOMが付く場合に備えてutf-8-sigで読む
+        with open(path, encoding="utf-8-sig", errors="replace") as f:
+            for phase, values in add_install_total(add_boot_total(parse_timeline(f))).items():
+                durations.setdefault(phase, []).extend(values)
+    return durations
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """起動タイムライン解析のコマンドラインエントリポイント"""
+    parser = argparse.ArgumentParser(description="起動タイムラインログからフェーズごとの所要時間を集計する")
+    parser.add_argument("logs", nargs="+", help="収集したタイムラインログ（1ファイル = 1ホスト）")
+    parser.add_argument("--baseline", nargs="+", metavar="LOG",
+                        help="比較対象のベースラインのタイムラインログ（指定時はp50の短縮率を出力する）")
+    parser.add_argument("--json", action="store_true", help="JSON形式で出力する")
+    args = parser.parse_args(argv)
+
+    try:
+        durations = load_logs(args.logs)
+        baseline = load_logs(args.baseline) if args.baseline else None
+    except OSError as e:
+        print(f"❌ ログを読み込めません: {e.filename}: {e}", file=sys.stderr)
+        return 1
+
+    if baseline is not None:
+        comparison = compare(baseline, durations)
+        if not comparison:
+            print("❌ ベースラインと共通のフェーズがありません。", file=sys.stderr)
+            return 1
+        if args.json:
+            print(json.dumps(comparison, ensure_ascii=False, indent=2))
+            return 0
+        print(f"{'phase':<24}{'base p50':>12}{'new p50':>12}{'speedup':>10}")
+        for phase, stats in comparison.items():
+            print(f"{phase:<24}{stats['baseline']:>12.0f}{stats['candidate']:>12.0f}{stats['speedup']:>9.2f}x")
+        return 0
+
+    summary = summarize(durations)
+    if not summary:
+        print("❌ 集計対象のフェーズがありません。", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"{'phase':<24}{'count':>7}{'p50(ms)':>12}{'p90(ms)':>12}{'p99(ms)':>12}")
+    for phase, stats in summary.items():
+        print(f"{phase:<24}{stats['count']:>7}{stats['p50']:>12.0f}{stats['p90']:>12.0f}{stats['p99']:>12.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,6 +11,16 @@ from .types import EC2Configuration, validate_configuration, get_configuration_h
 class ConfigurationManager:
     """設定の読み取り、検証、統合を担当するクラス"""
     
+    # オプション設定のcontextキーとデフォルト値
+    OPTIONAL_CONTEXT_DEFAULTS: Dict[str, Any] = {
+        'subnet-type': 'private',
+        's3-gateway-endpoint': False,
+        'image-baking': False,
+        'fast-launch': False,
+        'fast-launch-snapshot-count': 5,
+        'fast-launch-max-parallel-launches': 6
+    }
+    
     def __init__(self, app: App):
         """
         ConfigurationManagerを初期化
@@ -43,18 +53,23 @@ class ConfigurationManager:
         Returns:
             Dict[str, Any]: 抽出された設定値の辞書
         """
-        # subnet-typeのデフォルト値は'private'
-        subnet_type = self.app.node.try_get_context('subnet-type')
-        if subnet_type is None:
-            subnet_type = 'private'
-
-        return {
+        context = {
             'ami-id': self.app.node.try_get_context('ami-id'),
             'ami-parameter': self.app.node.try_get_context('ami-parameter'),
+            'ami-region-map': self.app.node.try_get_context('ami-region-map'),
             'instance-type': self.app.node.try_get_context('instance-type'),
             'key-pair-name': self.app.node.try_get_context('key-pair-name'),
-            'subnet-type': subnet_type
+            'ami-catalog': self.app.node.try_get_context('ami-catalog'),
+            'user-data': self.app.node.try_get_context('user-data'),
+            'existing-network': self.app.node.try_get_context('existing-network')
         }
+
+        # オプション設定は未指定の場合にデフォルト値を使用
+        for key, default in self.OPTIONAL_CONTEXT_DEFAULTS.items():
+            value = self.app.node.try_get_context(key)
+            context[key] = default if value is None else value
+
+        return context
     
     def print_help(self) -> None:
         """設定ヘルプを表示"""
@@ -98,12 +113,13 @@ class ConfigurationManager:
         if not self.has_context_value('instance-type'):
             missing_keys.append('instance-type')
         
-        # AMI設定の必須チェック（どちらか一つが必要）
+        # AMI設定の必須チェック（いずれか一つが必要）
         has_ami_id = self.has_context_value('ami-id')
         has_ami_parameter = self.has_context_value('ami-parameter')
+        has_ami_region_map = self.has_context_value('ami-region-map')
         
-        if not has_ami_id and not has_ami_parameter:
-            missing_keys.append('ami-id または ami-parameter')
+        if not has_ami_id and not has_ami_parameter and not has_ami_region_map:
+            missing_keys.append('ami-id、ami-parameter または ami-region-map')
         
         is_complete = len(missing_keys) == 0
         return is_complete, missing_keys
\ No newline at end of file
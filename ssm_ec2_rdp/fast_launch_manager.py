@@ -0,0 +1,143 @@
+"""
+Windows Fast Launch管理クラス
+Windows AMIに対してEC2 Fast Launch（事前プロビジョニング済みスナップショット）を有効化する
+"""
+
+from aws_cdk import Stack, aws_ec2 as ec2, aws_iam as iam, custom_resources as cr
+from .types import AMIConfiguration, AMIInfo, InvalidValueError
+
+
+class FastLaunchManager:
+    """EC2 Fast Launchの検証と有効化を担当するクラス"""
+    
+    # EnableFastLaunch APIの最小並列起動数
+    MIN_PARALLEL_LAUNCHES = 6
+    
+    def __init__(self, stack: Stack):
+        """
+        FastLaunchManagerを初期化
+        
+        Args:
+            stack: CDK Stackインスタンス
+        """
+        self.stack = stack
+    
+    def validate_fast_launch(self, ami_info: AMIInfo, ami_config: AMIConfiguration) -> None:
+        """
+        Fast Launchを有効化できるAMIかどうかを検証
+        
+        EnableFastLaunchは自アカウント所有のAMIでのみ成功する。ami-id・ami-region-mapで
+        指定したカスタムAMIはそのまま対象とし、ami-parameter（AWS公式AMI）の場合は
+        焼き込み後の自アカウント所有のAMIを対象とするよう、image-bakingとの併用を必須とする。
+        
+        ami-idからはOS種別を判定できないため、カスタムAMIはLinuxと判定された場合のみ拒否する
+        （Windows以外のAMIはデプロイ時にEnableFastLaunchが失敗する）。
+        
+        Args:
+            ami_info: AMI情報
+            ami_config: AMI設定
+            
+        Raises:
+            InvalidValueError: Windows AMIでない場合、またはAWS公式AMIでimage-bakingが無効な場合
+        """
+        custom_ami = ami_config.ami_parameter is None
+        if ami_info.is_linux() or not (ami_info.is_windows() or custom_ami):
+            raise InvalidValueError(
+                f"fast-launchはWindows AMIでのみ使用できます: {ami_info.description or ami_info.ami_id}. "
+                "Windows用のami-parameter、またはWindowsのカスタムAMIのami-idを指定してください。"
+            )
+        if not custom_ami and not ami_config.image_baking:
+            raise InvalidValueError(
+                "fast-launchは自アカウント所有のAMIが対象のため、ami-parameterの場合はimage-bakingと併用してください"
+                "（焼き込み後のAMIでFast Launchを有効化します）。"
+            )
+    
+    def enable_fast_launch(self, image_id: str, instance_type: str,
+                           subnet_id: str, security_group_id: str,
+                           snapshot_count: int, max_parallel_launches: int) -> cr.AwsCustomResource:
+        """
+        指定AMIのFast Launchを有効化するカスタムリソースを作成
+        
+        CloudFormationにFast Launchのネイティブリソースがないため、
+        EnableFastLaunch / DisableFastLaunch APIをカスタムリソースから呼び出す。
+        
+        Args:
+            image_id: 対象のAMI ID（SSM動的参照やトークンも可）
+            instance_type: 事前プロビジョニングに使用するインスタンスタイプ
+            subnet_id: 事前プロビジョニング用インスタンスのサブネットID
+            security_group_id: 事前プロビジョニング用インスタンスのセキュリティグループID
+            snapshot_count: 事前プロビジョニングするスナップショット数
+            max_parallel_launches: 事前プロビジョニングの最大並列起動数
+            
+        Returns:
+            cr.AwsCustomResource: Fast Launch有効化カスタムリソース
+        """
+        # 事前プロビジョニング用インスタンスの起動テンプレート（デフォルトVPCに依存しない）
+        launch_template = ec2.CfnLaunchTemplate(
+            self.stack, "FastLaunchTemplate",
+            launch_template_data=ec2.CfnLaunchTemplate.LaunchTemplateDataProperty(
+                instance_type=instance_type,
+                network_interfaces=[
+                    ec2.CfnLaunchTemplate.NetworkInterfaceProperty(
+                        device_index=0,
+                        subnet_id=subnet_id,
+                        groups=[security_group_id]
+                    )
+                ]
+            )
+        )
+        
+        return cr.AwsCustomResource(
+            self.stack, "FastLaunch",
+            on_create=self._fast_launch_call(image_id, launch_template, snapshot_count, max_parallel_launches),
+            on_update=self._fast_launch_call(image_id, launch_template, snapshot_count, max_parallel_launches),
+            on_delete=cr.AwsSdkCall(
+                service="EC2",
+                action="disableFastLaunch",
+                parameters={"ImageId": image_id, "Force": True},
+                ignore_error_codes_matching="InvalidParameterValue|InvalidAMIID.*"
+            ),
+            policy=cr.AwsCustomResourcePolicy.from_statements([
+                iam.PolicyStatement(
+                    actions=[
+                        "ec2:EnableFastLaunch",
+                        "ec2:DisableFastLaunch",
+                        "ec2:DescribeFastLaunchImages",
+                        "ec2:DescribeImages",
+                        "ec2:CreateLaunchTemplate",
+                        "ec2:DescribeLaunchTemplates",
+                        "ec2:DescribeLaunchTemplateVersions",
+                        "ec2:RunInstances",
+                        "ec2:CreateTags",
+                        "iam:CreateServiceLinkedRole"
+                    ],
+                    resources=["*"]
+                )
+            ]),
+            install_latest_aws_sdk=False
+        )
+    
+    @staticmethod
+    def _fast_launch_call(image_id: str, launch_template: ec2.CfnLaunchTemplate,
+                          snapshot_count: int, max_parallel_launches: int) -> cr.AwsSdkCall:
+        """
+        EnableFastLaunch APIの呼び出し定義を作成
+        
+        Returns:
+            cr.AwsSdkCall: EnableFastLaunch呼び出し
+        """
+        return cr.AwsSdkCall(
+            service="EC2",
+            action="enableFastLaunch",
+            parameters={
+                "ImageId": image_id,
+                "ResourceType": "snapshot",
+                "SnapshotConfiguration": {"TargetResourceCount": snapshot_count},
+                "MaxParallelLaunches": max_parallel_launches,
+                "LaunchTemplate": {
+                    "LaunchTemplateId": launch_template.ref,
+                    "Version": launch_template.attr_latest_version_number
+                }
+            },
+            physical_resource_id=cr.PhysicalResourceId.from_response("ImageId")
+        )
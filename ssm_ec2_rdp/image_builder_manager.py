@@ -0,0 +1,162 @@
+"""
+Image Builder管理クラス
+ユーザーデータのステップからEC2 Image Builderパイプラインを生成し、
+セットアップ済みのゴールデンイメージを焼き込む
+"""
+
+import hashlib
+import json
+from typing import List
+from aws_cdk import Stack, aws_iam as iam, aws_imagebuilder as imagebuilder
+from .types import AMIInfo, UserDataStep
+
+
+class ImageBuilderManager:
+    """ゴールデンイメージ焼き込み用のImage Builderリソース生成を担当するクラス"""
+    
+    def __init__(self, stack: Stack):
+        """
+        ImageBuilderManagerを初期化
+        
+        Args:
+            stack: CDK Stackインスタンス
+        """
+        self.stack = stack
+    
+    def build_component_document(self, ami_info: AMIInfo, steps: List[UserDataStep]) -> str:
+        """
+        ユーザーデータのステップからImage Builderコンポーネントドキュメントを生成
+        
+        Args:
+            ami_info: AMI情報
+            steps: ユーザーデータのステップ一覧
+            
+        Returns:
+            str: コンポーネントドキュメント（JSONはYAMLのサブセットとして受け付けられる）
+        """
+        action = "ExecutePowerShell" if ami_info.is_windows() else "ExecuteBash"
+        document = {
+            "name": "SsmEc2RdpSetup",
+            "description": "SSM EC2 RDP instance setup baked from user data steps",
+            "schemaVersion": 1.0,
+            "phases": [
+                {
+                    "name": "build",
+                    "steps": [
+                        {
+                            "name": step.name,
+                            "action": action,
+                            "inputs": {"commands": step.commands}
+                        }
+                        for step in steps
+                    ]
+                }
+            ]
+        }
+        return json.dumps(document, ensure_ascii=False, indent=2)
+    
+    def create_golden_image(self, ami_info: AMIInfo, steps: List[UserDataStep],
+                            parent_image: str, instance_type: str,
+                            subnet_id: str, security_group_id: str) -> imagebuilder.CfnImage:
+        """
+        ゴールデンイメージを焼き込むImage Builderリソース一式を作成
+        
+        初回のイメージはスタックデプロイ時にCfnImageとして作成され、
+        再焼き込み用に同じレシピのパイプライン（手動実行）も作成される。
+        
+        Args:
+            ami_info: AMI情報
+            steps: 焼き込むユーザーデータのステップ一覧
+            parent_image: ベースAMI（AMI ID、SSM動的参照、またはトークン）
+            instance_type: ビルド用インスタンスタイプ
+            subnet_id: ビルド用インスタンスを配置するサブネットID（インスタンスと同じサブネット）
+            security_group_id: ビルド用インスタンスのセキュリティグループID
+            
+        Returns:
+            imagebuilder.CfnImage: 焼き込まれたイメージ（attr_image_idでAMI IDを参照）
+        """
+        platform = "Windows" if ami_info.is_windows() else "Linux"
+        document = self.build_component_document(ami_info, steps)
+        # コンポーネントとレシピは同一バージョンで内容を変更できず、内容の変更時は置き換えとなる。
+        # 新旧のリソースが同じ名前で衝突しないよう、内容のハッシュを名前とバージョンの両方に含める
+        version = self._content_version(document, ami_info.ami_id)
+        content_id = version.rsplit(".", 1)[1]
+        name_prefix = f"{self.stack.stack_name}-golden"
+        
+        component = imagebuilder.CfnComponent(
+            self.stack, "GoldenImageComponent",
+            name=f"{name_prefix}-setup-{content_id}",
+            platform=platform,
+            version=version,
+            data=document,
+            description="Setup steps generated by UserDataManager"
+        )
+        
+        recipe = imagebuilder.CfnImageRecipe(
+            self.stack, "GoldenImageRecipe",
+            name=f"{name_prefix}-recipe-{content_id}",
+            version=version,
+            parent_image=parent_image,
+            components=[
+                imagebuilder.CfnImageRecipe.ComponentConfigurationProperty(
+                    component_arn=component.attr_arn
+                )
+            ]
+        )
+        
+        # ビルド用インスタンスのIAMロール・インスタンスプロファイル
+        builder_role = iam.Role(
+            self.stack, "GoldenImageBuilderRole",
+            assumed_by=iam.ServicePrincipal("ec2.amazonaws.com"),
+            description="IAM role for EC2 Image Builder build instances",
+            managed_policies=[
+                iam.ManagedPolicy.from_aws_managed_policy_name("AmazonSSMManagedInstanceCore"),
+                iam.ManagedPolicy.from_aws_managed_policy_name("EC2InstanceProfileForImageBuilder")
+            ]
+        )
+        builder_profile = iam.CfnInstanceProfile(
+            self.stack, "GoldenImageBuilderInstanceProfile",
+            roles=[builder_role.role_name]
+        )
+        
+        infrastructure = imagebuilder.CfnInfrastructureConfiguration(
+            self.stack, "GoldenImageInfrastructure",
+            name=f"{name_prefix}-infrastructure",
+            instance_profile_name=builder_profile.ref,
+            instance_types=[instance_type],
+            subnet_id=subnet_id,
+            security_group_ids=[security_group_id],
+            terminate_instance_on_failure=True
+        )
+        
+        image = imagebuilder.CfnImage(
+            self.stack, "GoldenImage",
+            image_recipe_arn=recipe.attr_arn,
+            infrastructure_configuration_arn=infrastructure.attr_arn,
+            enhanced_image_metadata_enabled=True
+        )
+        
+        imagebuilder.CfnImagePipeline(
+            self.stack, "GoldenImagePipeline",
+            name=f"{name_prefix}-pipeline",
+            description="Re-bake pipeline for the SSM EC2 RDP golden image (manual trigger)",
+            image_recipe_arn=recipe.attr_arn,
+            infrastructure_configuration_arn=infrastructure.attr_arn,
+            status="ENABLED"
+        )
+        
+        return image
+    
+    @staticmethod
+    def _content_version(*contents: str) -> str:
+        """
+        内容のハッシュからImage Builder用のセマンティックバージョンを生成
+        
+        Args:
+            contents: バージョンの元となる文字列
+            
+        Returns:
+            str: 1.0.<ハッシュ由来の数値> 形式のバージョン
+        """
+        digest = hashlib.sha256("\n".join(contents).encode("utf-8")).hexdigest()
+        return f"1.0.{int(digest[:6], 16)}"
@@ -0,0 +1,152 @@
+"""
+インスタンスカタログクラス
+インスタンスタイプからvCPU数・メモリ量などのスペックを求める
+"""
+
+import re
+from typing import Dict, Optional, Tuple
+from .types import InstanceSpec, InvalidValueError
+from .instance_type_validator import InstanceTypeValidator
+
+
+class InstanceCatalog:
+    """インスタンスタイプのスペックの参照を担当するクラス
+    
+    synth時にAWS APIを呼ばずに済むよう、スペックはインスタンスタイプの命名規則から求める。
+    ファミリー・サイズの分解とT系の判定はInstanceTypeValidatorに従い、
+    バースト可能（T系）インスタンスはサイズ別の表、その他はファミリーごとの
+    vCPUあたりメモリ量から算出する（メモリ量は近似値）。
+    """
+    
+    # バースト可能インスタンスのサイズ別 (vCPU数, メモリMiB)
+    BURSTABLE_SPECS: Dict[str, Tuple[int, int]] = {
+        'nano': (2, 512),
+        'micro': (2, 1024),
+        'small': (2, 2048),
+        'medium': (2, 4096),
+        'large': (2, 8192),
+        'xlarge': (4, 16384),
+        '2xlarge': (8, 32768)
+    }
+    
+    # t2は小さいサイズのvCPU数が異なる
+    T2_SPECS: Dict[str, Tuple[int, int]] = {
+        **BURSTABLE_SPECS,
+        'nano': (1, 512),
+        'micro': (1, 1024),
+        'small': (1, 2048)
+    }
+    
+    # ファミリーの英字部分ごとのvCPUあたりメモリ量（GiB）
+    MEMORY_PER_VCPU_GIB: Dict[str, int] = {
+        'a': 2,
+        'c': 2,
+        'm': 4,
+        'r': 8,
+        'x': 16,
+        'z': 8,
+        'd': 8,
+        'h': 4,
+        'i': 8,
+        'g': 4,
+        'p': 8,
+        'inf': 2,
+        'trn': 4
+    }
+    
+    # 属性に「d」を含まないがNVMeインスタンスストアを持つファミリー
+    NVME_INSTANCE_STORE_FAMILIES = ['g5', 'p5', 'trn1', 'trn1n']
+    
+    # 属性に「d」を含むがインスタンスストアがHDDのファミリー（d系・h系はHDD）
+    HDD_INSTANCE_STORE_PREFIXES = ['d', 'h']
+    
+    # GPUを搭載するファミリーの英字部分（g: グラフィックス、p: 汎用GPU）
+    GPU_PREFIXES = ['g', 'p']
+    
+    def __init__(self):
+        """InstanceCatalogを初期化"""
+        self.validator = InstanceTypeValidator()
+    
+    def get_spec(self, instance_type: str) -> Optional[InstanceSpec]:
+        """
+        インスタンスタイプのスペックを取得
+        
+        Args:
+            instance_type: インスタンスタイプ（例: t3.small）
+            
+        Returns:
+            Optional[InstanceSpec]: スペック（カタログにないインスタンスタイプの場合はNone）
+        """
+        if not isinstance(instance_type, str):
+            return None
+        try:
+            family, size = self.validator.get_family_and_size(instance_type)
+        except InvalidValueError:
+            return None
+        if family not in self.validator.INSTANCE_FAMILIES:
+            return None
+        
+        if self.validator.is_burstable_instance(instance_type):
+            table = self.T2_SPECS if family == 't2' else self.BURSTABLE_SPECS
+            if size not in table:
+                return None
+            vcpus, memory_mib = table[size]
+            return InstanceSpec(instance_type=instance_type, vcpus=vcpus, memory_mib=memory_mib)
+        
+        prefix = re.match(r'[a-z]+', family)
+        vcpus = self._get_vcpus(size)
+        if prefix is None or vcpus is None:
+            return None
+        memory_per_vcpu = self.MEMORY_PER_VCPU_GIB.get(prefix.group(0))
+        if memory_per_vcpu is None:
+            return None
+        return InstanceSpec(
+            instance_type=instance_type,
+            vcpus=vcpus,
+            memory_mib=vcpus * memory_per_vcpu * 1024,
+            instance_store=self.has_nvme_instance_store(family),
+            gpu=prefix.group(0) in self.GPU_PREFIXES
+        )
+    
+    def has_nvme_instance_store(self, family: str) -> bool:
+        """
+        インスタンスファミリーがローカルNVMeインスタンスストアを持つかを判定
+        
+        世代番号の後の属性に「d」を含むファミリー（m5d、c6id、r6idn、g4dn等）と、
+        ストレージ最適化のi系（i3、i4i、im4gn等）が対象。
+        
+        Args:
+            family: インスタンスファミリー（例: m5d）
+            
+        Returns:
+            bool: NVMeインスタンスストアを持つ場合True
+        """
+        family = family.lower()
+        if family in self.NVME_INSTANCE_STORE_FAMILIES:
+            return True
+        match = re.fullmatch(r'([a-z]+)(\d+)([a-z-]*)', family)
+        if match is None:
+            return False
+        prefix, _, attributes = match.groups()
+        if prefix in self.HDD_INSTANCE_STORE_PREFIXES:
+            return False
+        return prefix.startswith('i') and prefix != 'inf' or 'd' in attributes
+    
+    def _get_vcpus(self, size: str) -> Optional[int]:
+        """
+        インスタンスサイズからvCPU数を求める
+        
+        Args:
+            size: インスタンスサイズ（medium, large, xlarge, 2xlarge等）
+            
+        Returns:
+            Optional[int]: vCPU数（metal等、求められない場合はNone）
+        """
+        if size == 'medium':
+            return 1
+        if size == 'large':
+            return 2
+        match = re.fullmatch(r'(\d*)xlarge', size)
+        if match is None:
+            return None
+        return 4 * int(match.group(1) or 1)
@@ -43,6 +43,9 @@ class InstanceTypeValidator:
         'hpc6a', 'hpc6id', 'hpc7a', 'hpc7g'
     ]
     
+    # バースト可能（T系）インスタンスのファミリー（trn1等の「t」で始まる他ファミリーを除く）
+    BURSTABLE_FAMILY_PATTERN = r't\d+[a-z]*'
+    
     # インスタンスサイズ（小さいものから大きいものへ順序付け）
     INSTANCE_SIZES = [
         'nano', 'micro', 'small', 'medium', 'large', 'xlarge',
@@ -196,7 +199,7 @@ class InstanceTypeValidator:
         """
         try:
             family, _ = self.get_family_and_size(instance_type)
-            return family.startswith('t')
+            return re.fullmatch(self.BURSTABLE_FAMILY_PATTERN, family) is not None
         except InvalidValueError:
             return False
     
@@ -215,10 +218,12 @@ class InstanceTypeValidator:
         except InvalidValueError:
             return "Unknown"
         
+        if self.is_burstable_instance(instance_type):
+            return 'Burstable Performance'
+        
         # カテゴリマッピング
         category_map = {
             # 汎用
-            't': 'Burstable Performance', 
             'a': 'General Purpose',
             'm': 'General Purpose',
             # コンピュート最適化
@@ -243,8 +248,8 @@ class InstanceTypeValidator:
             'hpc': 'High Performance Computing'
         }
         
-        # ファミリーの最初の文字または文字列でマッチング
-        for prefix, category in category_map.items():
+        # ファミリーの先頭の文字列でマッチング（inf・hpc等を1文字のプレフィックスより優先）
+        for prefix, category in sorted(category_map.items(), key=lambda item: len(item[0]), reverse=True):
             if family.startswith(prefix):
                 return category
         
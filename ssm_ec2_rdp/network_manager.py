@@ -0,0 +1,173 @@
+"""
+ネットワーク管理クラス
+インスタンスを配置するVPC・VPCエンドポイント・EC2 Instance Connect Endpointの作成とインポートを担当する
+"""
+
+from typing import Tuple
+from aws_cdk import Stack, Fn, Token, aws_ec2 as ec2
+from .types import EC2Configuration, NetworkConfiguration
+
+
+class NetworkManager:
+    """VPC・VPCエンドポイント・EICEの作成とインポートを担当するクラス"""
+
+    def __init__(self, stack: Stack):
+        """
+        NetworkManagerを初期化
+
+        Args:
+            stack: CDK Stackインスタンス
+        """
+        self.stack = stack
+
+    def needs_cloudwatch_endpoint(self, config: EC2Configuration) -> bool:
+        """
+        CloudWatchのインターフェイスエンドポイントが必要か判定
+
+        boot_metrics指定時、プライベートサブネットからメトリクスを送信するために必要となる。
+
+        Args:
+            config: EC2設定
+
+        Returns:
+            bool: CloudWatchエンドポイントが必要な場合True
+        """
+        return bool(
+            config.user_data and config.user_data.get('boot_metrics') and config.instance.subnet_type == "private"
+        )
+
+    def create_network(self, subnet_type: str, s3_gateway_endpoint: bool = False,
+                       cloudwatch_endpoint: bool = False) -> Tuple[ec2.Vpc, NetworkConfiguration]:
+        """
+        VPC・VPCエンドポイント・EICEを作成
+
+        VPCはパブリックサブネットとプライベート（隔離）サブネットを2つのAZに持つ。
+        プライベートサブネットからSSMに接続するためのインターフェイスエンドポイントと、
+        RDP接続用のEC2 Instance Connect Endpointをプライベートサブネットに作成する。
+
+        Args:
+            subnet_type: インスタンスを配置するサブネットタイプ（private / public）
+            s3_gateway_endpoint: S3ゲートウェイエンドポイントを作成するか
+            cloudwatch_endpoint: CloudWatchのインターフェイスエンドポイントを作成するか
+
+        Returns:
+            Tuple[ec2.Vpc, NetworkConfiguration]: 作成したVPCと、インスタンスの配置先のネットワーク設定
+        """
+        vpc = ec2.Vpc(
+            self.stack, "SsmEc2RdpVpc",
+            max_azs=2,  # 2つのAZを使用
+            nat_gateways=0,  # NAT Gatewayは不要（SSM経由でアクセス）
+            subnet_configuration=[
+                ec2.SubnetConfiguration(
+                    subnet_type=ec2.SubnetType.PUBLIC,
+                    name="Public",
+                    cidr_mask=24
+                ),
+                ec2.SubnetConfiguration(
+                    subnet_type=ec2.SubnetType.PRIVATE_ISOLATED,
+                    name="PrivateIsolated",
+                    cidr_mask=24
+                )
+            ]
+        )
+
+        # VPCエンドポイントの作成（プライベートサブネットからSSMサービスへのアクセス用）
+        vpc.add_interface_endpoint(
+            "SsmVpcEndpoint",
+            service=ec2.InterfaceVpcEndpointAwsService.SSM,
+            subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED)
+        )
+
+        vpc.add_interface_endpoint(
+            "SsmMessagesVpcEndpoint",
+            service=ec2.InterfaceVpcEndpointAwsService.SSM_MESSAGES,
+            subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED)
+        )
+
+        # CloudWatchエンドポイント（プライベートサブネットからメトリクスを送信するため）
+        if cloudwatch_endpoint:
+            vpc.add_interface_endpoint(
+                "CloudWatchMonitoringVpcEndpoint",
+                service=ec2.InterfaceVpcEndpointAwsService.CLOUDWATCH_MONITORING,
+                subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED)
+            )
+
+        # S3ゲートウェイエンドポイント（隔離サブネットからAmazon Linuxリポジトリへのアクセス用）
+        if s3_gateway_endpoint:
+            vpc.add_gateway_endpoint(
+                "S3GatewayEndpoint",
+                service=ec2.GatewayVpcEndpointAwsService.S3,
+                subnets=[ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED)]
+            )
+
+        # EC2 Instance Connect Endpoint用のセキュリティグループ
+        eice_security_group = ec2.SecurityGroup(
+            self.stack, "EiceSecurityGroup",
+            vpc=vpc,
+            description="Security group for EC2 Instance Connect Endpoint",
+            allow_all_outbound=True
+        )
+
+        # EC2 Instance Connect Endpointの作成
+        ec2.CfnInstanceConnectEndpoint(
+            self.stack, "InstanceConnectEndpoint",
+            subnet_id=vpc.isolated_subnets[0].subnet_id,
+            security_group_ids=[eice_security_group.security_group_id],
+            preserve_client_ip=False,  # クライアントIPを保持しない（推奨）
+            tags=[
+                {"key": "Name", "value": "EICE-for-RDP"},
+                {"key": "Description", "value": "EC2 Instance Connect Endpoint for RDP access"}
+            ]
+        )
+
+        # サブネットタイプに応じたサブネット選択
+        subnet_type_enum = (
+            ec2.SubnetType.PUBLIC if subnet_type == "public"
+            else ec2.SubnetType.PRIVATE_ISOLATED
+        )
+        network = NetworkConfiguration(
+            vpc_id=vpc.vpc_id,
+            subnet_id=vpc.select_subnets(subnet_type=subnet_type_enum).subnet_ids[0],
+            eice_security_group_id=eice_security_group.security_group_id
+        )
+        return vpc, network
+
+    def validate_network(self, network: NetworkConfiguration) -> None:
+        """
+        既存ネットワークのリソースIDの形式を検証
+
+        ネットワークスタックの出力などのトークンはデプロイ時に解決されるため検証しない。
+
+        Args:
+            network: 既存ネットワークの設定
+
+        Raises:
+            InvalidValueError: リソースIDの形式が正しくない場合
+        """
+        for key, resource_id, prefix in network.resource_ids():
+            if Token.is_unresolved(resource_id):
+                continue
+            NetworkConfiguration.validate_resource_id(key, resource_id, prefix)
+
+    def import_vpc(self, network: NetworkConfiguration) -> ec2.IVpc:
+        """
+        既存のVPCをインポート
+
+        インポートしたVPCはセキュリティグループの作成にのみ使用し、サブネットは
+        ネットワーク設定のIDを直接参照する。
+
+        Args:
+            network: 既存ネットワークの設定
+
+        Returns:
+            ec2.IVpc: インポートしたVPC
+
+        Raises:
+            InvalidValueError: リソースIDの形式が正しくない場合
+        """
+        self.validate_network(network)
+        return ec2.Vpc.from_vpc_attributes(
+            self.stack, "ImportedVpc",
+            vpc_id=network.vpc_id,
+            availability_zones=Fn.get_azs()
+        )
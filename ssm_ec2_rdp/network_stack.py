@@ -0,0 +1,49 @@
+"""
+ネットワークスタック
+VPC・VPCエンドポイント・EC2 Instance Connect Endpointを長期間維持するスタックとして分離し、
+インスタンス設定の変更時にコンピュートスタックのみを再デプロイできるようにする
+"""
+
+from aws_cdk import Stack
+from constructs import Construct
+from .types import EC2Configuration
+from .network_manager import NetworkManager
+
+
+class SsmEc2RdpNetworkStack(Stack):
+    """VPC・VPCエンドポイント・EICEを所有するネットワークスタック"""
+
+    # コンピュートスタックが参照するネットワーク設定の属性
+    EXPORTED_ATTRIBUTES = ['vpc_id', 'subnet_id', 'eice_security_group_id']
+
+    def __init__(self, scope: Construct, construct_id: str,
+                 config: EC2Configuration,
+                 **kwargs) -> None:
+        """
+        ネットワークスタックを初期化
+
+        コンピュートスタックが参照しなくなった値（subnet-type切り替え前のサブネット等）の
+        エクスポートを自動削除しようとしてデプロイが失敗しないよう、ネットワーク設定の全ての値を
+        明示的にエクスポートする。
+
+        Args:
+            scope: 親のConstruct
+            construct_id: スタックID
+            config: EC2設定（サブネットタイプ・VPCエンドポイントの要否の判定に使用）
+        """
+        super().__init__(scope, construct_id, **kwargs)
+
+        network_manager = NetworkManager(self)
+        self.vpc, self.network = network_manager.create_network(
+            config.instance.subnet_type,
+            s3_gateway_endpoint=config.instance.s3_gateway_endpoint,
+            cloudwatch_endpoint=network_manager.needs_cloudwatch_endpoint(config)
+        )
+
+        # 参照側と同じ自動生成名でエクスポートを固定する
+        for attribute in self.EXPORTED_ATTRIBUTES:
+            self.export_value(getattr(self.network, attribute))
+        # subnet-typeを切り替えても参照中のサブネットのエクスポートが削除されないよう、
+        # 両方のサブネットタイプのサブネットをエクスポートする
+        self.export_value(self.vpc.public_subnets[0].subnet_id)
+        self.export_value(self.vpc.isolated_subnets[0].subnet_id)
@@ -1,22 +1,31 @@
+from typing import Optional
 from aws_cdk import (
     Stack,
     aws_ec2 as ec2,
     aws_iam as iam,
+    Annotations,
+    CfnOutput,
     CfnTag,
     Fn
 )
 from constructs import Construct
-from .types import EC2Configuration, ConfigurationError
+from .types import EC2Configuration, ConfigurationError, InvalidValueError, NetworkConfiguration, NetworkReachability
 from .configuration_manager import ConfigurationManager
 from .ami_resolver import AMIResolver
 from .instance_type_validator import InstanceTypeValidator
+from .instance_catalog import InstanceCatalog
 from .key_pair_manager import KeyPairManager
 from .user_data_manager import UserDataManager
+from .image_builder_manager import ImageBuilderManager
+from .fast_launch_manager import FastLaunchManager
+from .user_data_asset_manager import UserDataAssetManager
+from .network_manager import NetworkManager
 
 class SsmEc2RdpStack(Stack):
 
     def __init__(self, scope: Construct, construct_id: str, 
                  config: EC2Configuration,
+                 network: Optional[NetworkConfiguration] = None,
                  **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
@@ -25,7 +34,9 @@ class SsmEc2RdpStack(Stack):
             ami_resolver = AMIResolver(self)
             instance_validator = InstanceTypeValidator()
             key_pair_manager = KeyPairManager(self)
-            user_data_manager = UserDataManager()
+            instance_spec = InstanceCatalog().get_spec(config.instance.instance_type)
+            user_data_manager = UserDataManager(instance_spec)
+            fast_launch_manager = FastLaunchManager(self)
             
             # 設定の検証
             instance_validator.validate_instance_type(config.instance.instance_type)
@@ -33,8 +44,63 @@ class SsmEc2RdpStack(Stack):
             # AMI解決 - 設定されたAMI IDを直接使用
             machine_image, ami_info = ami_resolver.resolve_ami(config.ami)
             
+            # ImageId - SSMパラメータ指定時はデプロイ時に動的参照で解決
+            image_id = ami_resolver.get_image_id(config.ami)
+            
+            # Fast LaunchはWindows AMIでのみ有効
+            if config.ami.fast_launch:
+                fast_launch_manager.validate_fast_launch(ami_info, config.ami)
+            
+            # インスタンスから到達可能なネットワーク
+            reachability = NetworkReachability.for_subnet_type(
+                config.instance.subnet_type, config.instance.s3_gateway_endpoint
+            )
+            
+            # ユーザーデータ追加設定の検証
+            # イメージ焼き込み時もビルド用インスタンスはインスタンスと同じサブネットでセットアップする
+            if config.user_data:
+                errors = user_data_manager.validate_additional_config(ami_info, config.user_data, reachability)
+                if errors:
+                    raise InvalidValueError("user-data設定が不正です: " + " ".join(errors))
+                for key in ['windows_slimming', 'memory_tuning']:
+                    if config.user_data.get(key) and instance_spec is None:
+                        Annotations.of(self).add_warning(
+                            f"インスタンスタイプ {config.instance.instance_type} のメモリ量が不明なため、"
+                            f"{key}は適用されません。"
+                        )
+            
+            # NICE DCV（GPUインスタンス向けの高性能リモートディスプレイ）
+            dcv_settings = None
+            if config.user_data and config.user_data.get('dcv'):
+                dcv_settings = user_data_manager.get_dcv_settings(config.user_data['dcv'])
+            
             # ユーザーデータ生成
-            user_data = user_data_manager.generate_user_data(ami_info)
+            # イメージ焼き込みモードではセットアップをAMIに焼き込み、起動時は最小構成とする
+            # S3アセットに退避する場合、フェッチャーはIAMロール作成後に生成する
+            bootstrap_script = None
+            if config.ami.image_baking:
+                setup_steps = user_data_manager.get_setup_steps(ami_info, config.user_data, reachability)
+                user_data = user_data_manager.generate_baked_image_user_data(ami_info)
+                user_data_content = Fn.base64(user_data.render())
+            else:
+                if user_data_manager.should_offload_to_s3(ami_info, config.user_data, reachability):
+                    bootstrap_script = user_data_manager.generate_bootstrap_script(
+                        ami_info, config.user_data, reachability
+                    )
+                elif config.user_data and config.user_data.get('compress'):
+                    # gzip圧縮済みのマルチパートMIME（Base64エンコード済み）をそのまま使用
+                    compressed = user_data_manager.generate_compressed_user_data(
+                        ami_info, config.user_data, reachability
+                    )
+                    user_data_content = compressed.content_base64
+                    Annotations.of(self).add_info(
+                        f"ユーザーデータ: 圧縮前 {compressed.uncompressed_size}バイト / "
+                        f"圧縮後 {compressed.compressed_size}バイト "
+                        f"(上限 {user_data_manager.USER_DATA_SIZE_LIMIT}バイト)"
+                    )
+                else:
+                    user_data = user_data_manager.generate_user_data(ami_info, config.user_data, reachability)
+                    user_data_content = Fn.base64(user_data.render())
             
         except ConfigurationError as e:
             # 設定エラーをユーザーに分かりやすく表示
@@ -45,24 +111,26 @@ class SsmEc2RdpStack(Stack):
             error_msg = f"スタック作成中に予期しないエラーが発生しました: {str(e)}"
             raise ConfigurationError(error_msg) from e
 
-        # VPCの作成
-        vpc = ec2.Vpc(
-            self, "SsmEc2RdpVpc",
-            max_azs=2,  # 2つのAZを使用
-            nat_gateways=0,  # NAT Gatewayは不要（SSM経由でアクセス）
-            subnet_configuration=[
-                ec2.SubnetConfiguration(
-                    subnet_type=ec2.SubnetType.PUBLIC,
-                    name="Public",
-                    cidr_mask=24
-                ),
-                ec2.SubnetConfiguration(
-                    subnet_type=ec2.SubnetType.PRIVATE_ISOLATED,
-                    name="PrivateIsolated",
-                    cidr_mask=24
+        # ネットワークの作成、または既存ネットワーク（VPC・サブネット・EICE）のインポート
+        network_manager = NetworkManager(self)
+        cloudwatch_endpoint = network_manager.needs_cloudwatch_endpoint(config)
+        if network is not None:
+            # ネットワークスタックが作成したネットワークをエクスポート経由で参照
+            vpc = network_manager.import_vpc(network)
+        elif config.network is not None:
+            network = config.network
+            vpc = network_manager.import_vpc(network)
+            if cloudwatch_endpoint:
+                Annotations.of(self).add_warning(
+                    "既存ネットワークを使用するため、CloudWatchのVPCエンドポイントは作成されません。"
+                    "boot_metricsを送信するには、既存のVPCにエンドポイントを用意してください。"
                 )
-            ]
-        )
+        else:
+            vpc, network = network_manager.create_network(
+                config.instance.subnet_type,
+                s3_gateway_endpoint=config.instance.s3_gateway_endpoint,
+                cloudwatch_endpoint=cloudwatch_endpoint
+            )
 
         # セキュリティグループの作成
         security_group = ec2.SecurityGroup(
@@ -91,23 +159,65 @@ class SsmEc2RdpStack(Stack):
             iam.ManagedPolicy.from_aws_managed_policy_name("AmazonSSMManagedInstanceCore")
         )
         
+        # 起動フェーズのCloudWatchメトリクス送信（boot_metrics指定時、名前空間を限定）
+        if config.user_data and config.user_data.get('boot_metrics'):
+            ec2_role.add_to_policy(iam.PolicyStatement(
+                actions=["cloudwatch:PutMetricData"],
+                resources=["*"],
+                conditions={
+                    "StringEquals": {"cloudwatch:namespace": UserDataManager.BOOT_METRIC_NAMESPACE}
+                }
+            ))
+        
+        # NICE DCVのライセンス確認（EC2上ではリージョンのライセンスバケットを参照する）
+        if dcv_settings is not None:
+            ec2_role.add_to_policy(iam.PolicyStatement(
+                actions=["s3:GetObject"],
+                resources=[f"arn:{self.partition}:s3:::dcv-license.{self.region}/*"]
+            ))
+        
         # IAM Instance Profileの作成
         instance_profile = iam.CfnInstanceProfile(
             self, "SsmEc2RdpInstanceProfile",
             roles=[ec2_role.role_name]
         )
 
+        # セットアップスクリプトをS3アセットに配置し、ユーザーデータはダウンロード・検証・実行のみとする
+        if bootstrap_script is not None:
+            bootstrap_asset = UserDataAssetManager(self).create_bootstrap_asset(
+                ami_info, bootstrap_script, ec2_role
+            )
+            user_data = user_data_manager.generate_asset_fetcher_user_data(
+                ami_info, bootstrap_asset.bucket, bootstrap_asset.s3_object_key, bootstrap_script
+            )
+            user_data_content = Fn.base64(user_data.render())
+
+        # ゴールデンイメージの焼き込み（ビルド用インスタンスはインスタンスと同じサブネットに配置）
+        if config.ami.image_baking:
+            golden_image = ImageBuilderManager(self).create_golden_image(
+                ami_info, setup_steps,
+                parent_image=image_id,
+                instance_type=config.instance.instance_type,
+                subnet_id=network.subnet_id,
+                security_group_id=security_group.security_group_id
+            )
+            image_id = golden_image.attr_image_id
 
         # インスタンスタイプを文字列から直接作成
         # EC2.InstanceTypeにはオーバーロードされたコンストラクタがあり、文字列を直接受け取れる
         instance_type = ec2.InstanceType(config.instance.instance_type)
 
-        # サブネットタイプに応じたサブネット選択
-        subnet_type_enum = (
-            ec2.SubnetType.PUBLIC if config.instance.subnet_type == "public"
-            else ec2.SubnetType.PRIVATE_ISOLATED
-        )
-        selected_subnets = vpc.select_subnets(subnet_type=subnet_type_enum).subnet_ids
+        # Windows Fast Launch（焼き込みモードの場合は焼き込み後のAMIが対象）
+        fast_launch = None
+        if config.ami.fast_launch:
+            fast_launch = fast_launch_manager.enable_fast_launch(
+                image_id,
+                instance_type=config.instance.instance_type,
+                subnet_id=network.subnet_id,
+                security_group_id=security_group.security_group_id,
+                snapshot_count=config.ami.fast_launch_snapshot_count,
+                max_parallel_launches=config.ami.fast_launch_max_parallel_launches
+            )
 
         # EC2インスタンス作成（CfnInstanceを使用してAMI IDを直接指定）
         # パブリックサブネット選択時はパブリックIPを自動割り当て
@@ -115,16 +225,16 @@ class SsmEc2RdpStack(Stack):
             # パブリックサブネット: NetworkInterfacesでパブリックIP自動割り当て設定
             cfn_instance = ec2.CfnInstance(
                 self, "SsmEc2RdpInstance",
-                image_id=config.ami.ami_id if config.ami.ami_id else "ami-020d982eb32b97ffc",
+                image_id=image_id,
                 instance_type=config.instance.instance_type,
                 key_name=config.instance.key_pair_name if config.instance.key_pair_name else None,
                 iam_instance_profile=instance_profile.ref,
-                user_data=Fn.base64(user_data.render()) if user_data else None,
+                user_data=user_data_content,
                 network_interfaces=[
                     ec2.CfnInstance.NetworkInterfaceProperty(
                         device_index="0",
                         associate_public_ip_address=True,  # パブリックIP自動割り当て
-                        subnet_id=selected_subnets[0],
+                        subnet_id=network.subnet_id,
                         group_set=[security_group.security_group_id]
                     )
                 ],
@@ -136,55 +246,42 @@ class SsmEc2RdpStack(Stack):
             # プライベートサブネット: 従来通りの設定
             cfn_instance = ec2.CfnInstance(
                 self, "SsmEc2RdpInstance",
-                image_id=config.ami.ami_id if config.ami.ami_id else "ami-020d982eb32b97ffc",
+                image_id=image_id,
                 instance_type=config.instance.instance_type,
                 key_name=config.instance.key_pair_name if config.instance.key_pair_name else None,
-                subnet_id=selected_subnets[0],
+                subnet_id=network.subnet_id,
                 security_group_ids=[security_group.security_group_id],
                 iam_instance_profile=instance_profile.ref,
-                user_data=Fn.base64(user_data.render()) if user_data else None,
+                user_data=user_data_content,
                 tags=[
                     CfnTag(key="Name", value="SSM EC2 RDP Instance")
                 ]
             )
 
-        # VPCエンドポイントの作成（プライベートサブネットからSSMサービスへのアクセス用）
-        vpc.add_interface_endpoint(
-            "SsmVpcEndpoint",
-            service=ec2.InterfaceVpcEndpointAwsService.SSM,
-            subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED)
-        )
-
-        vpc.add_interface_endpoint(
-            "SsmMessagesVpcEndpoint",
-            service=ec2.InterfaceVpcEndpointAwsService.SSM_MESSAGES,
-            subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_ISOLATED)
-        )
-
-
-        # EC2 Instance Connect Endpoint用のセキュリティグループ
-        eice_security_group = ec2.SecurityGroup(
-            self, "EiceSecurityGroup",
-            vpc=vpc,
-            description="Security group for EC2 Instance Connect Endpoint",
-            allow_all_outbound=True
-        )
+        # 事前プロビジョニングの開始後にインスタンスを起動する
+        if fast_launch is not None:
+            cfn_instance.node.add_dependency(fast_launch)
 
         # EICEからEC2インスタンスへのRDPアクセスを許可
         security_group.add_ingress_rule(
-            peer=ec2.Peer.security_group_id(eice_security_group.security_group_id),
+            peer=ec2.Peer.security_group_id(network.eice_security_group_id),
             connection=ec2.Port.tcp(3389),
             description="RDP access from EC2 Instance Connect Endpoint"
         )
 
-        # EC2 Instance Connect Endpointの作成
-        ec2.CfnInstanceConnectEndpoint(
-            self, "InstanceConnectEndpoint",
-            subnet_id=vpc.isolated_subnets[0].subnet_id,
-            security_group_ids=[eice_security_group.security_group_id],
-            preserve_client_ip=False,  # クライアントIPを保持しない（推奨）
-            tags=[
-                {"key": "Name", "value": "EICE-for-RDP"},
-                {"key": "Description", "value": "EC2 Instance Connect Endpoint for RDP access"}
-            ]
-        )
+        # EICEからEC2インスタンスへのNICE DCVアクセスを許可し、ポートフォワードのコマンドを出力
+        # （EICEはTCPのみを転送するため、トンネル経由の接続ではQUICは使われない）
+        if dcv_settings is not None:
+            dcv_port = dcv_settings['port']
+            local_port = dcv_port + 10000 if dcv_port + 10000 <= 65535 else dcv_port
+            security_group.add_ingress_rule(
+                peer=ec2.Peer.security_group_id(network.eice_security_group_id),
+                connection=ec2.Port.tcp(dcv_port),
+                description="NICE DCV access from EC2 Instance Connect Endpoint"
+            )
+            CfnOutput(
+                self, "DcvPortForwardCommand",
+                value=(f"aws ec2-instance-connect open-tunnel --instance-id {cfn_instance.ref} "
+                       f"--remote-port {dcv_port} --local-port {local_port}"),
+                description=f"NICE DCVのポートフォワードコマンド（接続先: https://localhost:{local_port}）"
+            )
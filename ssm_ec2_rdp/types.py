@@ -3,7 +3,7 @@ CDK設定用の型定義とデータクラス
 AMI・インスタンス設定機能で使用する型定義とバリデーション機能を提供
 """
 
-from typing import Optional, Union, Dict, Any, Literal
+from typing import Optional, Union, Dict, Any, Literal, List, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import re
@@ -16,6 +16,14 @@ class OSType(Enum):
     UNKNOWN = "unknown"
 
 
+class LinuxDistro(Enum):
+    """Linuxディストリビューションの列挙型（ユーザーデータの特殊化に使用）"""
+    AMAZON_LINUX_2023 = "al2023"  # dnf
+    AMAZON_LINUX_2 = "al2"  # yum
+    UBUNTU = "ubuntu"  # apt
+    UNKNOWN = "unknown"  # 実行時にパッケージマネージャーを判定
+
+
 class ConfigurationError(Exception):
     """設定エラーの基底クラス"""
     pass
@@ -51,6 +59,12 @@ class AMIConfiguration:
     """AMI設定を表すデータクラス"""
     ami_id: Optional[str] = None
     ami_parameter: Optional[str] = None
+    ami_region_map: Optional[Dict[str, str]] = None  # リージョン→AMI IDのマッピング
+    image_baking: bool = False  # Image Builderでセットアップ済みAMIを焼き込むか
+    fast_launch: bool = False  # Windows Fast Launch（事前プロビジョニング済みスナップショット）を有効化するか
+    fast_launch_snapshot_count: int = 5
+    fast_launch_max_parallel_launches: int = 6
+    ami_catalog: Optional[str] = None  # リージョン間コピー済みAMIを記録したカタログファイルのパス
     
     def __post_init__(self):
         """設定の妥当性を検証"""
@@ -60,9 +74,15 @@ class AMIConfiguration:
                 "いずれか一つを選択してください。"
             )
         
-        if not self.ami_id and not self.ami_parameter:
+        if self.ami_region_map and (self.ami_id or self.ami_parameter):
+            raise ConfigConflictError(
+                "ami-region-mapはami-idまたはami-parameterと同時に指定することはできません。"
+                "いずれか一つを選択してください。"
+            )
+        
+        if not self.ami_id and not self.ami_parameter and not self.ami_region_map:
             raise MissingConfigError(
-                "AMI設定が必要です。ami-idまたはami-parameterのいずれかを指定してください。"
+                "AMI設定が必要です。ami-id、ami-parameterまたはami-region-mapのいずれかを指定してください。"
             )
         
         if self.ami_id and not self._is_valid_ami_id(self.ami_id):
@@ -76,6 +96,59 @@ class AMIConfiguration:
                 f"無効なSSMパラメータパス形式です: {self.ami_parameter}. "
                 "パラメータパスは '/' で始まる必要があります。"
             )
+        
+        if self.ami_region_map:
+            self._validate_ami_region_map(self.ami_region_map)
+        
+        if not isinstance(self.image_baking, bool):
+            raise InvalidValueError(
+                f"無効なimage-baking設定です: {self.image_baking}. true または false を指定してください。"
+            )
+        
+        if not isinstance(self.fast_launch, bool):
+            raise InvalidValueError(
+                f"無効なfast-launch設定です: {self.fast_launch}. true または false を指定してください。"
+            )
+        
+        if not self._is_positive_int(self.fast_launch_snapshot_count):
+            raise InvalidValueError(
+                f"無効なfast-launch-snapshot-countです: {self.fast_launch_snapshot_count}. "
+                "1以上の整数を指定してください。"
+            )
+        
+        if not self._is_positive_int(self.fast_launch_max_parallel_launches) or \
+                self.fast_launch_max_parallel_launches < 6:
+            raise InvalidValueError(
+                f"無効なfast-launch-max-parallel-launchesです: {self.fast_launch_max_parallel_launches}. "
+                "6以上の整数を指定してください。"
+            )
+        
+        if self.ami_catalog is not None and (not isinstance(self.ami_catalog, str) or not self.ami_catalog.strip()):
+            raise InvalidValueError(
+                f"無効なami-catalog設定です: {self.ami_catalog}. カタログファイルのパスを指定してください。"
+            )
+    
+    def _validate_ami_region_map(self, ami_region_map: Dict[str, str]) -> None:
+        """
+        リージョン→AMI IDマッピングの妥当性を検証
+        
+        例: {"ap-northeast-1": "ami-0123456789abcdef0", "us-east-1": "ami-0fedcba9876543210"}
+        """
+        if not isinstance(ami_region_map, dict):
+            raise InvalidValueError(
+                "ami-region-mapはリージョン名をキー、AMI IDを値とする辞書である必要があります。"
+            )
+        
+        for region, ami_id in ami_region_map.items():
+            if not self._is_valid_region(region):
+                raise InvalidValueError(
+                    f"無効なリージョン名です: {region}. 例: ap-northeast-1, us-east-1"
+                )
+            if not isinstance(ami_id, str) or not self._is_valid_ami_id(ami_id):
+                raise InvalidValueError(
+                    f"無効なAMI ID形式です: {ami_id} (リージョン: {region}). "
+                    "AMI IDは 'ami-' で始まる17文字の文字列である必要があります。"
+                )
     
     @staticmethod
     def _is_valid_ami_id(ami_id: str) -> bool:
@@ -96,6 +169,20 @@ class AMIConfiguration:
         例: /aws/service/ami-amazon-linux-latest/amzn2-ami-hvm-x86_64-gp2
         """
         return parameter_path.startswith('/') and len(parameter_path) > 1
+    
+    @staticmethod
+    def _is_positive_int(value: Any) -> bool:
+        """1以上の整数（boolを除く）かどうかをチェック"""
+        return isinstance(value, int) and not isinstance(value, bool) and value >= 1
+    
+    @staticmethod
+    def _is_valid_region(region: str) -> bool:
+        """
+        リージョン名の形式をチェック
+        
+        例: ap-northeast-1, us-east-1, us-gov-west-1
+        """
+        return isinstance(region, str) and bool(re.match(r'^[a-z]{2}(-gov)?-[a-z]+-[0-9]$', region))
 
 
 @dataclass
@@ -104,6 +191,7 @@ class InstanceConfiguration:
     instance_type: str
     key_pair_name: Optional[str] = None
     subnet_type: str = "private"  # デフォルトはプライベートサブネット
+    s3_gateway_endpoint: bool = False  # VPCにS3ゲートウェイエンドポイントを作成するか
 
     def __post_init__(self):
         """設定の妥当性を検証"""
@@ -127,6 +215,11 @@ class InstanceConfiguration:
                 f"無効なサブネットタイプです: {self.subnet_type}. "
                 "'private' または 'public' を指定してください。"
             )
+
+        if not isinstance(self.s3_gateway_endpoint, bool):
+            raise InvalidValueError(
+                f"無効なs3-gateway-endpoint設定です: {self.s3_gateway_endpoint}. true または false を指定してください。"
+            )
     
     @staticmethod
     def _is_valid_instance_type(instance_type: str) -> bool:
@@ -159,27 +252,125 @@ class InstanceConfiguration:
         return subnet_type in ['private', 'public']
 
 
+@dataclass
+class NetworkConfiguration:
+    """既存ネットワーク（VPC・サブネット・EICE）をインポートする設定を表すデータクラス
+    
+    各IDには共有ネットワークスタックの出力などのトークンも指定できる。cdk.jsonの値の形式は
+    from_contextで、トークンを含みうる値の形式はNetworkManagerでインポート時に検証する。
+    """
+    vpc_id: str
+    subnet_id: str  # インスタンスを配置するサブネット
+    eice_security_group_id: str  # EC2 Instance Connect EndpointのセキュリティグループID
+    
+    def __post_init__(self):
+        """必須設定項目を検証"""
+        for key, value, _ in self.resource_ids():
+            if not value:
+                raise MissingConfigError(f"existing-networkの{key}は必須設定項目です。")
+    
+    def resource_ids(self) -> List[Tuple[str, str, str]]:
+        """
+        リソースIDの一覧を取得
+        
+        Returns:
+            List[Tuple[str, str, str]]: (設定キー, 値, IDのプレフィックス) のリスト
+        """
+        return [
+            ('vpc-id', self.vpc_id, 'vpc'),
+            ('subnet-id', self.subnet_id, 'subnet'),
+            ('eice-security-group-id', self.eice_security_group_id, 'sg')
+        ]
+    
+    @classmethod
+    def from_context(cls, value: Dict[str, Any]) -> 'NetworkConfiguration':
+        """cdk.jsonのexisting-network設定から作成"""
+        if not isinstance(value, dict):
+            raise InvalidValueError(
+                f"無効なexisting-network設定です: {value}. 辞書形式で指定してください。"
+            )
+        network = cls(
+            vpc_id=value.get('vpc-id'),
+            subnet_id=value.get('subnet-id'),
+            eice_security_group_id=value.get('eice-security-group-id')
+        )
+        for key, resource_id, prefix in network.resource_ids():
+            cls.validate_resource_id(key, resource_id, prefix)
+        return network
+    
+    @classmethod
+    def validate_resource_id(cls, key: str, value: str, prefix: str) -> None:
+        """
+        リソースIDの形式を検証
+        
+        Args:
+            key: 設定キー（エラーメッセージに使用）
+            value: リソースID
+            prefix: IDのプレフィックス（vpc, subnet, sg）
+            
+        Raises:
+            InvalidValueError: 形式が正しくない場合
+        """
+        if not cls._is_valid_resource_id(value, prefix):
+            raise InvalidValueError(
+                f"無効な{key}です: {value}. 例: {prefix}-0123456789abcdef0"
+            )
+    
+    @staticmethod
+    def _is_valid_resource_id(value: str, prefix: str) -> bool:
+        """
+        リソースIDの形式をチェック
+        
+        形式: {プレフィックス}-{8または17桁の16進数}
+        例: vpc-0123456789abcdef0, subnet-12345678
+        """
+        if not isinstance(value, str):
+            return False
+        return bool(re.match(rf'^{prefix}-([0-9a-f]{{8}}|[0-9a-f]{{17}})$', value))
+
+
 @dataclass
 class EC2Configuration:
     """EC2設定の統合クラス"""
     ami: AMIConfiguration
     instance: InstanceConfiguration
+    user_data: Optional[Dict[str, Any]] = None  # UserDataManagerに渡す追加設定
+    network: Optional[NetworkConfiguration] = None  # 既存ネットワークを使用する場合の設定（Noneの場合はVPCを作成）
+    
+    def __post_init__(self):
+        """設定の妥当性を検証"""
+        if self.user_data is not None and not isinstance(self.user_data, dict):
+            raise InvalidValueError(
+                f"無効なuser-data設定です: {self.user_data}. 辞書形式で指定してください。"
+            )
     
     @classmethod
     def from_context(cls, context: Dict[str, Any]) -> 'EC2Configuration':
         """cdk.jsonのcontextから設定を作成"""
         ami_config = AMIConfiguration(
             ami_id=context.get('ami-id'),
-            ami_parameter=context.get('ami-parameter')
+            ami_parameter=context.get('ami-parameter'),
+            ami_region_map=context.get('ami-region-map'),
+            image_baking=context.get('image-baking', False),
+            fast_launch=context.get('fast-launch', False),
+            fast_launch_snapshot_count=context.get('fast-launch-snapshot-count', 5),
+            fast_launch_max_parallel_launches=context.get('fast-launch-max-parallel-launches', 6),
+            ami_catalog=context.get('ami-catalog')
         )
 
         instance_config = InstanceConfiguration(
             instance_type=context.get('instance-type'),
             key_pair_name=context.get('key-pair-name'),
-            subnet_type=context.get('subnet-type', 'private')  # デフォルトはprivate
+            subnet_type=context.get('subnet-type', 'private'),  # デフォルトはprivate
+            s3_gateway_endpoint=context.get('s3-gateway-endpoint', False)
         )
 
-        return cls(ami=ami_config, instance=instance_config)
+        network_config = None
+        if context.get('existing-network') is not None:
+            network_config = NetworkConfiguration.from_context(context['existing-network'])
+
+        return cls(ami=ami_config, instance=instance_config, user_data=context.get('user-data'),
+                   network=network_config)
 
 
 @dataclass
@@ -188,6 +379,7 @@ class AMIInfo:
     ami_id: str
     os_type: OSType
     description: Optional[str] = None
+    distro: LinuxDistro = LinuxDistro.UNKNOWN
     
     def is_windows(self) -> bool:
         """Windows AMIかどうかを判定"""
@@ -196,6 +388,84 @@ class AMIInfo:
     def is_linux(self) -> bool:
         """Linux AMIかどうかを判定"""
         return self.os_type == OSType.LINUX
+    
+    def is_amazon_linux(self) -> bool:
+        """Amazon Linux（2 / 2023）のAMIかどうかを判定"""
+        return self.distro in (LinuxDistro.AMAZON_LINUX_2, LinuxDistro.AMAZON_LINUX_2023)
+
+
+@dataclass
+class UserDataStep:
+    """ユーザーデータを構成する1ステップ（Image Builderコンポーネントのステップにも対応）"""
+    name: str  # 英数字のステップ名（例: SystemUpdate）
+    description: str
+    commands: list[str]
+    requires_internet: bool = False  # パッケージリポジトリ等へのインターネットアクセスが必要か
+
+
+@dataclass
+class CompressedUserData:
+    """gzip圧縮済みのマルチパートMIMEユーザーデータ"""
+    content_base64: str  # CloudFormationのUserDataにそのまま指定できるBase64文字列
+    compressed_size: int  # 圧縮後のバイト数（EC2の16KB制限の対象）
+    uncompressed_size: int  # 圧縮前のMIMEドキュメントのバイト数
+    
+    def compression_ratio(self) -> float:
+        """圧縮率（圧縮後 / 圧縮前）を取得"""
+        if self.uncompressed_size == 0:
+            return 0.0
+        return self.compressed_size / self.uncompressed_size
+
+
+@dataclass
+class InstanceSpec:
+    """インスタンスタイプのスペックを表すデータクラス"""
+    instance_type: str
+    vcpus: int
+    memory_mib: int
+    instance_store: bool = False  # ローカルNVMeインスタンスストアを持つか
+    gpu: bool = False  # GPUを搭載するか
+    
+    def memory_gib(self) -> float:
+        """メモリ量（GiB）を取得"""
+        return self.memory_mib / 1024
+
+
+@dataclass
+class NetworkReachability:
+    """インスタンスから到達可能なネットワークを表すクラス"""
+    subnet_type: str = "public"
+    internet_access: bool = True
+    s3_gateway_endpoint: bool = False  # S3ゲートウェイエンドポイント経由でS3に到達できるか
+    
+    @classmethod
+    def for_subnet_type(cls, subnet_type: str, s3_gateway_endpoint: bool = False) -> 'NetworkReachability':
+        """
+        サブネットタイプから到達性を作成
+        
+        privateはNAT GatewayのないPRIVATE_ISOLATEDサブネットのため、インターネットに到達できない
+        """
+        return cls(
+            subnet_type=subnet_type,
+            internet_access=(subnet_type == "public"),
+            s3_gateway_endpoint=s3_gateway_endpoint
+        )
+    
+    def can_reach_package_repositories(self) -> bool:
+        """OSのパッケージリポジトリに到達できるかどうか"""
+        return self.internet_access
+    
+    def can_reach_s3(self) -> bool:
+        """S3（ユーザーデータのアセット等）に到達できるかどうか"""
+        return self.internet_access or self.s3_gateway_endpoint
+    
+    def can_reach_amazon_linux_repositories(self) -> bool:
+        """
+        Amazon Linuxのパッケージリポジトリに到達できるかどうか
+        
+        Amazon LinuxのリポジトリはS3でホストされているため、S3ゲートウェイエンドポイントでも到達できる
+        """
+        return self.can_reach_s3()
 
 
 @dataclass
@@ -261,11 +531,12 @@ def get_configuration_help() -> str:
 cdk.json 設定ガイド:
 
 必須設定:
-- ami-id または ami-parameter のいずれか一つ
+- ami-id、ami-parameter または ami-region-map のいずれか一つ
 - instance-type
 
 任意設定:
 - key-pair-name
+- existing-network（既存のVPC・サブネット・EICEを使用する場合）
 
 設定例:
 1. 直接AMI ID指定:
@@ -284,4 +555,15 @@ cdk.json 設定ガイド:
     "key-pair-name": "my-key-pair"
   }
 }
+
+3. リージョン別AMIマッピング指定（マルチリージョン展開用）:
+{
+  "context": {
+    "ami-region-map": {
+      "ap-northeast-1": "ami-0123456789abcdef0",
+      "us-east-1": "ami-0fedcba9876543210"
+    },
+    "instance-type": "t3.medium"
+  }
+}
 """
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+ユーザーデータアセット管理クラス
+大きなセットアップスクリプトをCDKのS3アセットとして配置する
+"""
+
+import os
+from aws_cdk import Stack, Stage, aws_iam as iam, aws_s3_assets as s3_assets
+from .types import AMIInfo
+
+
+class UserDataAssetManager:
+    """セットアップスクリプトのS3アセット化を担当するクラス"""
+
+    def __init__(self, stack: Stack):
+        """
+        UserDataAssetManagerを初期化
+
+        Args:
+            stack: CDK Stackインスタンス
+        """
+        self.stack = stack
+
+    def create_bootstrap_asset(self, ami_info: AMIInfo, script: str, role: iam.IRole) -> s3_assets.Asset:
+        """
+        セットアップスクリプトをS3アセットとして作成し、インスタンスロールに読み取り権限を付与
+
+        アセットは内容のハッシュで管理されるため、同じスクリプトを使う複数のホストや
+        スタックでは1つのオブジェクトが共有される。スクリプトはクラウドアセンブリの出力先
+        （cdk.out）のスタックごとのディレクトリに書き出すため、synthのたびに一時ファイルが残らない。
+
+        Args:
+            ami_info: AMI情報（スクリプトの拡張子の決定に使用）
+            script: スクリプト本文
+            role: スクリプトをダウンロードするインスタンスのIAMロール
+
+        Returns:
+            s3_assets.Asset: 作成したアセット
+        """
+        file_name = "bootstrap.ps1" if ami_info.is_windows() else "bootstrap.sh"
+        asset_dir = os.path.join(Stage.of(self.stack).outdir, f"{self.stack.artifact_id}.userdata")
+        os.makedirs(asset_dir, exist_ok=True)
+        asset_path = os.path.join(asset_dir, file_name)
+        with open(asset_path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(script)
+
+        asset = s3_assets.Asset(self.stack, "BootstrapScriptAsset", path=asset_path)
+        asset.grant_read(role)
+        return asset
@@ -3,227 +3,2237 @@ UserData管理クラス
 OSタイプに応じてユーザーデータを生成
 """
 
-from typing import Dict, List, Optional
-from aws_cdk import aws_ec2 as ec2
-from .types import AMIInfo, OSType
+import base64
+import gzip
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+from aws_cdk import Aws, Token, aws_ec2 as ec2, aws_s3 as s3
+from .types import (
+    AMIInfo,
+    CompressedUserData,
+    InstanceSpec,
+    InvalidValueError,
+    LinuxDistro,
+    NetworkReachability,
+    OSType,
+    UserDataStep
+)
 
 
 class UserDataManager:
     """OSタイプに応じたユーザーデータ生成を担当するクラス"""
     
-    def __init__(self):
-        """UserDataManagerを初期化"""
-        pass
+    # 起動プロファイル
+    # standard: 従来通り全処理を順次実行 / fast-boot: SSM Agent・RDPを最優先し、その他はバックグラウンド実行
+    BOOT_PROFILES = ['standard', 'fast-boot']
     
-    def generate_user_data(self, ami_info: AMIInfo, additional_config: Optional[Dict] = None) -> ec2.UserData:
+    # Linuxユーザーデータの出力形式
+    # shell: bashスクリプト（従来通り、フォールバック） / cloud-config: cloud-initの宣言的な#cloud-config
+    LINUX_USER_DATA_FORMATS = ['shell', 'cloud-config']
+    
+    # Windowsユーザーデータの出力形式
+    # powershell: PowerShellスクリプト（従来通り） / ec2launch-v2: EC2Launch v2のYAMLタスクドキュメント
+    WINDOWS_USER_DATA_FORMATS = ['powershell', 'ec2launch-v2']
+    
+    # EC2Launch v2のsetDnsSuffixタスク（$REGION.ec2-utilities.amazonaws.com）と同等の設定
+    EC2LAUNCH_DNS_SUFFIX_COMMANDS = [
+        "# DNSサフィックスの設定（setDnsSuffix相当）",
+        "$imdsToken = Invoke-RestMethod -Method Put -Uri http://169.254.169.254/latest/api/token "
+        "-Headers @{'X-aws-ec2-metadata-token-ttl-seconds' = '21600'}",
+        "$region = Invoke-RestMethod -Uri http://169.254.169.254/latest/meta-data/placement/region "
+        "-Headers @{'X-aws-ec2-metadata-token' = $imdsToken}",
+        "$suffixes = @((Get-DnsClientGlobalSetting).SuffixSearchList) + \"$region.ec2-utilities.amazonaws.com\"",
+        "Set-DnsClientGlobalSetting -SuffixSearchList ($suffixes | Where-Object { $_ } | Select-Object -Unique)",
+    ]
+    
+    # 実行時にパッケージマネージャーを判定する分岐（ディストリビューション特殊化の対象）
+    LINUX_RPM_BRANCH = "if command -v yum &> /dev/null; then"
+    LINUX_APT_BRANCH = "elif command -v apt-get &> /dev/null; then"
+    
+    # EC2ユーザーデータのサイズ上限（Base64エンコード前）
+    USER_DATA_SIZE_LIMIT = 16384
+    
+    # マルチパートMIMEの境界文字列（テンプレートの差分が出ないよう固定値を使用）
+    MIME_BOUNDARY = "==SSM-EC2-RDP-USERDATA-BOUNDARY=="
+    
+    # custom_commandsの合計サイズがこの値（バイト）を超えるとスクリプトをS3アセットに退避する
+    ASSET_OFFLOAD_THRESHOLD = 4096
+    
+    # S3アセットから取得したスクリプトの保存先
+    LINUX_BOOTSTRAP_PATH = "/var/lib/ssm-ec2-rdp/bootstrap.sh"
+    WINDOWS_BOOTSTRAP_PATH = "C:\\ProgramData\\ssm-ec2-rdp\\bootstrap.ps1"
+    
+    # 起動タイムライン（フェーズごとの開始・終了を1行1JSONで記録）
+    LINUX_TIMELINE_LOG = "/var/log/userdata-timeline.log"
+    WINDOWS_TIMELINE_LOG = "C:\\ProgramData\\ssm-ec2-rdp\\userdata-timeline.log"
+    
+    # 完了済みステップのマーカーファイル（ステップ名.sha256に内容ハッシュを記録）
+    LINUX_STEP_MARKER_DIR = "/var/lib/ssm-ec2-rdp/steps"
+    WINDOWS_STEP_MARKER_DIR = "C:\\ProgramData\\ssm-ec2-rdp\\steps"
+    
+    # 再実行時も毎回実行するステップ（完了ログの出力のみ）
+    UNGUARDED_STEPS = ['Completion']
+    
+    # フェーズ所要時間のCloudWatchカスタムメトリクス（boot_metrics指定時）
+    BOOT_METRIC_NAMESPACE = "SsmEc2Rdp/Boot"
+    BOOT_METRIC_NAME = "PhaseDuration"
+    
+    # Linuxに標準でインストールする基本ツール
+    LINUX_BASIC_TOOLS = ['htop', 'curl', 'wget', 'unzip']
+    
+    # package_acceleration指定時に1回のトランザクションへまとめるステップ
+    LINUX_PACKAGE_STEPS = ['BasicTools', 'Docker', 'InstallPackages']
+    
+    # package_acceleration指定時に書き出すaptの設定ファイル
+    LINUX_APT_ACCELERATION_CONF = "/etc/apt/apt.conf.d/99ssm-ec2-rdp-acceleration"
+    LINUX_DPKG_NODOC_CONF = "/etc/dpkg/dpkg.cfg.d/99ssm-ec2-rdp-nodoc"
+    
+    # 起動後にバックグラウンドで実行する処理のスクリプト・systemdユニット
+    LINUX_DEFERRED_SCRIPT = "/usr/local/sbin/userdata-deferred.sh"
+    LINUX_DEFERRED_UNIT = "userdata-deferred.service"
+    LINUX_DEFERRED_LOG = "/var/log/userdata-deferred.log"
+    WINDOWS_DEFERRED_SCRIPT = "C:\\ProgramData\\ssm-ec2-rdp\\deferred.ps1"
+    WINDOWS_DEFERRED_TASK = "SsmEc2RdpDeferredSetup"
+    WINDOWS_DEFERRED_LOG = "C:\\ProgramData\\ssm-ec2-rdp\\deferred.log"
+    
+    # rdp-performanceプロファイル（rdp_performance）の既定値
+    # udp_transport: UDPトランスポートを使用 / avc444: AVC/H.264 444グラフィックモードを優先
+    # max_frame_rate: フレームレートの上限（30または60）
+    # reduce_visual_effects: 壁紙・視覚効果を無効化 / bandwidth_autodetect: 帯域幅の自動検出
+    RDP_PERFORMANCE_DEFAULTS = {
+        'udp_transport': True,
+        'avc444': True,
+        'max_frame_rate': 60,
+        'reduce_visual_effects': True,
+        'bandwidth_autodetect': True
+    }
+    
+    # フレームレートの上限 -> DWMFRAMEINTERVALの値（Noneは値を削除してWindowsの既定の30fpsとする）
+    # 60fpsはMicrosoftのドキュメントで値15（10進）が指定されている
+    RDP_FRAME_INTERVALS = {60: 15, 30: None}
+    
+    # 新規ユーザープロファイルの作成元となる既定ユーザーのレジストリハイブ
+    WINDOWS_DEFAULT_USER_HIVE = "C:\\Users\\Default\\NTUSER.DAT"
+    
+    # リモートデスクトップサービスのグループポリシーのレジストリキー
+    WINDOWS_TS_POLICY_KEY = "HKLM:\\SOFTWARE\\Policies\\Microsoft\\Windows NT\\Terminal Services"
+    
+    # Linuxデスクトップ（xrdp）の既定値
+    # max_bpp: 色深度 / bitmap_cache: ビットマップキャッシュ / bitmap_compression・bulk_compression: 圧縮
+    XRDP_DEFAULTS = {
+        'max_bpp': 24,
+        'bitmap_cache': True,
+        'bitmap_compression': True,
+        'bulk_compression': True
+    }
+    
+    # xrdpで指定できる色深度
+    XRDP_COLOR_DEPTHS = [8, 15, 16, 24, 32]
+    
+    # NICE DCVの既定値（port: TCP/QUICの待ち受けポート、quic: QUICトランスポートの有効化）
+    DCV_DEFAULTS = {
+        'port': 8443,
+        'quic': True
+    }
+    
+    # NICE DCVサーバーのインストーラー
+    WINDOWS_DCV_SERVER_MSI_URL = "https://d1uj6qtbmh3dt5.cloudfront.net/nice-dcv-server-x64-Release.msi"
+    
+    # NICE DCVサーバーの設定のレジストリキー（LocalSystemのGSettings）
+    WINDOWS_DCV_SETTINGS_KEY = "Registry::HKEY_USERS\\S-1-5-18\\Software\\GSettings\\com\\nicesoftware\\dcv"
+    
+    # windows_slimmingを適用するメモリ量の既定のしきい値（GiB、この値未満で適用）
+    WINDOWS_SLIMMING_MEMORY_THRESHOLD_GIB = 4
+    
+    # windows_slimmingで無効化するサービス（存在しないサービスは無視する）
+    WINDOWS_SLIMMING_SERVICES = ['DiagTrack', 'MapsBroker', 'WerSvc', 'lfsvc', 'SysMain', 'XblAuthManager', 'XblGameSave']
+    
+    # windows_slimmingで無効化するスケジュールタスク (タスクパス, タスク名)
+    WINDOWS_SLIMMING_TASKS = [
+        ('\\Microsoft\\Windows\\Server Manager\\', 'ServerManager'),
+        ('\\Microsoft\\Windows\\Application Experience\\', 'Microsoft Compatibility Appraiser'),
+        ('\\Microsoft\\Windows\\Application Experience\\', 'ProgramDataUpdater'),
+        ('\\Microsoft\\Windows\\Customer Experience Improvement Program\\', 'Consolidator'),
+        ('\\Microsoft\\Windows\\Customer Experience Improvement Program\\', 'UsbCeip'),
+        ('\\Microsoft\\Windows\\Defrag\\', 'ScheduledDefrag')
+    ]
+    
+    # Microsoft Defenderのスキャン対象から除外するパス（SSM Agentとこのツールの作業ディレクトリ）
+    WINDOWS_DEFENDER_EXCLUSIONS = [
+        'C:\\Program Files\\Amazon\\SSM',
+        'C:\\ProgramData\\Amazon',
+        'C:\\ProgramData\\ssm-ec2-rdp'
+    ]
+    
+    # 高パフォーマンス電源プランのGUID
+    WINDOWS_HIGH_PERFORMANCE_PLAN = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+    
+    # fast-bootプロファイルで最初に実行するWindowsのステップ（SSM接続・RDP接続に必要な処理）
+    WINDOWS_CRITICAL_STEPS = ['SsmAgent', 'EnableRemoteDesktop', 'EnableAdministrator', 'EnableNla']
+    
+    # インスタンスストア（停止・開始で消去されるため、起動のたびにセットアップする）
+    LINUX_INSTANCE_STORE_SCRIPT = "/usr/local/sbin/instance-store-setup.sh"
+    LINUX_INSTANCE_STORE_UNIT = "instance-store-setup.service"
+    LINUX_INSTANCE_STORE_MOUNT = "/mnt/instance-store"
+    WINDOWS_INSTANCE_STORE_SCRIPT = "C:\\ProgramData\\ssm-ec2-rdp\\instance-store.ps1"
+    WINDOWS_INSTANCE_STORE_TASK = "SsmEc2RdpInstanceStore"
+    WINDOWS_INSTANCE_STORE_DRIVE = "T"
+    # インスタンスストアが初期化されるまでの起動時に使用するC:のページファイルのサイズ（MB）
+    WINDOWS_FALLBACK_PAGEFILE_MB = 1024
+    
+    # Linuxのメモリ・ネットワークチューニング
+    LINUX_TUNING_SYSCTL_CONF = "/etc/sysctl.d/99-ssm-ec2-rdp.conf"
+    LINUX_ZRAM_SCRIPT = "/usr/local/sbin/zram-swap-setup.sh"
+    LINUX_ZRAM_UNIT = "zram-swap.service"
+    
+    # zramスワップを設定するメモリ量のしきい値（GiB、未満の場合に設定）
+    LINUX_ZRAM_MEMORY_THRESHOLD_GIB = 8
+    
+    # 高レイテンシのRDP/SSHトンネル向けのネットワークバッファ設定
+    LINUX_NETWORK_SYSCTL = {
+        'net.core.rmem_max': '16777216',
+        'net.core.wmem_max': '16777216',
+        'net.ipv4.tcp_rmem': '4096 87380 16777216',
+        'net.ipv4.tcp_wmem': '4096 65536 16777216',
+        'net.ipv4.tcp_slow_start_after_idle': '0',
+        'net.ipv4.tcp_mtu_probing': '1'
+    }
+    
+    def __init__(self, instance: Optional[InstanceSpec] = None):
+        """
+        UserDataManagerを初期化
+        
+        Args:
+            instance: 起動するインスタンスタイプのスペック（メモリ量に応じた設定に使用、不明な場合はNone）
+        """
+        self.instance = instance
+    
+    def generate_user_data(self, ami_info: AMIInfo, additional_config: Optional[Dict] = None,
+                           network: Optional[NetworkReachability] = None) -> ec2.UserData:
+        """
+        AMI情報に基づいてユーザーデータを生成
+        
+        Args:
+            ami_info: AMI情報オブジェクト
+            additional_config: 追加設定（オプション）
+            network: インスタンスのネットワーク到達性（Noneの場合はインターネット到達可能とみなす）
+            
+        Returns:
+            ec2.UserData: 生成されたユーザーデータ
+        """
+        if ami_info.is_windows():
+            if (additional_config or {}).get('format') == 'ec2launch-v2':
+                return ec2.UserData.custom(self.generate_ec2launch_document(ami_info, additional_config, network))
+            return self._generate_windows_user_data(ami_info, additional_config, network)
+        elif self._use_cloud_config(additional_config, network):
+            return ec2.UserData.custom(self.generate_cloud_config(ami_info, additional_config, network))
+        else:
+            # Linux、またはUnknownの場合はLinuxとして処理
+            return self._generate_linux_user_data(ami_info, additional_config, network)
+    
+    def _use_cloud_config(self, additional_config: Optional[Dict],
+                          network: Optional[NetworkReachability]) -> bool:
+        """
+        Linuxユーザーデータを#cloud-config形式で生成するかどうかを判定
+        
+        S3ゲートウェイエンドポイント経由でAmazon Linuxのリポジトリのみに到達できる場合は、
+        ディストリビューションごとの分岐が必要なためbashスクリプトにフォールバックする。
+        
+        Args:
+            additional_config: 追加設定
+            network: インスタンスのネットワーク到達性
+            
+        Returns:
+            bool: #cloud-config形式で生成する場合True
+        """
+        if (additional_config or {}).get('format') != 'cloud-config':
+            return False
+        repos_reachable = network is None or network.can_reach_package_repositories()
+        return repos_reachable or not network.can_reach_amazon_linux_repositories()
+    
+    def generate_ec2launch_document(self, ami_info: AMIInfo, additional_config: Optional[Dict] = None,
+                                    network: Optional[NetworkReachability] = None) -> str:
+        """
+        Windows用のEC2Launch v2タスクドキュメント（YAML）を生成
+        
+        ユーザーデータのタスクドキュメントはEC2Launch v2のUserDataステージで実行されるため、
+        UserDataステージで実行可能なタスク（enableOpenSsh、executeScript）のみを出力する。
+        DNSサフィックスの設定はsetDnsSuffixタスクと同等のPowerShellをexecuteScriptで実行し、
+        セットアップスクリプトとともに初回起動時のみ実行する。
+        
+        setAdminAccount（管理者パスワードの生成）はブートステージ（PreReady）のタスクで、
+        ユーザーデータより前にAMIのagent-config.ymlに従って実行されるため、ユーザーデータからは
+        変更できない。パスワード生成を省略する場合はAMI側のagent-config.ymlで設定する。
+        
+        Args:
+            ami_info: AMI情報オブジェクト
+            additional_config: 追加設定（オプション）
+            network: インスタンスのネットワーク到達性
+            
+        Returns:
+            str: EC2Launch v2のタスクドキュメント
+        """
+        config = additional_config or {}
+        script = "\n".join(self.EC2LAUNCH_DNS_SUFFIX_COMMANDS + [
+            "",
+            self.generate_bootstrap_script(ami_info, additional_config, network),
+        ])
+        
+        lines = [
+            "version: 1.0",
+            "tasks:",
+        ]
+        if config.get('enable_openssh', False):
+            lines.append("  - task: enableOpenSsh")
+        lines.extend([
+            "  - task: executeScript",
+            "    inputs:",
+            "      - frequency: once",
+            "        type: powershell",
+            "        runAs: localSystem",
+            "        content: |-",
+        ])
+        lines.extend(f"          {line}" if line else "" for line in script.splitlines())
+        return "\n".join(lines) + "\n"
+    
+    def generate_cloud_config(self, ami_info: AMIInfo, additional_config: Optional[Dict] = None,
+                              network: Optional[NetworkReachability] = None) -> str:
+        """
+        Linux用の#cloud-configドキュメントを生成
+        
+        bashスクリプトと同じ追加設定（install_packages、enable_docker、custom_commands等）から
+        cloud-initの宣言的な設定を生成する。パッケージはcloud-initが1回のトランザクションで
+        インストールし、SSM Agentの起動はbootcmdで最初に行う。
+        
+        Args:
+            ami_info: AMI情報オブジェクト
+            additional_config: 追加設定（オプション）
+            network: インスタンスのネットワーク到達性（Noneの場合はインターネット到達可能とみなす）
+            
+        Returns:
+            str: #cloud-configドキュメント
+        """
+        return self._render_cloud_config(self.build_cloud_config_document(ami_info, additional_config, network))
+    
+    def build_cloud_config_document(self, ami_info: AMIInfo, additional_config: Optional[Dict] = None,
+                                    network: Optional[NetworkReachability] = None) -> Dict:
+        """
+        #cloud-configドキュメントの内容を辞書として取得
+        
+        Args:
+            ami_info: AMI情報オブジェクト
+            additional_config: 追加設定（オプション）
+            network: インスタンスのネットワーク到達性
+            
+        Returns:
+            Dict: cloud-configの設定
+        """
+        config = additional_config or {}
+        repos_reachable = network is None or network.can_reach_package_repositories()
+        
+        if config.get('boot_profile') == 'fast-boot':
+            upgrade = config.get('full_upgrade', False)
+        else:
+            upgrade = True
+        
+        document: Dict = {
+            # SSM Agentは他のモジュールより先に起動する（ノンブロッキング）
+            "bootcmd": [
+                "systemctl enable amazon-ssm-agent 2> /dev/null || true",
+                "systemctl start --no-block amazon-ssm-agent 2> /dev/null || "
+                "systemctl start --no-block snap.amazon-ssm-agent.amazon-ssm-agent.service 2> /dev/null || true"
+            ],
+            "ssh_pwauth": False
+        }
+        
+        if self.should_apply_memory_tuning(config):
+            document["bootcmd"].append(["bash", "-c", "\n".join(self._build_linux_memory_tuning_commands())])
+        
+        if repos_reachable and config.get('package_acceleration', False):
+            # packagesモジュールより先にパッケージマネージャーを設定する
+            document["bootcmd"].append(
+                ["bash", "-c", "\n".join(self._build_linux_package_acceleration_commands())]
+            )
+        
+        if repos_reachable:
+            packages = list(self.LINUX_BASIC_TOOLS)
+            for package in config.get('install_packages', []):
+                if package not in packages:
+                    packages.append(package)
+            document.update({
+                "package_update": True,
+                "package_upgrade": upgrade,
+                "packages": packages
+            })
+        else:
+            document.update({
+                "package_update": False,
+                "package_upgrade": False,
+                "repo_upgrade": "none"
+            })
+        
+        runcmd: List = []
+        if config.get('enable_docker', False) and repos_reachable:
+            if ami_info.distro == LinuxDistro.UNKNOWN:
+                # Dockerはディストリビューションによりパッケージ名が異なるため、runcmdでインストールする
+                runcmd.append(
+                    ["sh", "-c", "command -v yum > /dev/null && yum install -y docker || apt-get install -y docker.io"]
+                )
+            else:
+                document["packages"].append("docker.io" if ami_info.distro == LinuxDistro.UBUNTU else "docker")
+            runcmd.append(["systemctl", "enable", "--now", "docker"])
+        if config.get('linux_desktop') and repos_reachable:
+            runcmd.append(["bash", "-c", "\n".join(
+                self._build_linux_desktop_commands(self.get_xrdp_settings(config['linux_desktop']))
+            )])
+        for step in self._get_instance_steps(ami_info, config):
+            runcmd.append(["bash", "-c", "\n".join(step.commands)])
+        runcmd.extend(config.get('custom_commands', []))
+        if runcmd:
+            document["runcmd"] = runcmd
+        
+        document["final_message"] = "User data setup completed successfully at $TIMESTAMP (uptime $UPTIME seconds)"
+        return document
+    
+    def _render_cloud_config(self, document: Dict) -> str:
+        """
+        cloud-configの辞書を#cloud-configドキュメントとして出力
+        
+        JSONはYAMLとしても有効なため、PyYAMLに依存せずJSONで出力する。
+        
+        Args:
+            document: cloud-configの設定
+            
+        Returns:
+            str: #cloud-configドキュメント
+        """
+        return "#cloud-config\n" + json.dumps(document, indent=2)
+    
+    def generate_compressed_user_data(self, ami_info: AMIInfo, additional_config: Optional[Dict] = None,
+                                      network: Optional[NetworkReachability] = None) -> CompressedUserData:
+        """
+        gzip圧縮したcloud-init用マルチパートMIMEユーザーデータを生成
+        
+        #cloud-configパートとシェルスクリプトパートを1つのMIMEドキュメントにまとめ、
+        gzip圧縮してBase64エンコードする。cloud-initはgzip圧縮されたユーザーデータを
+        自動的に展開するため、16KBの上限に対してより大きなスクリプトを渡せる。
+        
+        Args:
+            ami_info: AMI情報オブジェクト
+            additional_config: 追加設定（オプション）
+            network: インスタンスのネットワーク到達性（Noneの場合はインターネット到達可能とみなす）
+            
+        Returns:
+            CompressedUserData: 圧縮済みユーザーデータと圧縮前後のサイズ
+            
+        Raises:
+            InvalidValueError: Windows AMIが指定された場合、または圧縮後も上限を超える場合
+        """
+        if ami_info.is_windows():
+            raise InvalidValueError("gzip圧縮したマルチパートユーザーデータはLinux AMIでのみ使用できます。")
+        
+        if self._use_cloud_config(additional_config, network):
+            parts = [("text/cloud-config", self.generate_cloud_config(ami_info, additional_config, network))]
+        else:
+            parts = [
+                ("text/cloud-config", self._render_cloud_config(self._build_cloud_config())),
+                ("text/x-shellscript", self._generate_linux_user_data(ami_info, additional_config, network).render())
+            ]
+        if any(Token.is_unresolved(body) for _, body in parts):
+            raise InvalidValueError("CDKトークンを含むユーザーデータは圧縮できません。")
+        
+        document = self._build_multipart_mime(parts).encode("utf-8")
+        # mtimeを固定し、同じ内容からは同じテンプレートが生成されるようにする
+        compressed = gzip.compress(document, mtime=0)
+        
+        if len(compressed) > self.USER_DATA_SIZE_LIMIT:
+            raise InvalidValueError(
+                f"圧縮後のユーザーデータが上限を超えています: {len(compressed)}バイト "
+                f"(上限: {self.USER_DATA_SIZE_LIMIT}バイト)"
+            )
+        
+        return CompressedUserData(
+            content_base64=base64.b64encode(compressed).decode("ascii"),
+            compressed_size=len(compressed),
+            uncompressed_size=len(document)
+        )
+    
+    def should_offload_to_s3(self, ami_info: AMIInfo, additional_config: Optional[Dict] = None,
+                             network: Optional[NetworkReachability] = None) -> bool:
+        """
+        ユーザーデータのスクリプトをS3アセットに退避するかどうかを判定
+        
+        offload_to_s3が指定されていればその値に従い、未指定の場合はcustom_commandsの
+        合計サイズがASSET_OFFLOAD_THRESHOLDを超え、かつS3に到達できる場合に退避する。
+        Linuxのフェッチャーはスクリプトの取得にAWS CLIを使用するため、自動判定で退避するのは
+        AWS CLIを標準で含むAmazon Linuxのみとし、AWS CLIを含まないUbuntu等では明示指定もエラーとする。
+        
+        Args:
+            ami_info: AMI情報
+            additional_config: 追加設定（オプション）
+            network: インスタンスのネットワーク到達性（Noneの場合はインターネット到達可能とみなす）
+            
+        Returns:
+            bool: S3アセットに退避する場合True
+            
+        Raises:
+            InvalidValueError: offload_to_s3が指定されているがS3に到達できない場合、
+                またはAWS CLIを含まないディストリビューションの場合
+        """
+        config = additional_config or {}
+        s3_reachable = network is None or network.can_reach_s3()
+        # ディストリビューションが不明なAMIは明示指定時のみ退避する（AWS CLIの導入は利用者の責任）
+        has_aws_cli = ami_info.is_windows() or ami_info.is_amazon_linux()
+        without_aws_cli = ami_info.is_linux() and ami_info.distro not in (
+            LinuxDistro.AMAZON_LINUX_2, LinuxDistro.AMAZON_LINUX_2023, LinuxDistro.UNKNOWN
+        )
+        
+        if config.get('offload_to_s3') is not None:
+            if config['offload_to_s3'] and not s3_reachable:
+                raise InvalidValueError(
+                    "offload_to_s3を使用するには、publicサブネットを使用するか "
+                    "s3-gateway-endpointを有効にしてください。"
+                )
+            if config['offload_to_s3'] and without_aws_cli:
+                raise InvalidValueError(
+                    f"offload_to_s3はAWS CLIを含まないAMI（{ami_info.distro.value}）ではサポートされていません。"
+                )
+            return config['offload_to_s3']
+        
+        if config.get('compress') or config.get('format') in ('cloud-config', 'ec2launch-v2'):
+            return False
+        custom_commands_size = sum(len(command.encode("utf-8")) for command in config.get('custom_commands', []))
+        return custom_commands_size > self.ASSET_OFFLOAD_THRESHOLD and s3_reachable and has_aws_cli
+    
+    def generate_bootstrap_script(self, ami_info: AMIInfo, additional_config: Optional[Dict] = None,
+                                  network: Optional[NetworkReachability] = None) -> str:
+        """
+        S3アセットとして配置するセットアップスクリプト全体を生成
+        
+        Args:
+            ami_info: AMI情報オブジェクト
+            additional_config: 追加設定（オプション）
+            network: インスタンスのネットワーク到達性
+            
+        Returns:
+            str: Linuxはbashスクリプト、WindowsはPowerShellスクリプト
+        """
+        if ami_info.is_windows():
+            # <powershell>タグはユーザーデータ専用のため、スクリプトファイルには含めない
+            script = ec2.UserData.custom("# Windows Server基本設定")
+            script.add_commands("")
+            self._render_steps(
+                script, self.get_setup_steps(ami_info, additional_config, network),
+                is_windows=True, boot_metrics=(additional_config or {}).get('boot_metrics', False),
+                idempotent=(additional_config or {}).get('idempotent', True)
+            )
+            return script.render()
+        return self._generate_linux_user_data(ami_info, additional_config, network).render()
+    
+    def generate_asset_fetcher_user_data(self, ami_info: AMIInfo, bucket: s3.IBucket,
+                                         object_key: str, script: str) -> ec2.UserData:
+        """
+        S3アセットのスクリプトをダウンロード・検証・実行するだけの最小ユーザーデータを生成
+        
+        Args:
+            ami_info: AMI情報
+            bucket: スクリプトを格納したS3バケット
+            object_key: スクリプトのオブジェクトキー
+            script: スクリプト本文（チェックサム計算用）
+            
+        Returns:
+            ec2.UserData: フェッチャーのユーザーデータ
+        """
+        checksum = hashlib.sha256(script.encode("utf-8")).hexdigest()
+        
+        if ami_info.is_windows():
+            user_data = ec2.UserData.for_windows()
+            local_file = user_data.add_s3_download_command(
+                bucket=bucket, bucket_key=object_key,
+                local_file=self.WINDOWS_BOOTSTRAP_PATH, region=Aws.REGION
+            )
+            user_data.add_commands(
+                f"if ((Get-FileHash -Algorithm SHA256 -Path '{local_file}').Hash -ne '{checksum}') "
+                "{ throw 'Bootstrap script checksum mismatch' }"
+            )
+        else:
+            user_data = ec2.UserData.for_linux()
+            local_file = user_data.add_s3_download_command(
+                bucket=bucket, bucket_key=object_key,
+                local_file=self.LINUX_BOOTSTRAP_PATH, region=Aws.REGION
+            )
+            user_data.add_commands(
+                f"echo '{checksum}  {local_file}' | sha256sum -c - || "
+                "{ echo 'Bootstrap script checksum mismatch'; exit 1; }"
+            )
+        user_data.add_execute_file_command(file_path=local_file)
+        return user_data
+    
+    def _build_cloud_config(self) -> Dict:
+        """
+        マルチパートユーザーデータの#cloud-configパートの内容を取得
+        
+        パッケージの更新はシェルスクリプトパート側で制御するため、cloud-initによる
+        起動時のリポジトリ更新・アップグレードは無効化する。
+        
+        Returns:
+            Dict: cloud-configの設定（JSONはYAMLとしても有効なためJSONで出力する）
+        """
+        return {
+            "package_update": False,
+            "package_upgrade": False,
+            "repo_upgrade": "none"
+        }
+    
+    def _build_multipart_mime(self, parts: List[Tuple[str, str]]) -> str:
+        """
+        cloud-init用のマルチパートMIMEドキュメントを組み立てる
+        
+        Args:
+            parts: (Content-Type, 本文) のリスト
+            
+        Returns:
+            str: マルチパートMIMEドキュメント
+        """
+        lines = [
+            f'Content-Type: multipart/mixed; boundary="{self.MIME_BOUNDARY}"',
+            "MIME-Version: 1.0",
+            ""
+        ]
+        for content_type, body in parts:
+            lines.extend([
+                f"--{self.MIME_BOUNDARY}",
+                f'Content-Type: {content_type}; charset="utf-8"',
+                "MIME-Version: 1.0",
+                "Content-Transfer-Encoding: 8bit",
+                "",
+                body,
+                ""
+            ])
+        lines.append(f"--{self.MIME_BOUNDARY}--")
+        return "\n".join(lines) + "\n"
+    
+    def get_setup_steps(self, ami_info: AMIInfo, additional_config: Optional[Dict] = None,
+                        network: Optional[NetworkReachability] = None) -> List[UserDataStep]:
+        """
+        ユーザーデータを構成するステップの一覧を取得
+        
+        ユーザーデータとImage Builderコンポーネントの両方がこの一覧から生成される。
+        パッケージリポジトリに到達できないネットワークでは、インターネットが必要な
+        ステップをタイムアウト待ちせずにスキップする。
+        
+        Args:
+            ami_info: AMI情報オブジェクト
+            additional_config: 追加設定（オプション）
+            network: インスタンスのネットワーク到達性（Noneの場合はインターネット到達可能とみなす）
+            
+        Returns:
+            List[UserDataStep]: 実行順のステップ一覧
+        """
+        repos_reachable = network is None or network.can_reach_package_repositories()
+        # インターネットには出られないが、S3ゲートウェイエンドポイント経由でAmazon Linuxのリポジトリには到達できる
+        amazon_linux_repos_only = (
+            not repos_reachable
+            and network.can_reach_amazon_linux_repositories()
+            and ami_info.distro != LinuxDistro.UBUNTU
+        )
+        
+        if ami_info.is_windows():
+            if (additional_config or {}).get('boot_profile') == 'fast-boot':
+                steps = self._get_windows_fast_boot_steps(additional_config)
+            else:
+                steps = self._get_windows_base_steps()
+                if additional_config:
+                    steps.extend(self._get_windows_additional_steps(additional_config))
+            steps.extend(self._get_instance_steps(ami_info, additional_config or {}))
+            steps.append(UserDataStep(
+                name="Completion",
+                description="ログ記録のセットアップ",
+                commands=[
+                    "Write-Host 'User data setup completed successfully'",
+                    "Get-Date | Out-File -Append C:\\userdata-completion.log"
+                ]
+            ))
+        else:
+            if (additional_config or {}).get('boot_profile') == 'fast-boot':
+                steps = self._get_linux_fast_boot_steps(
+                    additional_config, repos_reachable, amazon_linux_repos_only
+                )
+            else:
+                steps = self._get_linux_base_steps()
+                if additional_config:
+                    steps.extend(self._get_linux_additional_steps(additional_config))
+                if (additional_config or {}).get('package_acceleration', False):
+                    steps = self._accelerate_linux_package_steps(steps, additional_config)
+            if self.should_apply_memory_tuning(additional_config or {}):
+                # パッケージのインストール中のOOMを避けるため、インストールより先に実行する
+                # （fast-bootプロファイルではSSM Agentの起動の直後）
+                fast_boot = (additional_config or {}).get('boot_profile') == 'fast-boot'
+                steps.insert(1 if fast_boot else 0, UserDataStep(
+                    name="MemoryTuning",
+                    description="メモリ量に応じたスワップ・カーネルパラメータの設定",
+                    commands=self._build_linux_memory_tuning_commands()
+                ))
+            steps.extend(self._get_instance_steps(ami_info, additional_config or {}))
+            steps.append(UserDataStep(
+                name="Completion",
+                description="完了ログの記録",
+                commands=[
+                    "echo \"User data setup completed successfully at $(date)\" | tee /tmp/userdata-completion.log",
+                    "echo 'User data execution completed.'"
+                ]
+            ))
+        
+        if amazon_linux_repos_only:
+            steps = self._restrict_to_amazon_linux_repositories(steps)
+        elif not repos_reachable:
+            steps = [self._skip_unreachable_step(step, network) if step.requires_internet else step
+                     for step in steps]
+        
+        if not ami_info.is_windows() and ami_info.distro != LinuxDistro.UNKNOWN:
+            steps = [self._specialize_step(step, ami_info.distro) for step in steps]
+        return steps
+    
+    def _specialize_step(self, step: UserDataStep, distro: LinuxDistro) -> UserDataStep:
+        """
+        ステップのパッケージマネージャー分岐を指定ディストリビューション向けに展開する
+        
+        AMI解決時にディストリビューションが判明している場合、yum/apt-getの実行時判定を
+        行わず、該当する分岐のみを出力する。ユーザー指定のカスタムコマンドは変更しない。
+        
+        Args:
+            step: 対象のステップ
+            distro: ディストリビューション
+            
+        Returns:
+            UserDataStep: 特殊化したステップ
+        """
+        if step.name == "CustomCommands":
+            return step
+        return UserDataStep(
+            name=step.name,
+            description=step.description,
+            commands=self._specialize_commands(step.commands, distro),
+            requires_internet=step.requires_internet
+        )
+    
+    def _specialize_commands(self, commands: List[str], distro: LinuxDistro) -> List[str]:
+        """
+        トップレベルのyum/apt-get分岐を、指定ディストリビューションの分岐の中身に置き換える
+        
+        Args:
+            commands: シェルコマンド
+            distro: ディストリビューション
+            
+        Returns:
+            List[str]: 分岐を展開したシェルコマンド
+        """
+        specialized: List[str] = []
+        i = 0
+        while i < len(commands):
+            if commands[i] != self.LINUX_RPM_BRANCH:
+                specialized.append(commands[i])
+                i += 1
+                continue
+            
+            # 分岐を閉じるトップレベルのfiがない場合は展開せずそのまま残す
+            if "fi" not in commands[i + 1:]:
+                specialized.extend(commands[i:])
+                break
+            end = commands.index("fi", i + 1)
+            
+            # if（rpm系） / elif（apt系） / else の各分岐を収集
+            branches: Dict[str, List[str]] = {'rpm': [], 'apt': [], 'else': []}
+            current = 'rpm'
+            for line in commands[i + 1:end]:
+                if line == self.LINUX_APT_BRANCH:
+                    current = 'apt'
+                elif line == "else":
+                    current = 'else'
+                else:
+                    branches[current].append(line[4:] if line.startswith("    ") else line)
+            i = end + 1
+            
+            if distro == LinuxDistro.UBUNTU:
+                chosen = branches['apt'] or branches['else']
+            else:
+                chosen = branches['rpm']
+                if distro == LinuxDistro.AMAZON_LINUX_2023:
+                    chosen = [re.sub(r'\byum (install|update)\b', r'dnf \1', line) for line in chosen]
+            # 分岐の中にさらに分岐がある場合（Amazon Linux限定のラップ等）も展開する
+            specialized.extend(self._specialize_commands(chosen, distro))
+        return specialized
+    
+    def _restrict_to_amazon_linux_repositories(self, steps: List[UserDataStep]) -> List[UserDataStep]:
+        """
+        インターネットが必要なステップをAmazon Linux（yum/dnf）のみで実行するよう書き換える
+        
+        S3ゲートウェイエンドポイント経由で到達できるのはS3でホストされたAmazon Linuxの
+        リポジトリのみのため、最初のパッケージ操作の前にリポジトリ設定ステップを挿入し、
+        apt系ディストリビューションではスキップする。
+        
+        Args:
+            steps: 元のステップ一覧
+            
+        Returns:
+            List[UserDataStep]: 書き換え後のステップ一覧
+        """
+        restricted = []
+        for step in steps:
+            if not step.requires_internet:
+                restricted.append(step)
+                continue
+            if not any(s.name == "RepositoryConfig" for s in restricted):
+                restricted.append(self._get_linux_repository_config_step())
+            restricted.append(UserDataStep(
+                name=step.name,
+                description=f"{step.description}（S3ゲートウェイエンドポイント経由、Amazon Linuxのみ）",
+                commands=self._wrap_for_amazon_linux(step.commands, step.name),
+                requires_internet=True
+            ))
+        return restricted
+    
+    def _wrap_for_amazon_linux(self, commands: List[str], name: str) -> List[str]:
+        """
+        コマンドをyumが使用できる場合のみ実行するようにラップする
+        
+        Args:
+            commands: ラップ対象のコマンド
+            name: スキップ時のログに出力する名前
+            
+        Returns:
+            List[str]: ラップ後のコマンド
+        """
+        return (
+            ["if command -v yum &> /dev/null; then"]
+            + [f"    {command}" for command in commands]
+            + [
+                "else",
+                f"    echo 'Skipping {name}: only Amazon Linux repositories are reachable via the S3 gateway endpoint'",
+                "fi"
+            ]
+        )
+    
+    def _get_linux_repository_config_step(self) -> UserDataStep:
+        """
+        S3ゲートウェイエンドポイント経由でAmazon Linuxのリポジトリを使うための設定ステップを取得
+        
+        リポジトリURLはリージョン変数から組み立てられるため、IMDSから取得したリージョンを
+        yum/dnfの変数に設定する。また、S3以外でホストされるリポジトリで待たされないよう
+        タイムアウトを短くし、到達できないリポジトリはスキップする。
+        
+        Returns:
+            UserDataStep: リポジトリ設定ステップ
+        """
+        return UserDataStep(
+            name="RepositoryConfig",
+            description="Amazon Linuxリポジトリ設定 - S3ゲートウェイエンドポイント経由でのパッケージ取得",
+            commands=self._build_linux_repository_config_commands()
+        )
+    
+    def _build_linux_repository_config_commands(self) -> List[str]:
+        """
+        Amazon Linuxのリポジトリ設定コマンドを生成
+        
+        Returns:
+            List[str]: リポジトリ設定のシェルコマンド
+        """
+        return [
+            "if command -v yum &> /dev/null; then",
+            "    IMDS_TOKEN=$(curl -s -X PUT http://169.254.169.254/latest/api/token "
+            "-H 'X-aws-ec2-metadata-token-ttl-seconds: 300')",
+            "    AWS_REGION=$(curl -s -H \"X-aws-ec2-metadata-token: $IMDS_TOKEN\" "
+            "http://169.254.169.254/latest/meta-data/placement/region)",
+            "    for vars_dir in /etc/dnf/vars /etc/yum/vars; do",
+            "        if [ -d \"$vars_dir\" ]; then",
+            "            echo \"$AWS_REGION\" > \"$vars_dir/awsregion\"",
+            "            echo 'amazonaws.com' > \"$vars_dir/awsdomain\"",
+            "        fi",
+            "    done",
+            "    for conf in /etc/dnf/dnf.conf /etc/yum.conf; do",
+            "        if [ -f \"$conf\" ]; then",
+            "            grep -q '^timeout=' \"$conf\" || sed -i '/^\\[main\\]/a timeout=10' \"$conf\"",
+            "            grep -q '^skip_if_unavailable=' \"$conf\" || "
+            "sed -i '/^\\[main\\]/a skip_if_unavailable=True' \"$conf\"",
+            "        fi",
+            "    done",
+            "fi"
+        ]
+    
+    def _skip_unreachable_step(self, step: UserDataStep, network: NetworkReachability) -> UserDataStep:
+        """
+        インターネットが必要なステップをスキップ用のステップに置き換える
+        
+        Args:
+            step: 置き換え対象のステップ
+            network: インスタンスのネットワーク到達性
+            
+        Returns:
+            UserDataStep: スキップメッセージのみを出力するステップ
+        """
+        return UserDataStep(
+            name=step.name,
+            description=f"{step.description}（スキップ: {network.subnet_type}サブネットからパッケージリポジトリに到達不可）",
+            commands=[f"echo 'Skipping {step.name}: package repositories are unreachable from this subnet'"]
+        )
+    
+    def generate_baked_image_user_data(self, ami_info: AMIInfo) -> ec2.UserData:
+        """
+        ゴールデンイメージ（設定焼き込み済みAMI）起動用の最小ユーザーデータを生成
+        
+        セットアップ処理はImage Builderで焼き込み済みのため、起動時は
+        SSM Agentの起動確認と完了ログの記録のみを行う。通常モードと起動の所要時間を
+        比較できるよう、同じフェーズ名で起動タイムラインを記録する。
+        
+        Args:
+            ami_info: AMI情報
+            
+        Returns:
+            ec2.UserData: 最小構成のユーザーデータ
+        """
+        if ami_info.is_windows():
+            user_data = ec2.UserData.for_windows()
+            ssm_agent = ["Start-Service AmazonSSMAgent"]
+            completion = ["Get-Date | Out-File -Append C:\\userdata-completion.log"]
+        else:
+            user_data = ec2.UserData.for_linux()
+            ssm_agent = ["systemctl enable --now amazon-ssm-agent"]
+            completion = ["echo \"User data setup completed successfully at $(date)\" | tee /tmp/userdata-completion.log"]
+        user_data.add_commands("# ゴールデンイメージ起動（セットアップは焼き込み済み）")
+        self._render_steps(user_data, [
+            UserDataStep(name="SsmAgent", description="SSM Agentの起動確認", commands=ssm_agent),
+            UserDataStep(name="Completion", description="完了ログの記録", commands=completion),
+        ], is_windows=ami_info.is_windows(), idempotent=False)
+        return user_data
+    
+    def _render_steps(self, user_data: ec2.UserData, steps: List[UserDataStep],
+                      is_windows: bool = False, boot_metrics: bool = False,
+                      idempotent: bool = True) -> None:
+        """
+        ステップ一覧をUserDataオブジェクトに書き出す
+        
+        各ステップの前後に起動タイムラインの記録を挿入する。idempotentの場合は
+        各ステップを内容ハッシュのマーカーファイルで保護し、再実行時に内容が
+        変わっていないステップをスキップする。
+        
+        Args:
+            user_data: 書き出し先のUserDataオブジェクト
+            steps: ステップ一覧
+            is_windows: PowerShellとして書き出すか
+            boot_metrics: フェーズ所要時間をCloudWatchメトリクスとして送信するか
+            idempotent: 完了済みで内容が変わっていないステップを再実行時にスキップするか
+        """
+        if is_windows:
+            user_data.add_commands(*self._build_windows_timeline_functions(boot_metrics), "")
+        else:
+            user_data.add_commands(*self._build_linux_timeline_functions(boot_metrics), "")
+        if idempotent:
+            if is_windows:
+                user_data.add_commands(*self._build_windows_step_guard_functions(), "")
+            else:
+                user_data.add_commands(*self._build_linux_step_guard_functions(), "")
+        
+        for step in steps:
+            if is_windows:
+                start, end = f"Start-UserDataPhase '{step.name}'", "Complete-UserDataPhase"
+            else:
+                start, end = f"userdata_phase_start '{step.name}'", "userdata_phase_end"
+            commands = list(step.commands)
+            if idempotent and step.name not in self.UNGUARDED_STEPS:
+                commands = self._guard_step_commands(step, is_windows)
+            user_data.add_commands(f"# {step.description}", start, *commands, end, "")
+    
+    def get_step_checksum(self, step: UserDataStep) -> str:
+        """
+        ステップの内容ハッシュを算出
+        
+        コマンドが1文字でも変わるとハッシュが変わり、再実行時にそのステップが実行される。
+        
+        Args:
+            step: 対象ステップ
+            
+        Returns:
+            str: SHA-256ハッシュの先頭16文字
+        """
+        return hashlib.sha256("\n".join(step.commands).encode("utf-8")).hexdigest()[:16]
+    
+    def _guard_step_commands(self, step: UserDataStep, is_windows: bool) -> List[str]:
+        """
+        ステップのコマンドをマーカーファイルの確認で囲む
+        
+        マーカーはステップが成功した場合のみ書き込み、失敗したステップは次回の実行時に
+        再試行する。bashではidempotent無効時と同じエラー時の挙動（失敗しても後続のコマンドを
+        実行し、変数や `cd` は後続のステップに引き継ぐ）を保つため、コマンドは現在のシェルで
+        実行し、最後のコマンドの終了コードで成否を判定する。PowerShellでは
+        `$ErrorActionPreference` をStopにした try ブロック内で実行し、ネイティブコマンド
+        （msiexec、reg.exe等）は例外を投げないため、最後の `$LASTEXITCODE` も確認する。
+        ヒアドキュメントの終端行を壊さないよう、コマンドはインデントせずにそのまま囲む。
+        
+        Args:
+            step: 対象ステップ
+            is_windows: PowerShellとして書き出すか
+            
+        Returns:
+            List[str]: 保護されたコマンド
+        """
+        checksum = self.get_step_checksum(step)
+        if is_windows:
+            return [
+                f"if (Test-UserDataStepPending '{step.name}' '{checksum}') {{",
+                "try {",
+                "$ErrorActionPreference = 'Stop'",
+                "$global:LASTEXITCODE = 0",
+                *step.commands,
+                f"if ($LASTEXITCODE) {{ throw \"{step.name} exited with code $LASTEXITCODE\" }}",
+                f"Complete-UserDataStep '{step.name}' '{checksum}'",
+                "} catch {",
+                f"    Write-Host \"{step.name} failed (will be retried on next run): $_\"",
+                "} finally {",
+                "    $ErrorActionPreference = 'Continue'",
+                "}",
+                "} else {",
+                f"    Write-Host '{step.name} already completed (unchanged since last run)'",
+                "}",
+            ]
+        return [
+            f"if userdata_step_pending '{step.name}' '{checksum}'; then",
+            *step.commands,
+            "if [ $? -eq 0 ]; then",
+            f"    userdata_step_done '{step.name}' '{checksum}'",
+            "else",
+            f"    echo '{step.name} failed (will be retried on next run)' >&2",
+            "fi",
+            "else",
+            f"    echo '{step.name} already completed (unchanged since last run)'",
+            "fi",
+        ]
+    
+    def _build_linux_step_guard_functions(self) -> List[str]:
+        """
+        ステップのマーカーファイルを扱うbash関数の定義を生成
+        
+        Returns:
+            List[str]: 関数定義のシェルコマンド
+        """
+        return [
+            "# 完了済みステップの記録（内容ハッシュが一致するステップは再実行しない）",
+            f"mkdir -p {self.LINUX_STEP_MARKER_DIR}",
+            "userdata_step_pending() {",
+            f"    [ \"$(cat \"{self.LINUX_STEP_MARKER_DIR}/$1.sha256\" 2> /dev/null)\" != \"$2\" ]",
+            "}",
+            "userdata_step_done() {",
+            f"    echo \"$2\" > \"{self.LINUX_STEP_MARKER_DIR}/$1.sha256\"",
+            "}",
+        ]
+    
+    def _build_windows_step_guard_functions(self) -> List[str]:
+        """
+        ステップのマーカーファイルを扱うPowerShell関数の定義を生成
+        
+        Returns:
+            List[str]: 関数定義のPowerShellコマンド
+        """
+        return [
+            "# 完了済みステップの記録（内容ハッシュが一致するステップは再実行しない）",
+            f"New-Item -ItemType Directory -Force -Path '{self.WINDOWS_STEP_MARKER_DIR}' | Out-Null",
+            "function Test-UserDataStepPending($Step, $Hash) {",
+            f"    $Marker = Join-Path '{self.WINDOWS_STEP_MARKER_DIR}' \"$Step.sha256\"",
+            "    return -not ((Test-Path $Marker) -and ((Get-Content $Marker -Raw).Trim() -eq $Hash))",
+            "}",
+            "function Complete-UserDataStep($Step, $Hash) {",
+            f"    Set-Content -Path (Join-Path '{self.WINDOWS_STEP_MARKER_DIR}' \"$Step.sha256\") -Value $Hash",
+            "}",
+        ]
+    
+    def _build_linux_timeline_functions(self, boot_metrics: bool) -> List[str]:
+        """
+        起動タイムラインを記録するbash関数の定義を生成
+        
+        メトリクスの送信にはAWS CLIを使用する。UbuntuのAMIなどAWS CLIが含まれない場合は
+        警告を出力し、タイムラインログの記録のみを行う。
+        
+        Args:
+            boot_metrics: フェーズ所要時間をCloudWatchメトリクスとして送信するか
+            
+        Returns:
+            List[str]: 関数定義のシェルコマンド
+        """
+        commands = ["# 起動タイムラインの記録"]
+        if boot_metrics:
+            commands.extend([
+                "IMDS_TOKEN=$(curl -s -X PUT http://169.254.169.254/latest/api/token "
+                "-H 'X-aws-ec2-metadata-token-ttl-seconds: 300')",
+                "AWS_REGION=$(curl -s -H \"X-aws-ec2-metadata-token: $IMDS_TOKEN\" "
+                "http://169.254.169.254/latest/meta-data/placement/region)",
+                "if ! command -v aws > /dev/null 2>&1; then",
+                "    echo 'WARNING: aws CLI is not installed; boot metrics will not be published "
+                "(phase durations are still recorded in the timeline log)' >&2",
+                "fi",
+            ])
+        commands.extend([
+            "userdata_phase_start() {",
+            "    USERDATA_PHASE=\"$1\"",
+            "    USERDATA_PHASE_START_MS=$(date +%s%3N)",
+            "    printf '{\"phase\":\"%s\",\"event\":\"start\",\"timestamp_ms\":%s}\\n' "
+            f"\"$USERDATA_PHASE\" \"$USERDATA_PHASE_START_MS\" >> {self.LINUX_TIMELINE_LOG}",
+            "}",
+            "userdata_phase_end() {",
+            "    local end_ms duration_ms",
+            "    end_ms=$(date +%s%3N)",
+            "    duration_ms=$((end_ms - USERDATA_PHASE_START_MS))",
+            "    printf '{\"phase\":\"%s\",\"event\":\"end\",\"timestamp_ms\":%s,\"duration_ms\":%s}\\n' "
+            f"\"$USERDATA_PHASE\" \"$end_ms\" \"$duration_ms\" >> {self.LINUX_TIMELINE_LOG}",
+        ])
+        if boot_metrics:
+            # メトリクス送信で起動を待たせないようバックグラウンドで実行
+            commands.extend([
+                "    if command -v aws > /dev/null 2>&1; then",
+                f"        aws cloudwatch put-metric-data --namespace '{self.BOOT_METRIC_NAMESPACE}' "
+                f"--metric-name '{self.BOOT_METRIC_NAME}' --dimensions \"Phase=$USERDATA_PHASE\" "
+                "--unit Milliseconds --value \"$duration_ms\" --region \"$AWS_REGION\" > /dev/null 2>&1 &",
+                "    fi",
+            ])
+        commands.append("}")
+        return commands
+    
+    def _build_windows_timeline_functions(self, boot_metrics: bool) -> List[str]:
+        """
+        起動タイムラインを記録するPowerShell関数の定義を生成
+        
+        メトリクスの送信に使用するCloudWatchの型（Amazon.CloudWatch.Model）は
+        AWSPowerShellモジュールの読み込みまで解決できないため、先にモジュールを読み込む。
+        読み込めない場合は警告を出力し、タイムラインログの記録のみを行う。
+        
+        Args:
+            boot_metrics: フェーズ所要時間をCloudWatchメトリクスとして送信するか
+            
+        Returns:
+            List[str]: 関数定義のPowerShellコマンド
+        """
+        log_dir = self.WINDOWS_TIMELINE_LOG.rsplit("\\", 1)[0]
+        commands = [
+            "# 起動タイムラインの記録",
+            f"New-Item -ItemType Directory -Force -Path '{log_dir}' | Out-Null",
+        ]
+        if boot_metrics:
+            commands.extend([
+                "try {",
+                "    Import-Module AWSPowerShell -ErrorAction Stop",
+                "    $script:UserDataBootMetrics = $true",
+                "} catch {",
+                "    Write-Warning \"AWSPowerShell module is unavailable; boot metrics will not be published: $_\"",
+                "    $script:UserDataBootMetrics = $false",
+                "}",
+            ])
+        commands.extend([
+            "function Start-UserDataPhase($Phase) {",
+            "    $script:UserDataPhase = $Phase",
+            "    $script:UserDataPhaseStartMs = [DateTimeOffset]::UtcNow.ToUnixTimeMilliseconds()",
+            f"    Add-Content -Path '{self.WINDOWS_TIMELINE_LOG}' -Value "
+            "('{\"phase\":\"' + $Phase + '\",\"event\":\"start\",\"timestamp_ms\":' + $script:UserDataPhaseStartMs + '}')",
+            "}",
+            "function Complete-UserDataPhase {",
+            "    $EndMs = [DateTimeOffset]::UtcNow.ToUnixTimeMilliseconds()",
+            "    $DurationMs = $EndMs - $script:UserDataPhaseStartMs",
+            f"    Add-Content -Path '{self.WINDOWS_TIMELINE_LOG}' -Value "
+            "('{\"phase\":\"' + $script:UserDataPhase + '\",\"event\":\"end\",\"timestamp_ms\":' + $EndMs + "
+            "',\"duration_ms\":' + $DurationMs + '}')",
+        ])
+        if boot_metrics:
+            commands.extend([
+                "    if ($script:UserDataBootMetrics) {",
+                "        try {",
+                "            $Datum = New-Object Amazon.CloudWatch.Model.MetricDatum",
+                f"            $Datum.MetricName = '{self.BOOT_METRIC_NAME}'",
+                "            $Datum.Unit = 'Milliseconds'",
+                "            $Datum.Value = $DurationMs",
+                "            $Dimension = New-Object Amazon.CloudWatch.Model.Dimension",
+                "            $Dimension.Name = 'Phase'",
+                "            $Dimension.Value = $script:UserDataPhase",
+                "            $Datum.Dimensions.Add($Dimension)",
+                f"            Write-CWMetricData -Namespace '{self.BOOT_METRIC_NAMESPACE}' -MetricData $Datum",
+                "        } catch {",
+                "            Write-Host \"Failed to publish boot metric: $_\"",
+                "        }",
+                "    }",
+            ])
+        commands.append("}")
+        return commands
+    
+    def _generate_windows_user_data(self, ami_info: AMIInfo, additional_config: Optional[Dict] = None,
+                                    network: Optional[NetworkReachability] = None) -> ec2.UserData:
+        """
+        Windows用ユーザーデータを生成
+        
+        Args:
+            ami_info: AMI情報
+            additional_config: 追加設定
+            network: インスタンスのネットワーク到達性
+            
+        Returns:
+            ec2.UserData: Windows用ユーザーデータ
+        """
+        user_data = ec2.UserData.for_windows()
+        user_data.add_commands("# Windows Server基本設定", "")
+        self._render_steps(
+            user_data, self.get_setup_steps(ami_info, additional_config, network),
+            is_windows=True, boot_metrics=(additional_config or {}).get('boot_metrics', False),
+            idempotent=(additional_config or {}).get('idempotent', True)
+        )
+        return user_data
+    
+    def _generate_linux_user_data(self, ami_info: AMIInfo, additional_config: Optional[Dict] = None,
+                                  network: Optional[NetworkReachability] = None) -> ec2.UserData:
+        """
+        Linux用ユーザーデータを生成
+        
+        Args:
+            ami_info: AMI情報
+            additional_config: 追加設定
+            network: インスタンスのネットワーク到達性
+            
+        Returns:
+            ec2.UserData: Linux用ユーザーデータ
+        """
+        user_data = ec2.UserData.for_linux()
+        user_data.add_commands(
+            "# Linux系基本設定",
+            "echo 'Starting user data setup...'",
+            ""
+        )
+        self._render_steps(
+            user_data, self.get_setup_steps(ami_info, additional_config, network),
+            boot_metrics=(additional_config or {}).get('boot_metrics', False),
+            idempotent=(additional_config or {}).get('idempotent', True)
+        )
+        return user_data
+    
+    def _get_windows_base_steps(self) -> List[UserDataStep]:
+        """
+        Windows用の基本ステップを取得
+        
+        Returns:
+            List[UserDataStep]: 基本ステップ一覧
+        """
+        return [
+            UserDataStep(
+                name="EnableRemoteDesktop",
+                description="リモートデスクトップの有効化",
+                commands=[
+                    "Set-ItemProperty -Path 'HKLM:\\System\\CurrentControlSet\\Control\\Terminal Server' -Name 'fDenyTSConnections' -Value 0",
+                    "# Windowsファイアウォールでリモートデスクトップを許可",
+                    "Enable-NetFirewallRule -DisplayGroup 'Remote Desktop'"
+                ]
+            ),
+            UserDataStep(
+                name="EnableAdministrator",
+                description="管理者アカウントの有効化（必要に応じて）",
+                commands=["net user administrator /active:yes"]
+            ),
+            UserDataStep(
+                name="EnableNla",
+                description="NLA（Network Level Authentication）の有効化",
+                commands=[
+                    "Set-ItemProperty -Path 'HKLM:\\System\\CurrentControlSet\\Control\\Terminal Server\\WinStations\\RDP-Tcp' -Name 'UserAuthentication' -Value 1"
+                ]
+            ),
+            UserDataStep(
+                name="SsmAgent",
+                description="AWS Systems Manager Agent の設定確認",
+                # 再起動すると登録処理が中断されるため、停止している場合のみ起動する
+                commands=[
+                    "Set-Service -Name AmazonSSMAgent -StartupType Automatic",
+                    "if ((Get-Service AmazonSSMAgent).Status -ne 'Running') { Start-Service AmazonSSMAgent }"
+                ]
+            ),
+            UserDataStep(
+                name="WindowsUpdate",
+                description="Windows Update設定",
+                commands=[
+                    "Set-ItemProperty -Path 'HKLM:\\SOFTWARE\\Policies\\Microsoft\\Windows\\WindowsUpdate\\AU' -Name 'NoAutoUpdate' -Value 0"
+                ]
+            )
+        ]
+    
+    def _get_windows_fast_boot_steps(self, config: Dict) -> List[UserDataStep]:
+        """
+        起動時間を優先したWindows用ステップを取得（fast-bootプロファイル）
+        
+        SSM Agentの起動確認とRDP接続に必要な設定のみを先に実行し、Windows Update設定や
+        IIS等の追加設定はスケジュールタスクでバックグラウンド実行する。
+        
+        Args:
+            config: 追加設定
+            
+        Returns:
+            List[UserDataStep]: fast-bootプロファイルのステップ一覧
+        """
+        base_steps = {step.name: step for step in self._get_windows_base_steps()}
+        critical = [base_steps[name] for name in self.WINDOWS_CRITICAL_STEPS]
+        deferred = [step for step in base_steps.values() if step.name not in self.WINDOWS_CRITICAL_STEPS]
+        deferred.extend(self._get_windows_additional_steps(config))
+        
+        deferred_commands = []
+        for step in deferred:
+            deferred_commands.extend([f"# {step.description}", *step.commands])
+        
+        return critical + [UserDataStep(
+            name="DeferredSetup",
+            description="Windows Update設定・追加設定をバックグラウンドのスケジュールタスクで実行",
+            commands=self._build_windows_deferred_task_commands(deferred_commands)
+        )]
+    
+    def _build_windows_deferred_task_commands(self, deferred_commands: List[str]) -> List[str]:
+        """
+        処理をバックグラウンドのスケジュールタスク（SYSTEM権限）で実行するコマンドを生成
+        
+        Args:
+            deferred_commands: バックグラウンドで実行するPowerShellコマンド
+            
+        Returns:
+            List[str]: スクリプトの書き出しとスケジュールタスクの登録・起動のコマンド
+        """
+        script_dir = self.WINDOWS_DEFERRED_SCRIPT.rsplit("\\", 1)[0]
+        return [
+            f"New-Item -ItemType Directory -Force -Path '{script_dir}' | Out-Null",
+            "@'",
+            f"Start-Transcript -Path '{self.WINDOWS_DEFERRED_LOG}' -Append",
+            *deferred_commands,
+            "Write-Host \"Deferred setup completed at $(Get-Date)\"",
+            "Stop-Transcript",
+            f"'@ | Set-Content -Path '{self.WINDOWS_DEFERRED_SCRIPT}' -Encoding UTF8",
+            "$DeferredAction = New-ScheduledTaskAction -Execute 'powershell.exe' "
+            f"-Argument '-NoProfile -ExecutionPolicy Bypass -File \"{self.WINDOWS_DEFERRED_SCRIPT}\"'",
+            f"Register-ScheduledTask -TaskName '{self.WINDOWS_DEFERRED_TASK}' -Action $DeferredAction "
+            "-User 'SYSTEM' -RunLevel Highest -Force | Out-Null",
+            f"Start-ScheduledTask -TaskName '{self.WINDOWS_DEFERRED_TASK}'"
+        ]
+    
+    def _get_linux_base_steps(self) -> List[UserDataStep]:
+        """
+        Linux用の基本ステップを取得
+        
+        Returns:
+            List[UserDataStep]: 基本ステップ一覧
+        """
+        return [
+            UserDataStep(
+                name="SystemUpdate",
+                description="システムアップデート",
+                commands=[
+                    "if command -v yum &> /dev/null; then",
+                    "    yum update -y",
+                    "elif command -v apt-get &> /dev/null; then",
+                    "    apt-get update && apt-get upgrade -y",
+                    "fi"
+                ],
+                requires_internet=True
+            ),
+            UserDataStep(
+                name="SsmAgent",
+                description="AWS Systems Manager Agent のインストール・設定",
+                commands=[
+                    "if command -v yum &> /dev/null; then",
+                    "    # Amazon Linux/RHEL系",
+                    "    if ! rpm -q amazon-ssm-agent; then",
+                    "        yum install -y amazon-ssm-agent",
+                    "    fi",
+                    "    systemctl enable amazon-ssm-agent",
+                    "    systemctl start amazon-ssm-agent",
+                    "elif command -v apt-get &> /dev/null; then",
+                    "    # Ubuntu/Debian系",
+                    "    if ! dpkg -l | grep amazon-ssm-agent; then",
+                    "        wget --timeout=10 --tries=1 https://s3.amazonaws.com/ec2-downloads-windows/SSMAgent/latest/debian_amd64/amazon-ssm-agent.deb",
+                    "        dpkg -i amazon-ssm-agent.deb",
+                    "    fi",
+                    "    systemctl enable amazon-ssm-agent",
+                    "    systemctl start amazon-ssm-agent",
+                    "fi"
+                ]
+            ),
+            UserDataStep(
+                name="BasicTools",
+                description="基本ツールのインストール",
+                commands=[
+                    "if command -v yum &> /dev/null; then",
+                    "    yum install -y htop curl wget unzip",
+                    "elif command -v apt-get &> /dev/null; then",
+                    "    apt-get install -y htop curl wget unzip",
+                    "fi"
+                ],
+                requires_internet=True
+            ),
+            UserDataStep(
+                name="SshHardening",
+                description="セキュリティ設定 - SSH設定の最適化",
+                commands=[
+                    "if [ -f /etc/ssh/sshd_config ]; then",
+                    "    # パスワード認証を無効化（Key Pairまたはクロス認証を推奨）",
+                    "    sed -i 's/#PasswordAuthentication yes/PasswordAuthentication no/g' /etc/ssh/sshd_config",
+                    "    systemctl reload sshd",
+                    "fi"
+                ]
+            )
+        ]
+    
+    def _get_linux_fast_boot_steps(self, config: Dict, repos_reachable: bool = True,
+                                   amazon_linux_repos_only: bool = False) -> List[UserDataStep]:
+        """
+        起動時間を優先したLinux用ステップを取得（fast-bootプロファイル）
+        
+        SSM Agentの起動を最初に行い、フルアップグレードは明示的に指定された場合のみ実行する。
+        パッケージのインストールは1回のトランザクションにまとめ、カスタムコマンドと共に
+        バックグラウンドのsystemdユニットで実行することで、SSM接続可能になるまでの時間を短縮する。
+        
+        Args:
+            config: 追加設定
+            repos_reachable: パッケージリポジトリに到達できるか（Falseの場合はインストールを省略）
+            amazon_linux_repos_only: S3ゲートウェイエンドポイント経由でAmazon Linuxのリポジトリのみ到達できるか
+            
+        Returns:
+            List[UserDataStep]: fast-bootプロファイルのステップ一覧
+        """
+        deferred_commands = []
+        if repos_reachable or amazon_linux_repos_only:
+            package_commands = self._build_linux_package_transaction(config)
+            if config.get('enable_docker', False):
+                package_commands.append("systemctl enable --now docker")
+            if config.get('package_acceleration', False):
+                package_commands = self._build_linux_package_acceleration_commands() + package_commands
+            # バックグラウンドのインストールもタイムラインに記録し、起動タイムラインの解析ツールで比較できるようにする
+            package_commands = (
+                ["DEFERRED_PACKAGES_START_MS=$(date +%s%3N)"]
+                + package_commands
+                + [self._build_linux_timeline_end_record("DeferredPackages", "DEFERRED_PACKAGES_START_MS")]
+            )
+            if amazon_linux_repos_only:
+                deferred_commands.extend(self._build_linux_repository_config_commands())
+                package_commands = self._wrap_for_amazon_linux(package_commands, "package installation")
+            deferred_commands.extend(package_commands)
+        else:
+            deferred_commands.append("echo 'Skipping package installation: package repositories are unreachable'")
+        if repos_reachable and config.get('linux_desktop'):
+            deferred_commands.extend(self._build_linux_desktop_commands(
+                self.get_xrdp_settings(config['linux_desktop'])
+            ))
+        deferred_commands.extend(config.get('custom_commands', []))
+        
+        return [
+            UserDataStep(
+                name="SsmAgent",
+                description="AWS Systems Manager Agent の起動（最優先）",
+                commands=[
+                    "if command -v yum &> /dev/null; then",
+                    "    rpm -q amazon-ssm-agent &> /dev/null || yum install -y amazon-ssm-agent",
+                    "elif command -v apt-get &> /dev/null; then",
+                    "    if ! dpkg -s amazon-ssm-agent &> /dev/null && ! snap list amazon-ssm-agent &> /dev/null; then",
+                    "        wget -q --timeout=10 --tries=1 -O /tmp/amazon-ssm-agent.deb https://s3.amazonaws.com/ec2-downloads-windows/SSMAgent/latest/debian_amd64/amazon-ssm-agent.deb",
+                    "        dpkg -i /tmp/amazon-ssm-agent.deb",
+                    "    fi",
+                    "fi",
+                    "systemctl enable --now amazon-ssm-agent 2> /dev/null || "
+                    "systemctl enable --now snap.amazon-ssm-agent.amazon-ssm-agent.service"
+                ]
+            ),
+            UserDataStep(
+                name="SshHardening",
+                description="セキュリティ設定 - SSH設定の最適化",
+                commands=[
+                    "if [ -f /etc/ssh/sshd_config ]; then",
+                    "    sed -i 's/#PasswordAuthentication yes/PasswordAuthentication no/g' /etc/ssh/sshd_config",
+                    "    systemctl reload sshd",
+                    "fi"
+                ]
+            ),
+            UserDataStep(
+                name="DeferredSetup",
+                description="パッケージインストール等をバックグラウンドのsystemdユニットで実行",
+                commands=self._build_linux_deferred_unit_commands(deferred_commands)
+            )
+        ]
+    
+    def _accelerate_linux_package_steps(self, steps: List[UserDataStep], config: Dict) -> List[UserDataStep]:
+        """
+        パッケージインストールのステップを高速化プロファイルに書き換える（package_acceleration）
+        
+        最初にパッケージマネージャーの設定ステップを挿入し、基本ツール・Docker・追加パッケージの
+        個別のインストールをSSM Agentの直後の1回のトランザクションにまとめる。
+        
+        Args:
+            steps: 元のステップ一覧
+            config: 追加設定
+            
+        Returns:
+            List[UserDataStep]: 書き換え後のステップ一覧
+        """
+        # フルアップグレードはSystemUpdateステップで実行済みのため、トランザクションには含めない
+        commands = self._build_linux_package_transaction({**config, 'full_upgrade': False})
+        if config.get('enable_docker', False):
+            commands.append("systemctl enable --now docker")
+        
+        accelerated = [UserDataStep(
+            name="PackageManagerConfig",
+            description="パッケージマネージャーの高速化設定",
+            commands=self._build_linux_package_acceleration_commands()
+        )]
+        for step in steps:
+            if step.name in self.LINUX_PACKAGE_STEPS:
+                continue
+            accelerated.append(step)
+            if step.name == "SsmAgent":
+                accelerated.append(UserDataStep(
+                    name="Packages",
+                    description="基本ツール・追加パッケージ・Dockerの一括インストール",
+                    commands=commands,
+                    requires_internet=True
+                ))
+        return accelerated
+    
+    def _build_linux_package_acceleration_commands(self) -> List[str]:
+        """
+        パッケージマネージャーの高速化設定コマンドを生成
+        
+        dnfは並列ダウンロードと最速ミラーの選択、yumは最速ミラープラグインを有効化する。
+        aptは推奨・提案パッケージとドキュメントのインストールを無効化し、
+        man-dbのインデックス再構築トリガーを止める。
+        
+        Returns:
+            List[str]: 高速化設定のシェルコマンド
+        """
+        return [
+            "if command -v yum &> /dev/null; then",
+            "    if command -v dnf &> /dev/null; then",
+            "        grep -q '^max_parallel_downloads=' /etc/dnf/dnf.conf || "
+            "sed -i '/^\\[main\\]/a max_parallel_downloads=10' /etc/dnf/dnf.conf",
+            "        grep -q '^fastestmirror=' /etc/dnf/dnf.conf || "
+            "sed -i '/^\\[main\\]/a fastestmirror=True' /etc/dnf/dnf.conf",
+            "    elif [ -f /etc/yum/pluginconf.d/fastestmirror.conf ]; then",
+            "        sed -i 's/^enabled=.*/enabled=1/' /etc/yum/pluginconf.d/fastestmirror.conf",
+            "    fi",
+            "elif command -v apt-get &> /dev/null; then",
+            "    printf '%s\\n' 'APT::Install-Recommends \"false\";' 'APT::Install-Suggests \"false\";' "
+            f"> {self.LINUX_APT_ACCELERATION_CONF}",
+            "    printf '%s\\n' 'path-exclude=/usr/share/doc/*' 'path-include=/usr/share/doc/*/copyright' "
+            f"'path-exclude=/usr/share/man/*' 'path-exclude=/usr/share/info/*' > {self.LINUX_DPKG_NODOC_CONF}",
+            "    echo 'man-db man-db/auto-update boolean false' | debconf-set-selections",
+            "    rm -f /var/lib/man-db/auto-update",
+            "fi"
+        ]
+    
+    def _build_linux_timeline_end_record(self, phase: str, start_variable: str) -> str:
+        """
+        タイムライン関数を使えない場所（バックグラウンドのスクリプト等）で終了イベントを記録するコマンドを生成
+        
+        Args:
+            phase: フェーズ名
+            start_variable: 開始時刻（ミリ秒）を保持するシェル変数名
+            
+        Returns:
+            str: 終了イベントを追記するシェルコマンド
+        """
+        return (
+            f"END_MS=$(date +%s%3N); printf '{{\"phase\":\"{phase}\",\"event\":\"end\",\"timestamp_ms\":%s,"
+            f"\"duration_ms\":%s}}\\n' \"$END_MS\" \"$((END_MS - {start_variable}))\" >> {self.LINUX_TIMELINE_LOG}"
+        )
+    
+    def _build_linux_package_transaction(self, config: Dict) -> List[str]:
+        """
+        基本ツール・追加パッケージ・Dockerを1回でインストールするコマンドを生成
+        
+        Args:
+            config: 追加設定
+            
+        Returns:
+            List[str]: パッケージインストールのシェルコマンド
+        """
+        yum_packages, apt_packages = self._collect_linux_packages(config)
+        full_upgrade = config.get('full_upgrade', False)
+        
+        commands = ["if command -v yum &> /dev/null; then"]
+        if full_upgrade:
+            commands.append("    yum update -y")
+        commands.extend([
+            f"    yum install -y {' '.join(yum_packages)}",
+            "elif command -v apt-get &> /dev/null; then",
+            "    export DEBIAN_FRONTEND=noninteractive",
+            "    apt-get update",
+        ])
+        if full_upgrade:
+            commands.append("    apt-get upgrade -y")
+        commands.extend([
+            f"    apt-get install -y {' '.join(apt_packages)}",
+            "fi",
+        ])
+        return commands
+    
+    def _collect_linux_packages(self, config: Dict) -> tuple[List[str], List[str]]:
+        """
+        1回のトランザクションでインストールするパッケージ一覧を取得
+        
+        Args:
+            config: 追加設定
+            
+        Returns:
+            tuple[List[str], List[str]]: (yum用パッケージ, apt用パッケージ)
+        """
+        yum_packages = list(self.LINUX_BASIC_TOOLS)
+        apt_packages = list(self.LINUX_BASIC_TOOLS)
+        
+        if config.get('enable_docker', False):
+            yum_packages.append('docker')
+            apt_packages.append('docker.io')
+        
+        for package in config.get('install_packages', []):
+            for packages in (yum_packages, apt_packages):
+                if package not in packages:
+                    packages.append(package)
+        
+        return yum_packages, apt_packages
+    
+    def _build_linux_deferred_unit_commands(self, deferred_commands: List[str]) -> List[str]:
+        """
+        処理をバックグラウンドのsystemdユニット（oneshot）で実行するコマンドを生成
+        
+        Args:
+            deferred_commands: バックグラウンドで実行するシェルコマンド
+            
+        Returns:
+            List[str]: スクリプト・ユニットの書き出しと非同期起動のコマンド
+        """
+        return [
+            f"cat > {self.LINUX_DEFERRED_SCRIPT} <<'USERDATA_DEFERRED'",
+            "#!/bin/bash",
+            *deferred_commands,
+            f"echo \"Deferred setup completed at $(date)\"",
+            "USERDATA_DEFERRED",
+            f"chmod 755 {self.LINUX_DEFERRED_SCRIPT}",
+            f"cat > /etc/systemd/system/{self.LINUX_DEFERRED_UNIT} <<'USERDATA_UNIT'",
+            "[Unit]",
+            "Description=Deferred user data setup",
+            "Wants=network-online.target",
+            "After=network-online.target",
+            "",
+            "[Service]",
+            "Type=oneshot",
+            f"ExecStart={self.LINUX_DEFERRED_SCRIPT}",
+            f"StandardOutput=append:{self.LINUX_DEFERRED_LOG}",
+            f"StandardError=append:{self.LINUX_DEFERRED_LOG}",
+            "USERDATA_UNIT",
+            "systemctl daemon-reload",
+            f"systemctl start --no-block {self.LINUX_DEFERRED_UNIT}"
+        ]
+    
+    def _get_windows_additional_steps(self, config: Dict) -> List[UserDataStep]:
+        """
+        Windows用の追加設定ステップを取得
+        
+        Args:
+            config: 追加設定
+            
+        Returns:
+            List[UserDataStep]: 追加設定ステップ一覧
+        """
+        steps = []
+        
+        # カスタムコマンドの追加
+        if 'custom_commands' in config:
+            steps.append(UserDataStep(
+                name="CustomCommands",
+                description="カスタム設定",
+                commands=list(config['custom_commands'])
+            ))
+        
+        # IIS設定（必要に応じて）
+        if config.get('enable_iis', False):
+            steps.append(UserDataStep(
+                name="EnableIis",
+                description="IISの有効化",
+                commands=["Enable-WindowsOptionalFeature -Online -FeatureName IIS-WebServerRole -All"]
+            ))
+        
+        # 特定ポートの開放
+        if 'open_ports' in config:
+            steps.append(UserDataStep(
+                name="OpenPorts",
+                description="ファイアウォールポート設定",
+                commands=[
+                    f"New-NetFirewallRule -DisplayName 'Open Port {port}' -Direction Inbound -Protocol TCP -LocalPort {port} -Action Allow"
+                    for port in config['open_ports']
+                ]
+            ))
+        
+        # 小さいインスタンスタイプ向けの軽量化設定
+        if self.should_apply_windows_slimming(config):
+            steps.append(UserDataStep(
+                name="WindowsSlimming",
+                description="小メモリインスタンス向けの軽量化設定",
+                commands=self._build_windows_slimming_commands()
+            ))
+        
+        # RDPセッションのパフォーマンス設定
+        if config.get('rdp_performance'):
+            steps.append(UserDataStep(
+                name="RdpPerformance",
+                description="RDPセッションのパフォーマンス設定",
+                commands=self._build_rdp_performance_commands(
+                    self.get_rdp_performance_settings(config['rdp_performance'])
+                )
+            ))
+        
+        # GPUインスタンス向けのNICE DCVサーバー
+        if config.get('dcv'):
+            steps.append(UserDataStep(
+                name="DcvServer",
+                description="NICE DCVサーバーのインストールと設定",
+                commands=self._build_dcv_server_commands(self.get_dcv_settings(config['dcv'])),
+                requires_internet=True
+            ))
+        
+        return steps
+    
+    def should_apply_windows_slimming(self, config: Dict) -> bool:
+        """
+        windows_slimmingを適用するかどうかを判定
+        
+        インスタンスのメモリ量がしきい値未満の場合のみ適用する。メモリ量が不明な
+        インスタンスタイプには適用しない。
+        
+        Args:
+            config: 追加設定
+            
+        Returns:
+            bool: 軽量化設定を適用する場合True
+        """
+        value = config.get('windows_slimming')
+        if not value or self.instance is None:
+            return False
+        threshold_gib = self.WINDOWS_SLIMMING_MEMORY_THRESHOLD_GIB
+        if isinstance(value, dict):
+            threshold_gib = value.get('memory_threshold_gib', threshold_gib)
+        return self.instance.memory_gib() < threshold_gib
+    
+    def _build_windows_slimming_commands(self) -> List[str]:
+        """
+        小メモリインスタンス向けの軽量化設定コマンドを生成
+        
+        不要なサービス・スケジュールタスクの無効化、ページファイルの固定サイズ化、
+        高パフォーマンス電源プランの設定、Microsoft Defenderの除外設定を行う。
+        
+        Returns:
+            List[str]: 軽量化設定のPowerShellコマンド
         """
-        AMI情報に基づいてユーザーデータを生成
+        services = ", ".join(f"'{name}'" for name in self.WINDOWS_SLIMMING_SERVICES)
+        exclusions = ", ".join(f"'{path}'" for path in self.WINDOWS_DEFENDER_EXCLUSIONS)
+        # ページファイルの伸長による停止を避けるため、メモリ量の1倍〜2倍の固定範囲にする（再起動後に有効）
+        memory_mib = self.instance.memory_mib
+        
+        commands = [
+            f"foreach ($Name in @({services})) {{",
+            "    if (Get-Service -Name $Name -ErrorAction SilentlyContinue) {",
+            "        Stop-Service -Name $Name -Force -ErrorAction SilentlyContinue",
+            "        Set-Service -Name $Name -StartupType Disabled",
+            "    }",
+            "}",
+        ]
+        commands.extend(
+            f"Disable-ScheduledTask -TaskPath '{path}' -TaskName '{name}' -ErrorAction SilentlyContinue | Out-Null"
+            for path, name in self.WINDOWS_SLIMMING_TASKS
+        )
+        commands.extend([
+            "New-ItemProperty -Path 'HKLM:\\SOFTWARE\\Microsoft\\ServerManager' -Name 'DoNotOpenServerManagerAtLogon' "
+            "-PropertyType DWord -Value 1 -Force | Out-Null",
+            "$ComputerSystem = Get-CimInstance -ClassName Win32_ComputerSystem",
+            "if ($ComputerSystem.AutomaticManagedPagefile) { "
+            "Set-CimInstance -InputObject $ComputerSystem -Property @{AutomaticManagedPagefile = $false} }",
+            "$PageFile = Get-CimInstance -ClassName Win32_PageFileSetting -Filter \"Name='C:\\\\pagefile.sys'\"",
+            "if (-not $PageFile) { $PageFile = New-CimInstance -ClassName Win32_PageFileSetting "
+            "-Property @{Name = 'C:\\pagefile.sys'} }",
+            f"Set-CimInstance -InputObject $PageFile -Property @{{InitialSize = {memory_mib}; MaximumSize = {memory_mib * 2}}}",
+            f"powercfg /setactive {self.WINDOWS_HIGH_PERFORMANCE_PLAN}",
+            "if (Get-Command Add-MpPreference -ErrorAction SilentlyContinue) {",
+            f"    Add-MpPreference -ExclusionPath {exclusions}",
+            "}",
+        ])
+        return commands
+    
+    def _get_instance_steps(self, ami_info: AMIInfo, config: Dict) -> List[UserDataStep]:
+        """
+        インスタンスタイプに応じたセットアップステップを取得
+        
+        起動プロファイルに関わらず、完了ログの記録の直前に実行する。
         
         Args:
             ami_info: AMI情報オブジェクト
-            additional_config: 追加設定（オプション）
+            config: 追加設定
             
         Returns:
-            ec2.UserData: 生成されたユーザーデータ
+            List[UserDataStep]: インスタンスタイプに応じたステップ一覧
         """
-        if ami_info.is_windows():
-            return self._generate_windows_user_data(ami_info, additional_config)
-        else:
-            # Linux、またはUnknownの場合はLinuxとして処理
-            return self._generate_linux_user_data(ami_info, additional_config)
+        steps = []
+        
+        # ローカルNVMeインスタンスストアのセットアップ
+        if self.should_setup_instance_store(config):
+            steps.append(UserDataStep(
+                name="InstanceStore",
+                description="ローカルNVMeインスタンスストアのセットアップ",
+                commands=(self._build_windows_instance_store_commands() if ami_info.is_windows()
+                          else self._build_linux_instance_store_commands())
+            ))
+        
+        return steps
     
-    def _generate_windows_user_data(self, ami_info: AMIInfo, additional_config: Optional[Dict] = None) -> ec2.UserData:
+    def should_setup_instance_store(self, config: Dict) -> bool:
         """
-        Windows用ユーザーデータを生成
+        インスタンスストアをセットアップするかどうかを判定
+        
+        インスタンスカタログでNVMeインスタンスストアを持つと判定されたインスタンスタイプで、
+        instance_storeがfalseでない場合に適用する。
         
         Args:
-            ami_info: AMI情報
-            additional_config: 追加設定
+            config: 追加設定
             
         Returns:
-            ec2.UserData: Windows用ユーザーデータ
+            bool: インスタンスストアをセットアップする場合True
         """
-        user_data = ec2.UserData.for_windows()
-        
-        # 基本的なWindows設定
-        user_data.add_commands(
-            "# Windows Server基本設定",
-            "",
-            "# リモートデスクトップの有効化",
-            "Set-ItemProperty -Path 'HKLM:\\System\\CurrentControlSet\\Control\\Terminal Server' -Name 'fDenyTSConnections' -Value 0",
-            "",
-            "# Windowsファイアウォールでリモートデスクトップを許可",
-            "Enable-NetFirewallRule -DisplayGroup 'Remote Desktop'",
-            "",
-            "# 管理者アカウントの有効化（必要に応じて）",
-            "net user administrator /active:yes",
-            "",
-            "# セキュリティ設定",
-            "# NLA（Network Level Authentication）の有効化",
-            "Set-ItemProperty -Path 'HKLM:\\System\\CurrentControlSet\\Control\\Terminal Server\\WinStations\\RDP-Tcp' -Name 'UserAuthentication' -Value 1",
-            "",
-            "# AWS Systems Manager Agent の設定確認",
-            "Get-Service AmazonSSMAgent | Restart-Service",
-            "",
-            "# Windows Update設定",
-            "Set-ItemProperty -Path 'HKLM:\\SOFTWARE\\Policies\\Microsoft\\Windows\\WindowsUpdate\\AU' -Name 'NoAutoUpdate' -Value 0",
-            "",
-            "# ログ記録のセットアップ",
-            "Write-Host 'User data setup completed successfully'",
-            "Get-Date | Out-File -Append C:\\userdata-completion.log"
-        )
+        if self.instance is None or not self.instance.instance_store:
+            return False
+        return config.get('instance_store', True) is not False
+    
+    def _build_linux_instance_store_commands(self) -> List[str]:
+        """
+        Linux用のインスタンスストアのセットアップコマンドを生成
         
-        # 追加設定の適用
-        if additional_config:
-            self._apply_windows_additional_config(user_data, additional_config)
+        インスタンスストアのNVMeデバイスごとにファイルシステムを作成して
+        /mnt/instance-store（2台目以降は末尾に番号付き）にマウントする。インスタンスの
+        停止・開始でデバイスは空になるため、起動のたびに実行するsystemdユニットとして登録する。
         
-        return user_data
+        Returns:
+            List[str]: スクリプト・ユニットの書き出しと実行のコマンド
+        """
+        mount = self.LINUX_INSTANCE_STORE_MOUNT
+        script_commands = [
+            "INDEX=0",
+            "for DEVICE in $(lsblk -dpno NAME,MODEL | awk '/Instance Storage/ {print $1}'); do",
+            f"    MOUNT_POINT={mount}",
+            f"    [ \"$INDEX\" -gt 0 ] && MOUNT_POINT=\"{mount}$INDEX\"",
+            "    INDEX=$((INDEX + 1))",
+            "    mountpoint -q \"$MOUNT_POINT\" && continue",
+            "    blkid \"$DEVICE\" &> /dev/null || mkfs -t xfs -f \"$DEVICE\" &> /dev/null || mkfs -t ext4 -F \"$DEVICE\"",
+            "    mkdir -p \"$MOUNT_POINT\"",
+            "    mount -o noatime \"$DEVICE\" \"$MOUNT_POINT\"",
+            "    chmod 1777 \"$MOUNT_POINT\"",
+            "done"
+        ]
+        return self._build_linux_boot_unit_commands(
+            self.LINUX_INSTANCE_STORE_SCRIPT, self.LINUX_INSTANCE_STORE_UNIT,
+            "Format and mount local NVMe instance store", script_commands
+        )
     
-    def _generate_linux_user_data(self, ami_info: AMIInfo, additional_config: Optional[Dict] = None) -> ec2.UserData:
+    def _build_linux_boot_unit_commands(self, script_path: str, unit: str, description: str,
+                                        script_commands: List[str]) -> List[str]:
         """
-        Linux用ユーザーデータを生成
+        処理を起動のたびに実行するsystemdユニット（oneshot）として登録するコマンドを生成
         
         Args:
-            ami_info: AMI情報
-            additional_config: 追加設定
+            script_path: 書き出すスクリプトのパス
+            unit: systemdユニット名
+            description: ユニットの説明
+            script_commands: スクリプトの内容（シェルコマンド）
             
         Returns:
-            ec2.UserData: Linux用ユーザーデータ
+            List[str]: スクリプト・ユニットの書き出しと有効化・実行のコマンド
         """
-        user_data = ec2.UserData.for_linux()
-        
-        # 基本的なLinux設定
-        user_data.add_commands(
+        return [
+            f"cat > {script_path} <<'USERDATA_BOOT_SCRIPT'",
             "#!/bin/bash",
+            *script_commands,
+            "USERDATA_BOOT_SCRIPT",
+            f"chmod 755 {script_path}",
+            f"cat > /etc/systemd/system/{unit} <<'USERDATA_UNIT'",
+            "[Unit]",
+            f"Description={description}",
+            "After=local-fs.target",
             "",
-            "# Linux系基本設定",
-            "echo 'Starting user data setup...'",
-            "",
-            "# システムアップデート",
-            "if command -v yum &> /dev/null; then",
-            "    yum update -y",
-            "elif command -v apt-get &> /dev/null; then",
-            "    apt-get update && apt-get upgrade -y",
-            "fi",
-            "",
-            "# AWS Systems Manager Agent のインストール・設定",
-            "if command -v yum &> /dev/null; then",
-            "    # Amazon Linux/RHEL系",
-            "    if ! rpm -q amazon-ssm-agent; then",
-            "        yum install -y amazon-ssm-agent",
-            "    fi",
-            "    systemctl enable amazon-ssm-agent",
-            "    systemctl start amazon-ssm-agent",
-            "elif command -v apt-get &> /dev/null; then",
-            "    # Ubuntu/Debian系",
-            "    if ! dpkg -l | grep amazon-ssm-agent; then",
-            "        wget https://s3.amazonaws.com/ec2-downloads-windows/SSMAgent/latest/debian_amd64/amazon-ssm-agent.deb",
-            "        dpkg -i amazon-ssm-agent.deb",
-            "    fi",
-            "    systemctl enable amazon-ssm-agent",
-            "    systemctl start amazon-ssm-agent",
-            "fi",
-            "",
-            "# 基本ツールのインストール",
-            "if command -v yum &> /dev/null; then",
-            "    yum install -y htop curl wget unzip",
-            "elif command -v apt-get &> /dev/null; then",
-            "    apt-get install -y htop curl wget unzip",
-            "fi",
-            "",
-            "# セキュリティ設定",
-            "# SSH設定の最適化",
-            "if [ -f /etc/ssh/sshd_config ]; then",
-            "    # パスワード認証を無効化（Key Pairまたはクロス認証を推奨）",
-            "    sed -i 's/#PasswordAuthentication yes/PasswordAuthentication no/g' /etc/ssh/sshd_config",
-            "    systemctl reload sshd",
-            "fi",
-            "",
-            "# 完了ログの記録",
-            "echo 'User data setup completed successfully at $(date)' | tee /tmp/userdata-completion.log",
+            "[Service]",
+            "Type=oneshot",
+            "RemainAfterExit=yes",
+            f"ExecStart={script_path}",
             "",
-            "# 追加のセキュリティ強化（必要に応じて）",
-            "# 不要なサービスの停止",
-            "# ファイアウォール設定",
-            "",
-            "echo 'User data execution completed.'"
-        )
+            "[Install]",
+            "WantedBy=multi-user.target",
+            "USERDATA_UNIT",
+            "systemctl daemon-reload",
+            f"systemctl enable --now {unit}"
+        ]
+    
+    def should_apply_memory_tuning(self, config: Dict) -> bool:
+        """
+        メモリ・ネットワークチューニングを適用するかどうかを判定
         
-        # 追加設定の適用
-        if additional_config:
-            self._apply_linux_additional_config(user_data, additional_config)
+        インスタンスカタログでメモリ量が判明しているインスタンスタイプで、
+        memory_tuningがtrueの場合に適用する（既定は無効）。
         
-        return user_data
+        Args:
+            config: 追加設定
+            
+        Returns:
+            bool: チューニングを適用する場合True
+        """
+        return self.instance is not None and config.get('memory_tuning', False) is True
+    
+    def _build_linux_memory_tuning_commands(self) -> List[str]:
+        """
+        Linux用のメモリ量に応じたチューニングコマンドを生成
+        
+        メモリ量がしきい値未満の場合は圧縮スワップ（zram）を起動のたびに設定し、
+        スワップを積極的に使うvm.swappinessにする。しきい値以上の場合はスワップを
+        抑えるvm.swappinessにする。あわせて高レイテンシのトンネル向けに
+        TCPバッファの上限を引き上げる。
+        
+        Returns:
+            List[str]: チューニングのシェルコマンド
+        """
+        use_zram = self.instance.memory_gib() < self.LINUX_ZRAM_MEMORY_THRESHOLD_GIB
+        sysctl = {'vm.swappiness': '100' if use_zram else '10'}
+        if use_zram:
+            # zramは読み出しが高速なため、スワップの先読みを無効化する
+            sysctl['vm.page-cluster'] = '0'
+        sysctl.update(self.LINUX_NETWORK_SYSCTL)
+        
+        commands = [
+            f"cat > {self.LINUX_TUNING_SYSCTL_CONF} <<'USERDATA_SYSCTL'",
+            *(f"{key} = {value}" for key, value in sysctl.items()),
+            "USERDATA_SYSCTL",
+            f"sysctl -q -p {self.LINUX_TUNING_SYSCTL_CONF} || true"
+        ]
+        if use_zram:
+            # メモリ量が4GiB未満の場合はメモリ量と同じ、それ以上の場合は半分のサイズにする
+            memory_mib = self.instance.memory_mib
+            zram_mib = memory_mib if self.instance.memory_gib() < 4 else memory_mib // 2
+            zram_commands = [
+                "swapon --show=NAME --noheadings | grep -q '^/dev/zram' && exit 0",
+                "modprobe zram || { echo 'zram is not available on this kernel'; exit 0; }",
+                f"ZRAM_DEVICE=$(zramctl --find --size {zram_mib}M --algorithm zstd 2> /dev/null || "
+                f"zramctl --find --size {zram_mib}M) || exit 0",
+                "mkswap \"$ZRAM_DEVICE\" > /dev/null",
+                "swapon --priority 100 \"$ZRAM_DEVICE\""
+            ]
+            commands.extend(self._build_linux_boot_unit_commands(
+                self.LINUX_ZRAM_SCRIPT, self.LINUX_ZRAM_UNIT, "Compressed swap on zram", zram_commands
+            ))
+        return commands
+    
+    def _build_windows_instance_store_commands(self) -> List[str]:
+        """
+        Windows用のインスタンスストアのセットアップコマンドを生成
+        
+        未初期化のインスタンスストアをT:ボリュームとして初期化し、システムのTEMP/TMPと
+        ページファイルをT:に移す。インスタンスの停止・開始でディスクは空（未初期化）になるため、
+        初期化スクリプトは起動時のスケジュールタスクとしても登録する。
+        
+        起動時のタスクはページングの構成後に実行されるため、停止・開始後の起動ではT:の
+        ページファイルは使用されない。ページファイルが存在しない状態にならないよう、C:にも
+        小さいページファイル（windows_slimmingの設定があればその設定）を残す。T:が存在しない
+        場合、起動時のタスクはTEMP/TMPをシステム既定のフォルダに戻す。
+        
+        Returns:
+            List[str]: インスタンスストアのセットアップのPowerShellコマンド
+        """
+        drive = self.WINDOWS_INSTANCE_STORE_DRIVE
+        script = self.WINDOWS_INSTANCE_STORE_SCRIPT
+        return [
+            "New-Item -ItemType Directory -Force -Path (Split-Path -Parent "
+            f"'{script}') | Out-Null",
+            "@'",
+            "$Disk = Get-Disk | Where-Object { $_.FriendlyName -like '*Instance Storage*' "
+            "-and $_.PartitionStyle -eq 'RAW' } | Select-Object -First 1",
+            f"if ($Disk -and -not (Test-Path '{drive}:\\')) {{",
+            f"    $Disk | Initialize-Disk -PartitionStyle GPT -PassThru | New-Partition -DriveLetter {drive} "
+            "-UseMaximumSize | Format-Volume -FileSystem NTFS -NewFileSystemLabel 'InstanceStore' -Confirm:$false | Out-Null",
+            "}",
+            f"if (Test-Path '{drive}:\\') {{",
+            f"    New-Item -ItemType Directory -Force -Path '{drive}:\\Temp' | Out-Null",
+            "} else {",
+            "    [Environment]::SetEnvironmentVariable('TEMP', \"$env:SystemRoot\\Temp\", 'Machine')",
+            "    [Environment]::SetEnvironmentVariable('TMP', \"$env:SystemRoot\\Temp\", 'Machine')",
+            "}",
+            f"'@ | Set-Content -Path '{script}' -Encoding UTF8",
+            f"$Action = New-ScheduledTaskAction -Execute 'powershell.exe' "
+            f"-Argument '-NoProfile -ExecutionPolicy Bypass -File \"{script}\"'",
+            f"Register-ScheduledTask -TaskName '{self.WINDOWS_INSTANCE_STORE_TASK}' -Action $Action "
+            "-Trigger (New-ScheduledTaskTrigger -AtStartup) -User 'SYSTEM' -RunLevel Highest -Force | Out-Null",
+            f"& '{script}'",
+            f"if (Test-Path '{drive}:\\Temp') {{",
+            f"    [Environment]::SetEnvironmentVariable('TEMP', '{drive}:\\Temp', 'Machine')",
+            f"    [Environment]::SetEnvironmentVariable('TMP', '{drive}:\\Temp', 'Machine')",
+            "    $ComputerSystem = Get-CimInstance -ClassName Win32_ComputerSystem",
+            "    if ($ComputerSystem.AutomaticManagedPagefile) { "
+            "Set-CimInstance -InputObject $ComputerSystem -Property @{AutomaticManagedPagefile = $false} }",
+            "    Get-CimInstance -ClassName Win32_PageFileSetting | Where-Object { $_.Name -notlike 'C:*' } | Remove-CimInstance",
+            "    # T:が初期化される前の起動でもページファイルが存在するよう、C:にも残す",
+            "    if (-not (Get-CimInstance -ClassName Win32_PageFileSetting -Filter \"Name='C:\\\\pagefile.sys'\")) {",
+            "        New-CimInstance -ClassName Win32_PageFileSetting -Property @{Name = 'C:\\pagefile.sys'; "
+            f"InitialSize = [uint32]{self.WINDOWS_FALLBACK_PAGEFILE_MB}; MaximumSize = [uint32]{self.WINDOWS_FALLBACK_PAGEFILE_MB}}} | Out-Null",
+            "    }",
+            "    # InitialSize・MaximumSizeが0の場合はシステム管理サイズ（再起動後に有効）",
+            f"    New-CimInstance -ClassName Win32_PageFileSetting -Property @{{Name = '{drive}:\\pagefile.sys'; "
+            "InitialSize = [uint32]0; MaximumSize = [uint32]0} | Out-Null",
+            "}"
+        ]
     
-    def _apply_windows_additional_config(self, user_data: ec2.UserData, config: Dict) -> None:
+    def get_rdp_performance_settings(self, value) -> Dict:
         """
-        Windows用の追加設定を適用
+        rdp_performanceの指定値を既定値と統合した設定を取得
         
         Args:
-            user_data: 既存のUserDataオブジェクト
-            config: 追加設定
+            value: rdp_performanceの指定値（trueの場合は既定値、辞書の場合は既定値を上書き）
+            
+        Returns:
+            Dict: RDPパフォーマンス設定
         """
-        # カスタムコマンドの追加
-        if 'custom_commands' in config:
-            user_data.add_commands("# カスタム設定")
-            for command in config['custom_commands']:
-                user_data.add_commands(command)
+        settings = dict(self.RDP_PERFORMANCE_DEFAULTS)
+        if isinstance(value, dict):
+            settings.update(value)
+        return settings
+    
+    def _build_rdp_performance_commands(self, settings: Dict) -> List[str]:
+        """
+        RDPセッションのパフォーマンス設定コマンドを生成
         
-        # IIS設定（必要に応じて）
-        if config.get('enable_iis', False):
-            user_data.add_commands(
-                "# IISの有効化",
-                "Enable-WindowsOptionalFeature -Online -FeatureName IIS-WebServerRole -All"
+        設定はリモートデスクトップサービスのグループポリシー（レジストリ）として書き込み、
+        以降に開始されるセッションから適用される。視覚効果（VisualFXSetting）はユーザーごとの
+        設定のため、既定ユーザーのハイブに書き込み、以降に作成されるプロファイルに適用する。
+        
+        Args:
+            settings: RDPパフォーマンス設定
+            
+        Returns:
+            List[str]: パフォーマンス設定のPowerShellコマンド
+        """
+        def set_policy(name: str, value: int) -> str:
+            return f"New-ItemProperty -Path $TsPolicy -Name '{name}' -PropertyType DWord -Value {value} -Force | Out-Null"
+        
+        commands = [
+            f"$TsPolicy = '{self.WINDOWS_TS_POLICY_KEY}'",
+            "if (-not (Test-Path $TsPolicy)) { New-Item -Path $TsPolicy -Force | Out-Null }",
+        ]
+        
+        # SelectTransport: 0 = UDPとTCPを使用 / 1 = TCPのみ
+        commands.append(set_policy('SelectTransport', 0 if settings['udp_transport'] else 1))
+        if settings['udp_transport']:
+            commands.append("Enable-NetFirewallRule -DisplayName 'Remote Desktop - User Mode (UDP-In)'")
+        
+        commands.append(set_policy('AVC444ModePreferred', 1 if settings['avc444'] else 0))
+        
+        # フレームレートの上限（既定の30fpsの場合は値を削除する）
+        winstations = "'HKLM:\\SYSTEM\\CurrentControlSet\\Control\\Terminal Server\\WinStations'"
+        frame_interval = self.RDP_FRAME_INTERVALS[settings['max_frame_rate']]
+        if frame_interval is None:
+            commands.append(
+                f"Remove-ItemProperty -Path {winstations} -Name 'DWMFRAMEINTERVAL' -ErrorAction SilentlyContinue"
+            )
+        else:
+            commands.append(
+                f"New-ItemProperty -Path {winstations} "
+                f"-Name 'DWMFRAMEINTERVAL' -PropertyType DWord -Value {frame_interval} -Force | Out-Null"
             )
         
-        # 特定ポートの開放
-        if 'open_ports' in config:
-            user_data.add_commands("# ファイアウォールポート設定")
-            for port in config['open_ports']:
-                user_data.add_commands(
-                    f"New-NetFirewallRule -DisplayName 'Open Port {port}' -Direction Inbound -Protocol TCP -LocalPort {port} -Action Allow"
-                )
+        if settings['reduce_visual_effects']:
+            # VisualFXSetting: 2 = パフォーマンスを優先する（HKCUの値のため既定ユーザーのハイブに書き込む）
+            commands.extend([
+                set_policy('fNoRemoteDesktopWallpaper', 1),
+                f"reg load 'HKU\\SsmEc2RdpDefaultUser' '{self.WINDOWS_DEFAULT_USER_HIVE}' | Out-Null",
+                "reg add 'HKU\\SsmEc2RdpDefaultUser\\Software\\Microsoft\\Windows\\CurrentVersion\\Explorer\\VisualEffects' "
+                "/v VisualFXSetting /t REG_DWORD /d 2 /f | Out-Null",
+                "reg unload 'HKU\\SsmEc2RdpDefaultUser' | Out-Null",
+            ])
+        
+        # 未設定時は接続時・接続中の両方で帯域幅を検出するため、自動検出を使う場合はポリシーを削除する
+        if settings['bandwidth_autodetect']:
+            commands.append(
+                "Remove-ItemProperty -Path $TsPolicy -Name 'SelectNetworkDetect' -ErrorAction SilentlyContinue"
+            )
+        else:
+            commands.append(set_policy('SelectNetworkDetect', 0))
+        
+        return commands
+    
+    def get_dcv_settings(self, value) -> Dict:
+        """
+        dcvの指定値を既定値と統合した設定を取得
+        
+        Args:
+            value: dcvの指定値（trueの場合は既定値、辞書の場合は既定値を上書き）
+            
+        Returns:
+            Dict: NICE DCV設定
+        """
+        settings = dict(self.DCV_DEFAULTS)
+        if isinstance(value, dict):
+            settings.update(value)
+        return settings
+    
+    def _build_dcv_server_commands(self, settings: Dict) -> List[str]:
+        """
+        NICE DCVサーバーのインストール・設定コマンドを生成
+        
+        コンソールセッションの所有者はAdministratorとし、待ち受けポートとQUICの
+        有効化はDCVサーバーの設定（レジストリ）として書き込む。
+        
+        Args:
+            settings: NICE DCV設定
+            
+        Returns:
+            List[str]: NICE DCVサーバーのインストール・設定のPowerShellコマンド
+        """
+        port = settings['port']
+        connectivity = f"{self.WINDOWS_DCV_SETTINGS_KEY}\\connectivity"
+        
+        def set_setting(name: str, value: int) -> str:
+            return f"New-ItemProperty -Path $DcvConnectivity -Name '{name}' -PropertyType DWord -Value {value} -Force | Out-Null"
+        
+        commands = [
+            "$DcvInstaller = Join-Path $env:TEMP 'nice-dcv-server.msi'",
+            f"Invoke-WebRequest -Uri '{self.WINDOWS_DCV_SERVER_MSI_URL}' -OutFile $DcvInstaller -UseBasicParsing",
+            "Start-Process -FilePath 'msiexec.exe' -ArgumentList \"/i `\"$DcvInstaller`\" ADDLOCAL=ALL "
+            "AUTOMATIC_SESSION_OWNER=Administrator /quiet /norestart\" -Wait",
+            f"$DcvConnectivity = '{connectivity}'",
+            "if (-not (Test-Path $DcvConnectivity)) { New-Item -Path $DcvConnectivity -Force | Out-Null }",
+            set_setting('web-port', port),
+            f"New-NetFirewallRule -DisplayName 'NICE DCV (TCP-In)' -Direction Inbound -Protocol TCP -LocalPort {port} -Action Allow",
+        ]
+        if settings['quic']:
+            commands.extend([
+                set_setting('enable-quic-frontend', 1),
+                set_setting('quic-port', port),
+                f"New-NetFirewallRule -DisplayName 'NICE DCV (QUIC-In)' -Direction Inbound -Protocol UDP -LocalPort {port} -Action Allow",
+            ])
+        commands.append("Restart-Service -Name 'dcvserver'")
+        return commands
     
-    def _apply_linux_additional_config(self, user_data: ec2.UserData, config: Dict) -> None:
+    def _get_linux_additional_steps(self, config: Dict) -> List[UserDataStep]:
         """
-        Linux用の追加設定を適用
+        Linux用の追加設定ステップを取得
         
         Args:
-            user_data: 既存のUserDataオブジェクト
             config: 追加設定
+            
+        Returns:
+            List[UserDataStep]: 追加設定ステップ一覧
         """
+        steps = []
+        
         # カスタムコマンドの追加
         if 'custom_commands' in config:
-            user_data.add_commands("# カスタム設定")
-            for command in config['custom_commands']:
-                user_data.add_commands(command)
+            steps.append(UserDataStep(
+                name="CustomCommands",
+                description="カスタム設定",
+                commands=list(config['custom_commands'])
+            ))
         
         # Docker設定（必要に応じて）
         if config.get('enable_docker', False):
-            user_data.add_commands(
-                "# Dockerのインストール",
-                "if command -v yum &> /dev/null; then",
-                "    yum install -y docker",
-                "    systemctl enable docker",
-                "    systemctl start docker",
-                "elif command -v apt-get &> /dev/null; then",
-                "    apt-get install -y docker.io",
-                "    systemctl enable docker",
-                "    systemctl start docker",
-                "fi"
-            )
+            steps.append(UserDataStep(
+                name="Docker",
+                description="Dockerのインストール",
+                commands=[
+                    "if command -v yum &> /dev/null; then",
+                    "    yum install -y docker",
+                    "    systemctl enable docker",
+                    "    systemctl start docker",
+                    "elif command -v apt-get &> /dev/null; then",
+                    "    apt-get install -y docker.io",
+                    "    systemctl enable docker",
+                    "    systemctl start docker",
+                    "fi"
+                ],
+                requires_internet=True
+            ))
         
         # 特定パッケージのインストール
         if 'install_packages' in config:
             packages = ' '.join(config['install_packages'])
-            user_data.add_commands(
-                f"# 追加パッケージのインストール",
-                f"if command -v yum &> /dev/null; then",
-                f"    yum install -y {packages}",
-                f"elif command -v apt-get &> /dev/null; then",
-                f"    apt-get install -y {packages}",
-                f"fi"
-            )
+            steps.append(UserDataStep(
+                name="InstallPackages",
+                description="追加パッケージのインストール",
+                commands=[
+                    "if command -v yum &> /dev/null; then",
+                    f"    yum install -y {packages}",
+                    "elif command -v apt-get &> /dev/null; then",
+                    f"    apt-get install -y {packages}",
+                    "fi"
+                ],
+                requires_internet=True
+            ))
+        
+        # 軽量デスクトップとxrdp
+        if config.get('linux_desktop'):
+            steps.append(UserDataStep(
+                name="LinuxDesktop",
+                description="軽量デスクトップとxrdpのインストール",
+                commands=self._build_linux_desktop_commands(self.get_xrdp_settings(config['linux_desktop'])),
+                requires_internet=True
+            ))
+        
+        return steps
+    
+    def get_xrdp_settings(self, value) -> Dict:
+        """
+        linux_desktopの指定値を既定値と統合したxrdp設定を取得
+        
+        Args:
+            value: linux_desktopの指定値（trueの場合は既定値、辞書の場合は既定値を上書き）
+            
+        Returns:
+            Dict: xrdp設定
+        """
+        settings = dict(self.XRDP_DEFAULTS)
+        if isinstance(value, dict):
+            settings.update(value)
+        return settings
+    
+    def _build_linux_desktop_commands(self, settings: Dict) -> List[str]:
+        """
+        軽量デスクトップとxrdpのインストール・設定コマンドを生成
+        
+        UbuntuはXfce、Amazon Linux 2はMATE（amazon-linux-extras）とEPELのxrdpを使用する。
+        xrdp.iniの色深度・ビットマップキャッシュ・圧縮の設定を書き換える。
+        
+        Args:
+            settings: xrdp設定
+            
+        Returns:
+            List[str]: デスクトップ・xrdpのインストールと設定のシェルコマンド
+        """
+        def flag(name: str) -> str:
+            return 'true' if settings[name] else 'false'
+        
+        return [
+            "if command -v yum &> /dev/null; then",
+            "    if command -v amazon-linux-extras &> /dev/null; then",
+            "        amazon-linux-extras install -y mate-desktop1.x epel",
+            "        yum install -y xrdp",
+            "        echo 'PREFERRED=/usr/bin/mate-session' > /etc/sysconfig/desktop",
+            "    else",
+            "        echo 'xrdp is not available in the repositories of this distribution'",
+            "    fi",
+            "elif command -v apt-get &> /dev/null; then",
+            "    DEBIAN_FRONTEND=noninteractive apt-get install -y xfce4 dbus-x11 xrdp",
+            "    echo 'xfce4-session' > /etc/skel/.xsession",
+            "    adduser xrdp ssl-cert",
+            "fi",
+            "if [ -f /etc/xrdp/xrdp.ini ]; then",
+            f"    sed -i -E 's/^#?max_bpp=.*/max_bpp={settings['max_bpp']}/; "
+            f"s/^#?bitmap_cache=.*/bitmap_cache={flag('bitmap_cache')}/; "
+            f"s/^#?bitmap_compression=.*/bitmap_compression={flag('bitmap_compression')}/; "
+            f"s/^#?bulk_compression=.*/bulk_compression={flag('bulk_compression')}/; "
+            "s/^#?tcp_nodelay=.*/tcp_nodelay=true/' /etc/xrdp/xrdp.ini",
+            "    systemctl enable xrdp",
+            "    systemctl restart xrdp",
+            "fi"
+        ]
     
     def get_default_windows_config(self) -> Dict:
         """
@@ -294,17 +2304,20 @@ class UserDataManager:
                 'recommended_additional_config': {
                     'enable_docker': 'Docker環境のセットアップ',
                     'install_packages': '追加パッケージのインストール',
-                    'custom_commands': 'カスタムシェルコマンド'
+                    'custom_commands': 'カスタムシェルコマンド',
+                    'linux_desktop': '軽量デスクトップとxrdp（RDP接続）'
                 }
             }
     
-    def validate_additional_config(self, ami_info: AMIInfo, config: Dict) -> List[str]:
+    def validate_additional_config(self, ami_info: AMIInfo, config: Dict,
+                                   network: Optional[NetworkReachability] = None) -> List[str]:
         """
         追加設定の妥当性を検証
         
         Args:
             ami_info: AMI情報
             config: 追加設定
+            network: 起動時のインスタンスのネットワーク到達性（Noneの場合は到達可能とみなす）
             
         Returns:
             List[str]: 検証エラーメッセージのリスト（空の場合は問題なし）
@@ -348,6 +2361,81 @@ class UserDataManager:
                     if not isinstance(port, int) or port < 1 or port > 65535:
                         errors.append(f"無効なポート番号です: {port}")
         
+        if 'rdp_performance' in config:
+            errors.extend(self._validate_rdp_performance(ami_info, config['rdp_performance']))
+        
+        if 'windows_slimming' in config:
+            errors.extend(self._validate_windows_slimming(ami_info, config['windows_slimming']))
+        
+        if 'dcv' in config:
+            errors.extend(self._validate_dcv(ami_info, config['dcv'], network))
+        
+        if 'linux_desktop' in config:
+            errors.extend(self._validate_linux_desktop(ami_info, config['linux_desktop']))
+        
+        if 'boot_profile' in config:
+            if config['boot_profile'] not in self.BOOT_PROFILES:
+                errors.append(
+                    f"無効なboot_profileです: {config['boot_profile']}. "
+                    f"{', '.join(self.BOOT_PROFILES)} のいずれかを指定してください。"
+                )
+        
+        if 'full_upgrade' in config and not isinstance(config['full_upgrade'], bool):
+            errors.append("'full_upgrade' はtrueまたはfalseである必要があります。")
+        
+        if 'format' in config:
+            formats = self.WINDOWS_USER_DATA_FORMATS if ami_info.is_windows() else self.LINUX_USER_DATA_FORMATS
+            if config['format'] not in formats:
+                errors.append(
+                    f"無効なformatです: {config['format']}. "
+                    f"{', '.join(formats)} のいずれかを指定してください。"
+                )
+            elif config['format'] == 'cloud-config':
+                for key in ['boot_metrics', 'offload_to_s3']:
+                    if config.get(key):
+                        errors.append(f"'{key}' は 'format: cloud-config' と同時に指定できません。")
+            elif config['format'] == 'ec2launch-v2' and config.get('offload_to_s3'):
+                errors.append("'offload_to_s3' は 'format: ec2launch-v2' と同時に指定できません。")
+        
+        if 'enable_openssh' in config:
+            if not isinstance(config['enable_openssh'], bool):
+                errors.append("'enable_openssh' はtrueまたはfalseである必要があります。")
+            elif config['enable_openssh'] and config.get('format') != 'ec2launch-v2':
+                errors.append("'enable_openssh' は 'format: ec2launch-v2' の場合のみ指定できます。")
+        
+        if 'boot_metrics' in config and not isinstance(config['boot_metrics'], bool):
+            errors.append("'boot_metrics' はtrueまたはfalseである必要があります。")
+        
+        if 'package_acceleration' in config:
+            if not isinstance(config['package_acceleration'], bool):
+                errors.append("'package_acceleration' はtrueまたはfalseである必要があります。")
+            elif config['package_acceleration'] and ami_info.is_windows():
+                errors.append("'package_acceleration' はWindows環境ではサポートされていません。")
+        
+        if 'idempotent' in config and not isinstance(config['idempotent'], bool):
+            errors.append("'idempotent' はtrueまたはfalseである必要があります。")
+        
+        if 'instance_store' in config and not isinstance(config['instance_store'], bool):
+            errors.append("'instance_store' はtrueまたはfalseである必要があります。")
+        
+        if 'memory_tuning' in config:
+            if not isinstance(config['memory_tuning'], bool):
+                errors.append("'memory_tuning' はtrueまたはfalseである必要があります。")
+            elif config['memory_tuning'] and ami_info.is_windows():
+                errors.append("'memory_tuning' はWindows環境ではサポートされていません。")
+        
+        if 'offload_to_s3' in config:
+            if not isinstance(config['offload_to_s3'], bool):
+                errors.append("'offload_to_s3' はtrueまたはfalseである必要があります。")
+            elif config['offload_to_s3'] and config.get('compress'):
+                errors.append("'offload_to_s3' と 'compress' は同時に指定できません。")
+        
+        if 'compress' in config:
+            if not isinstance(config['compress'], bool):
+                errors.append("'compress' はtrueまたはfalseである必要があります。")
+            elif config['compress'] and ami_info.is_windows():
+                errors.append("'compress' はWindows環境ではサポートされていません。")
+        
         if 'install_packages' in config:
             if not isinstance(config['install_packages'], list):
                 errors.append("'install_packages' はリスト形式である必要があります。")
@@ -358,6 +2446,147 @@ class UserDataManager:
         
         return errors
     
+    def _validate_rdp_performance(self, ami_info: AMIInfo, value) -> List[str]:
+        """
+        rdp_performanceの妥当性を検証
+        
+        Args:
+            ami_info: AMI情報
+            value: rdp_performanceの指定値
+            
+        Returns:
+            List[str]: 検証エラーメッセージのリスト（空の場合は問題なし）
+        """
+        if not isinstance(value, (bool, dict)):
+            return ["'rdp_performance' はtrue/falseまたは辞書形式である必要があります。"]
+        if value and not ami_info.is_windows():
+            return ["'rdp_performance' はLinux環境ではサポートされていません。"]
+        if not isinstance(value, dict):
+            return []
+        
+        errors = []
+        for key, setting in value.items():
+            if key not in self.RDP_PERFORMANCE_DEFAULTS:
+                errors.append(
+                    f"rdp_performanceの無効な設定です: {key}. "
+                    f"{', '.join(self.RDP_PERFORMANCE_DEFAULTS)} のいずれかを指定してください。"
+                )
+            elif key == 'max_frame_rate':
+                if isinstance(setting, bool) or setting not in self.RDP_FRAME_INTERVALS:
+                    errors.append("rdp_performanceの 'max_frame_rate' は30または60である必要があります。")
+            elif not isinstance(setting, bool):
+                errors.append(f"rdp_performanceの '{key}' はtrueまたはfalseである必要があります。")
+        return errors
+    
+    def _validate_windows_slimming(self, ami_info: AMIInfo, value) -> List[str]:
+        """
+        windows_slimmingの妥当性を検証
+        
+        Args:
+            ami_info: AMI情報
+            value: windows_slimmingの指定値
+            
+        Returns:
+            List[str]: 検証エラーメッセージのリスト（空の場合は問題なし）
+        """
+        if not isinstance(value, (bool, dict)):
+            return ["'windows_slimming' はtrue/falseまたは辞書形式である必要があります。"]
+        if value and not ami_info.is_windows():
+            return ["'windows_slimming' はLinux環境ではサポートされていません。"]
+        if not isinstance(value, dict):
+            return []
+        
+        errors = []
+        for key, setting in value.items():
+            if key != 'memory_threshold_gib':
+                errors.append(f"windows_slimmingの無効な設定です: {key}. memory_threshold_gib を指定してください。")
+            elif isinstance(setting, bool) or not isinstance(setting, (int, float)) or setting <= 0:
+                errors.append("windows_slimmingの 'memory_threshold_gib' は正の数値である必要があります。")
+        return errors
+    
+    def _validate_dcv(self, ami_info: AMIInfo, value,
+                      network: Optional[NetworkReachability] = None) -> List[str]:
+        """
+        dcvの妥当性を検証
+        
+        DCV Serverのインストーラーはインターネットから取得するため、インターネットに到達できない
+        サブネットではインストールがスキップされ、接続先のないポート開放とポートフォワードの
+        コマンドだけが出力されてしまう。このためエラーとする。
+        
+        Args:
+            ami_info: AMI情報
+            value: dcvの指定値
+            network: 起動時のインスタンスのネットワーク到達性
+            
+        Returns:
+            List[str]: 検証エラーメッセージのリスト（空の場合は問題なし）
+        """
+        if not isinstance(value, (bool, dict)):
+            return ["'dcv' はtrue/falseまたは辞書形式である必要があります。"]
+        if value and not ami_info.is_windows():
+            return ["'dcv' はLinux環境ではサポートされていません。"]
+        if value and self.instance is not None and not self.instance.gpu:
+            return [f"'dcv' はGPU搭載インスタンスタイプでのみ指定できます: {self.instance.instance_type}"]
+        if value and network is not None and not network.can_reach_package_repositories():
+            return [
+                f"'dcv' はインターネットに到達できないサブネット（{network.subnet_type}）ではインストールできません。"
+                "subnet-type: public を指定するか、DCV Serverをインストール済みのAMIを使用してください。"
+            ]
+        if not isinstance(value, dict):
+            return []
+        
+        errors = []
+        for key, setting in value.items():
+            if key not in self.DCV_DEFAULTS:
+                errors.append(
+                    f"dcvの無効な設定です: {key}. {', '.join(self.DCV_DEFAULTS)} のいずれかを指定してください。"
+                )
+            elif key == 'port':
+                if isinstance(setting, bool) or not isinstance(setting, int) or not 1024 <= setting <= 65535:
+                    errors.append("dcvの 'port' は1024〜65535の整数である必要があります。")
+                elif setting == 3389:
+                    errors.append("dcvの 'port' にRDPのポート（3389）は指定できません。")
+            elif not isinstance(setting, bool):
+                errors.append(f"dcvの '{key}' はtrueまたはfalseである必要があります。")
+        return errors
+    
+    def _validate_linux_desktop(self, ami_info: AMIInfo, value) -> List[str]:
+        """
+        linux_desktopの妥当性を検証
+        
+        Args:
+            ami_info: AMI情報
+            value: linux_desktopの指定値
+            
+        Returns:
+            List[str]: 検証エラーメッセージのリスト（空の場合は問題なし）
+        """
+        if not isinstance(value, (bool, dict)):
+            return ["'linux_desktop' はtrue/falseまたは辞書形式である必要があります。"]
+        if value and ami_info.is_windows():
+            return ["'linux_desktop' はWindows環境ではサポートされていません。"]
+        if value and ami_info.distro == LinuxDistro.AMAZON_LINUX_2023:
+            return ["'linux_desktop' はAmazon Linux 2023ではサポートされていません（xrdpがリポジトリにありません）。"]
+        if not isinstance(value, dict):
+            return []
+        
+        errors = []
+        for key, setting in value.items():
+            if key not in self.XRDP_DEFAULTS:
+                errors.append(
+                    f"linux_desktopの無効な設定です: {key}. "
+                    f"{', '.join(self.XRDP_DEFAULTS)} のいずれかを指定してください。"
+                )
+            elif key == 'max_bpp':
+                if isinstance(setting, bool) or setting not in self.XRDP_COLOR_DEPTHS:
+                    errors.append(
+                        "linux_desktopの 'max_bpp' は "
+                        f"{', '.join(str(depth) for depth in self.XRDP_COLOR_DEPTHS)} のいずれかである必要があります。"
+                    )
+            elif not isinstance(setting, bool):
+                errors.append(f"linux_desktopの '{key}' はtrueまたはfalseである必要があります。")
+        return errors
+    
     def get_supported_configurations(self, ami_info: AMIInfo) -> Dict:
         """
         サポートされる設定オプションを取得
@@ -373,6 +2602,33 @@ class UserDataManager:
                 'type': 'list[str]',
                 'description': 'カスタムコマンドのリスト',
                 'example': ['echo "Hello World"']
+            },
+            'boot_profile': {
+                'type': 'str',
+                'description': '起動プロファイル（fast-boot: SSM Agent・RDPを最優先し、その他はバックグラウンド実行）',
+                'default': 'standard'
+            },
+            'boot_metrics': {
+                'type': 'bool',
+                'description': 'フェーズごとの所要時間をCloudWatchカスタムメトリクスとして送信',
+                'default': False
+            },
+            'idempotent': {
+                'type': 'bool',
+                'description': '内容ハッシュのマーカーファイルで各ステップを保護し、再実行時は変更されたステップのみ実行',
+                'default': True
+            },
+            'instance_store': {
+                'type': 'bool',
+                'description': 'ローカルNVMeインスタンスストアを持つインスタンスタイプでディスクを初期化して一時領域に使用'
+                               '（Linux: /mnt/instance-store、Windows: T:ドライブにTEMP/TMPとページファイル）',
+                'default': True
+            },
+            'offload_to_s3': {
+                'type': 'bool',
+                'description': 'スクリプトをS3アセットに退避し、ユーザーデータはダウンロード・検証・実行のみにする'
+                               '（未指定時はcustom_commandsのサイズで自動判定）',
+                'default': None
             }
         }
         
@@ -387,6 +2643,34 @@ class UserDataManager:
                     'type': 'list[int]',
                     'description': 'ファイアウォールで開放するポート',
                     'example': [80, 443, 8080]
+                },
+                'format': {
+                    'type': 'str',
+                    'description': 'ユーザーデータの形式（powershell / ec2launch-v2: EC2Launch v2のYAMLタスクドキュメント）',
+                    'default': 'powershell'
+                },
+                'enable_openssh': {
+                    'type': 'bool',
+                    'description': 'EC2Launch v2のenableOpenSshタスクでOpenSSHサーバーを有効化（ec2launch-v2形式のみ）',
+                    'default': False
+                },
+                'rdp_performance': {
+                    'type': 'bool | dict',
+                    'description': 'RDPセッションのパフォーマンス設定（trueで既定値、辞書で個別に指定）',
+                    'default': False,
+                    'example': {'udp_transport': False, 'max_frame_rate': 30}
+                },
+                'windows_slimming': {
+                    'type': 'bool | dict',
+                    'description': 'メモリ量がしきい値未満のインスタンスタイプで不要なサービス等を無効化して軽量化',
+                    'default': False,
+                    'example': {'memory_threshold_gib': 8}
+                },
+                'dcv': {
+                    'type': 'bool | dict',
+                    'description': 'GPU搭載インスタンスタイプでNICE DCVサーバーをインストール（EICE経由のポートフォワードで接続）',
+                    'default': False,
+                    'example': {'port': 8443, 'quic': True}
                 }
             })
         else:
@@ -400,6 +2684,37 @@ class UserDataManager:
                     'type': 'list[str]',
                     'description': 'インストールする追加パッケージ',
                     'example': ['git', 'nodejs', 'python3']
+                },
+                'full_upgrade': {
+                    'type': 'bool',
+                    'description': 'fast-bootプロファイルでフルアップグレードを実行',
+                    'default': False
+                },
+                'package_acceleration': {
+                    'type': 'bool',
+                    'description': 'パッケージマネージャーを高速化設定し、パッケージを1回のトランザクションでインストール',
+                    'default': False
+                },
+                'linux_desktop': {
+                    'type': 'bool | dict',
+                    'description': '軽量デスクトップとxrdpをインストールし、RDPで接続できるようにする（Amazon Linux 2023は非対応）',
+                    'default': False,
+                    'example': {'max_bpp': 16, 'bulk_compression': True}
+                },
+                'memory_tuning': {
+                    'type': 'bool',
+                    'description': 'メモリ量に応じたzramスワップ・vm.swappinessと、トンネル向けTCPバッファの設定',
+                    'default': False
+                },
+                'format': {
+                    'type': 'str',
+                    'description': 'ユーザーデータの形式（shell: bashスクリプト / cloud-config: cloud-initの宣言的設定）',
+                    'default': 'shell'
+                },
+                'compress': {
+                    'type': 'bool',
+                    'description': 'cloud-init用マルチパートMIMEとしてgzip圧縮したユーザーデータを使用',
+                    'default': False
                 }
             })
         
@@ -0,0 +1,54 @@
+"""
+AMICatalogのユニットテスト
+"""
+import json
+from ssm_ec2_rdp.ami_catalog import AMICatalog
+
+
+class TestAMICatalog:
+    """AMICatalogクラスのテスト"""
+    
+    def test_missing_file_is_empty(self, tmp_path):
+        """カタログファイルが存在しない場合は空のカタログになることのテスト"""
+        catalog = AMICatalog(str(tmp_path / "ami-catalog.json"))
+        
+        assert catalog.entries == {}
+        assert catalog.get_region_map("ami-0123456789abcdef0") == {}
+        assert catalog.lookup("ami-0123456789abcdef0", "us-east-1") is None
+    
+    def test_record_and_save(self, tmp_path):
+        """コピー結果の記録と保存・再読み込みのテスト"""
+        path = str(tmp_path / "ami-catalog.json")
+        catalog = AMICatalog(path)
+        
+        catalog.record_copy("ami-0123456789abcdef0", "ap-northeast-1", "us-east-1", "ami-0fedcba9876543210")
+        catalog.save()
+        
+        reloaded = AMICatalog(path)
+        assert reloaded.lookup("ami-0123456789abcdef0", "us-east-1") == "ami-0fedcba9876543210"
+        assert reloaded.get_region_map("ami-0123456789abcdef0") == {
+            "ap-northeast-1": "ami-0123456789abcdef0",
+            "us-east-1": "ami-0fedcba9876543210"
+        }
+        with open(path, encoding="utf-8") as f:
+            assert "copies" in json.load(f)["ami-0123456789abcdef0"]
+    
+    def test_pending_copies(self, tmp_path):
+        """利用可能になっていないコピーはマッピングから除外し、記録済みとして扱うテスト"""
+        path = str(tmp_path / "ami-catalog.json")
+        catalog = AMICatalog(path)
+        
+        catalog.record_copy(
+            "ami-0123456789abcdef0", "ap-northeast-1", "us-east-1", "ami-0fedcba9876543210", pending=True
+        )
+        catalog.save()
+        
+        reloaded = AMICatalog(path)
+        assert reloaded.get_region_map("ami-0123456789abcdef0") == {"ap-northeast-1": "ami-0123456789abcdef0"}
+        assert reloaded.get_pending_copies("ami-0123456789abcdef0") == {"us-east-1": "ami-0fedcba9876543210"}
+        assert reloaded.lookup("ami-0123456789abcdef0", "us-east-1") == "ami-0fedcba9876543210"
+        
+        reloaded.record_copy("ami-0123456789abcdef0", "ap-northeast-1", "us-east-1", "ami-0fedcba9876543210")
+        assert reloaded.get_pending_copies("ami-0123456789abcdef0") == {}
+        assert "pending" not in reloaded.entries["ami-0123456789abcdef0"]
+        assert reloaded.get_region_map("ami-0123456789abcdef0")["us-east-1"] == "ami-0fedcba9876543210"
@@ -0,0 +1,93 @@
+"""
+AMICopyManagerのユニットテスト
+"""
+import os
+import pytest
+from ssm_ec2_rdp.ami_catalog import AMICatalog
+from ssm_ec2_rdp.ami_copy_manager import AMICopyManager, StubAMICopyClient, main
+from ssm_ec2_rdp.types import AMIConfiguration, InvalidValueError
+
+
+class TestAMICopyManager:
+    """AMICopyManagerクラスのテスト"""
+    
+    def setup_method(self):
+        """各テストメソッドの前に実行される初期化処理"""
+        self.client = StubAMICopyClient()
+    
+    def test_copy_to_regions(self, tmp_path):
+        """対象リージョンへのコピーとカタログ記録のテスト"""
+        path = str(tmp_path / "ami-catalog.json")
+        manager = AMICopyManager(AMICatalog(path), self.client)
+        
+        region_map = manager.copy_to_regions(
+            "ami-0123456789abcdef0", "ap-northeast-1", ["us-east-1", "us-west-2"]
+        )
+        
+        assert set(region_map) == {"ap-northeast-1", "us-east-1", "us-west-2"}
+        assert region_map["ap-northeast-1"] == "ami-0123456789abcdef0"
+        assert len(self.client.calls) == 2
+        # スタブが生成したAMI IDは有効な形式
+        assert all(AMIConfiguration._is_valid_ami_id(ami_id) for ami_id in region_map.values())
+        # カタログファイルに保存されている
+        assert AMICatalog(path).get_region_map("ami-0123456789abcdef0") == region_map
+    
+    def test_copy_skips_recorded_and_source_regions(self, tmp_path):
+        """記録済みリージョンとコピー元リージョンはコピーしないことのテスト"""
+        catalog = AMICatalog(str(tmp_path / "ami-catalog.json"))
+        catalog.record_copy("ami-0123456789abcdef0", "ap-northeast-1", "us-east-1", "ami-0fedcba9876543210")
+        manager = AMICopyManager(catalog, self.client)
+        
+        region_map = manager.copy_to_regions(
+            "ami-0123456789abcdef0", "ap-northeast-1", ["ap-northeast-1", "us-east-1"]
+        )
+        
+        assert self.client.calls == []
+        assert region_map["us-east-1"] == "ami-0fedcba9876543210"
+    
+    def test_copy_invalid_input(self, tmp_path):
+        """無効なAMI ID・リージョン名のエラーテスト"""
+        manager = AMICopyManager(AMICatalog(str(tmp_path / "ami-catalog.json")), self.client)
+        
+        with pytest.raises(InvalidValueError):
+            manager.copy_to_regions("invalid-ami", "ap-northeast-1", ["us-east-1"])
+        
+        with pytest.raises(InvalidValueError):
+            manager.copy_to_regions("ami-0123456789abcdef0", "ap-northeast-1", ["tokyo"])
+    
+    def test_main_with_stub(self, tmp_path, capsys):
+        """スタブクライアントでのコマンドライン実行テスト"""
+        path = str(tmp_path / "ami-catalog.json")
+        
+        exit_code = main([
+            "--ami-id", "ami-0123456789abcdef0",
+            "--source-region", "ap-northeast-1",
+            "--target-regions", "us-east-1",
+            "--catalog", path,
+            "--stub"
+        ])
+        
+        assert exit_code == 0
+        assert "us-east-1: ami-" in capsys.readouterr().out
+        # スタブのAMI IDはスタックが参照するカタログに保存しない
+        assert not os.path.exists(path)
+    
+    def test_copy_records_pending_until_available(self, tmp_path):
+        """利用可能になる前のコピーをpendingとして記録し、再実行時に利用可能なら解除するテスト"""
+        path = str(tmp_path / "ami-catalog.json")
+        self.client.is_image_available = lambda ami_id, region: False
+        manager = AMICopyManager(AMICatalog(path), self.client)
+        
+        region_map = manager.copy_to_regions("ami-0123456789abcdef0", "ap-northeast-1", ["us-east-1"])
+        
+        assert region_map == {"ap-northeast-1": "ami-0123456789abcdef0"}
+        assert set(AMICatalog(path).get_pending_copies("ami-0123456789abcdef0")) == {"us-east-1"}
+        
+        self.client.is_image_available = lambda ami_id, region: True
+        manager = AMICopyManager(AMICatalog(path), self.client)
+        region_map = manager.copy_to_regions("ami-0123456789abcdef0", "ap-northeast-1", ["us-east-1"])
+        
+        # 再実行時はコピーし直さず、pendingのみ解除する
+        assert len(self.client.calls) == 1
+        assert "us-east-1" in region_map
+        assert AMICatalog(path).get_pending_copies("ami-0123456789abcdef0") == {}
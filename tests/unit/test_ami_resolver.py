@@ -4,10 +4,12 @@ AMIResolverのユニットテスト
 import pytest
 from unittest.mock import Mock, patch
 from aws_cdk import Stack, App, aws_ec2 as ec2
+import aws_cdk.assertions as assertions
 from ssm_ec2_rdp.ami_resolver import AMIResolver
 from ssm_ec2_rdp.types import (
     AMIConfiguration,
     AMIInfo,
+    LinuxDistro,
     OSType,
     AMINotFoundError
 )
@@ -113,6 +115,30 @@ class TestAMIResolver:
             os_type = self.resolver._detect_os_from_parameter(parameter)
             assert os_type == OSType.UNKNOWN, f"Failed for: {parameter}"
     
+    def test_detect_distro_from_parameter(self):
+        """SSMパラメータパスからのディストリビューション検出テスト"""
+        test_cases = {
+            "/aws/service/ami-amazon-linux-latest/al2023-ami-kernel-default-x86_64": LinuxDistro.AMAZON_LINUX_2023,
+            "/aws/service/ami-amazon-linux-latest/amzn2-ami-hvm-x86_64-gp2": LinuxDistro.AMAZON_LINUX_2,
+            "/aws/service/canonical/ubuntu/server/22.04/stable/current/amd64/hvm/ebs-gp2/ami-id": LinuxDistro.UBUNTU,
+            "/aws/service/ami-windows-latest/Windows_Server-2022-Japanese-Full-Base": LinuxDistro.UNKNOWN,
+            "/custom/linux-ami": LinuxDistro.UNKNOWN
+        }
+        
+        for parameter, expected in test_cases.items():
+            assert self.resolver._detect_distro_from_parameter(parameter) == expected, f"Failed for: {parameter}"
+    
+    def test_get_ami_info_only_sets_distro(self):
+        """AMI情報にディストリビューションが設定されることのテスト"""
+        ami_config = AMIConfiguration(
+            ami_parameter="/aws/service/ami-amazon-linux-latest/al2023-ami-kernel-default-x86_64"
+        )
+        
+        ami_info = self.resolver.get_ami_info_only(ami_config)
+        
+        assert ami_info.distro == LinuxDistro.AMAZON_LINUX_2023
+        assert ami_info.is_amazon_linux() is True
+    
     def test_detect_os_from_ami_id(self):
         """AMI IDからのOS検出テスト（常にUNKNOWNを返す）"""
         ami_id = "ami-0123456789abcdef0"
@@ -155,6 +181,116 @@ class TestAMIResolver:
         
         assert "AMI設定が指定されていません" in str(exc_info.value)
     
+    def test_get_image_id_ami_id(self):
+        """AMI ID指定時のImageId取得テスト"""
+        ami_config = AMIConfiguration(ami_id="ami-0123456789abcdef0")
+        
+        assert self.resolver.get_image_id(ami_config) == "ami-0123456789abcdef0"
+    
+    def test_get_image_id_ssm_parameter(self):
+        """SSMパラメータ指定時は動的参照を返すテスト"""
+        ami_config = AMIConfiguration(
+            ami_parameter="/aws/service/ami-windows-latest/Windows_Server-2022-Japanese-Full-Base"
+        )
+        
+        image_id = self.resolver.get_image_id(ami_config)
+        
+        assert image_id == (
+            "{{resolve:ssm:/aws/service/ami-windows-latest/Windows_Server-2022-Japanese-Full-Base}}"
+        )
+    
+    def test_get_image_id_region_map(self):
+        """リージョン別AMIマッピング指定時はCfnMappingとFn::FindInMapを生成するテスト"""
+        ami_config = AMIConfiguration(ami_region_map={
+            "ap-northeast-1": "ami-0123456789abcdef0",
+            "us-east-1": "ami-0fedcba9876543210"
+        })
+        
+        image_id = self.resolver.get_image_id(ami_config)
+        # 複数回呼び出してもCfnMappingは1つだけ
+        self.resolver.get_image_id(ami_config)
+        
+        resolved = self.stack.resolve(image_id)
+        assert resolved == {"Fn::FindInMap": ["AmiRegionMap", {"Ref": "AWS::Region"}, "ami"]}
+        
+        template = assertions.Template.from_stack(self.stack)
+        assert len(template.find_mappings("*")) == 1
+        template.has_mapping("AmiRegionMap", {
+            "ap-northeast-1": {"ami": "ami-0123456789abcdef0"},
+            "us-east-1": {"ami": "ami-0fedcba9876543210"}
+        })
+    
+    def test_get_image_id_with_ami_catalog(self, tmp_path):
+        """AMIカタログにコピーが記録されている場合はマッピングを使用するテスト"""
+        from ssm_ec2_rdp.ami_catalog import AMICatalog
+        path = str(tmp_path / "ami-catalog.json")
+        catalog = AMICatalog(path)
+        catalog.record_copy("ami-0123456789abcdef0", "ap-northeast-1", "us-east-1", "ami-0fedcba9876543210")
+        catalog.save()
+        
+        ami_config = AMIConfiguration(ami_id="ami-0123456789abcdef0", ami_catalog=path)
+        image_id = self.resolver.get_image_id(ami_config)
+        
+        assert self.stack.resolve(image_id) == {
+            "Fn::FindInMap": ["AmiRegionMap", {"Ref": "AWS::Region"}, "ami"]
+        }
+        assertions.Template.from_stack(self.stack).has_mapping("AmiRegionMap", {
+            "ap-northeast-1": {"ami": "ami-0123456789abcdef0"},
+            "us-east-1": {"ami": "ami-0fedcba9876543210"}
+        })
+    
+    def test_get_image_id_ignores_pending_copies(self, tmp_path):
+        """利用可能になっていないコピーはマッピングに含めないテスト"""
+        from ssm_ec2_rdp.ami_catalog import AMICatalog
+        path = str(tmp_path / "ami-catalog.json")
+        catalog = AMICatalog(path)
+        catalog.record_copy("ami-0123456789abcdef0", "ap-northeast-1", "us-east-1", "ami-0fedcba9876543210")
+        catalog.record_copy(
+            "ami-0123456789abcdef0", "ap-northeast-1", "us-west-2", "ami-0123456789fedcba0", pending=True
+        )
+        catalog.save()
+        
+        ami_config = AMIConfiguration(ami_id="ami-0123456789abcdef0", ami_catalog=path)
+        self.resolver.get_image_id(ami_config)
+        
+        assertions.Template.from_stack(self.stack).has_mapping("AmiRegionMap", {
+            "ap-northeast-1": {"ami": "ami-0123456789abcdef0"},
+            "us-east-1": {"ami": "ami-0fedcba9876543210"}
+        })
+        assert "us-west-2" not in assertions.Template.from_stack(self.stack).to_json()["Mappings"]["AmiRegionMap"]
+        assertions.Annotations.from_stack(self.stack).has_warning(
+            "*", assertions.Match.string_like_regexp("us-west-2")
+        )
+    
+    def test_get_image_id_with_empty_ami_catalog(self, tmp_path):
+        """AMIカタログに記録がない場合はAMI IDをそのまま使用するテスト"""
+        ami_config = AMIConfiguration(
+            ami_id="ami-0123456789abcdef0",
+            ami_catalog=str(tmp_path / "ami-catalog.json")
+        )
+        
+        assert self.resolver.get_image_id(ami_config) == "ami-0123456789abcdef0"
+    
+    def test_resolve_ami_by_region_map(self):
+        """リージョン別AMIマッピングでの解決テスト"""
+        ami_config = AMIConfiguration(ami_region_map={"us-east-1": "ami-0fedcba9876543210"})
+        
+        machine_image, ami_info = self.resolver.resolve_ami(ami_config)
+        
+        assert machine_image is not None
+        assert ami_info.os_type == OSType.UNKNOWN
+        assert "Region AMI Map" in ami_info.description
+        assert "us-east-1" in ami_info.description
+    
+    def test_get_image_id_no_config(self):
+        """設定なしでのImageId取得エラーテスト"""
+        ami_config = AMIConfiguration.__new__(AMIConfiguration)
+        ami_config.ami_id = None
+        ami_config.ami_parameter = None
+        
+        with pytest.raises(AMINotFoundError):
+            self.resolver.get_image_id(ami_config)
+    
     def test_is_windows_ami_true(self):
         """Windows AMI判定（True）のテスト"""
         ami_config = AMIConfiguration(
@@ -0,0 +1,150 @@
+"""
+起動タイムライン解析ツールのユニットテスト
+"""
+import json
+import pytest
+from ssm_ec2_rdp.boot_timeline import (
+    BOOT_TOTAL, INSTALL_TOTAL, add_boot_total, add_install_total, compare, main, parse_timeline, percentile,
+    summarize
+)
+
+
+class TestBootTimeline:
+    """起動タイムライン解析のテスト"""
+    
+    def test_parse_timeline(self):
+        """終了イベントから所要時間を取り出すテスト"""
+        lines = [
+            '{"phase":"SystemUpdate","event":"start","timestamp_ms":1000}',
+            '{"phase":"SystemUpdate","event":"end","timestamp_ms":5000,"duration_ms":4000}',
+            'not json',
+            '',
+            '{"phase":"SsmAgent","event":"end","timestamp_ms":6000,"duration_ms":1000}'
+        ]
+        
+        durations = parse_timeline(lines)
+        
+        assert durations == {"SystemUpdate": [4000], "SsmAgent": [1000]}
+    
+    def test_percentile(self):
+        """線形補間によるパーセンタイル算出のテスト"""
+        values = [10, 20, 30, 40, 50]
+        
+        assert percentile(values, 50) == 30
+        assert percentile(values, 0) == 10
+        assert percentile(values, 100) == 50
+        assert percentile(values, 90) == pytest.approx(46)
+        assert percentile([7], 99) == 7
+    
+    def test_percentile_empty(self):
+        """空のリストでのエラーテスト"""
+        with pytest.raises(ValueError):
+            percentile([], 50)
+    
+    def test_summarize(self):
+        """フェーズごとの集計テスト"""
+        summary = summarize({"SystemUpdate": [100, 300, 200]})
+        
+        assert summary["SystemUpdate"]["count"] == 3
+        assert summary["SystemUpdate"]["p50"] == 200
+        assert set(summary["SystemUpdate"]) == {"count", "p50", "p90", "p99"}
+    
+    def test_main_aggregates_hosts(self, tmp_path, capsys):
+        """複数ホストのログを集計するコマンドライン実行テスト"""
+        paths = []
+        for i, duration in enumerate([1000, 2000, 3000]):
+            path = tmp_path / f"host{i}.log"
+            path.write_text(
+                json.dumps({"phase": "SsmAgent", "event": "end", "timestamp_ms": 0, "duration_ms": duration}) + "\n",
+                encoding="utf-8"
+            )
+            paths.append(str(path))
+        
+        exit_code = main(paths + ["--json"])
+        
+        assert exit_code == 0
+        summary = json.loads(capsys.readouterr().out)
+        assert summary["SsmAgent"]["count"] == 3
+        assert summary["SsmAgent"]["p50"] == 2000
+    
+    def test_add_install_total(self):
+        """パッケージインストールフェーズの合計を追加するテスト"""
+        durations = {"SystemUpdate": [4000], "BasicTools": [1000], "SsmAgent": [500]}
+        
+        result = add_install_total(durations)
+        
+        assert result[INSTALL_TOTAL] == [5000]
+        assert INSTALL_TOTAL not in add_install_total({"SsmAgent": [500]})
+    
+    def test_add_boot_total(self):
+        """バックグラウンドのフェーズを除いた全フェーズの合計を追加するテスト"""
+        durations = {"SystemUpdate": [4000], "SsmAgent": [500], "DeferredPackages": [9000]}
+        
+        result = add_boot_total(durations)
+        
+        assert result[BOOT_TOTAL] == [4500]
+        assert BOOT_TOTAL not in add_boot_total({})
+    
+    def test_main_compare_baked_with_standard(self, tmp_path, capsys):
+        """フェーズ構成が異なる焼き込みモードと通常モードを合計で比較できることのテスト"""
+        def write(name, records):
+            path = tmp_path / name
+            path.write_text("".join(
+                json.dumps({"phase": phase, "event": "end", "timestamp_ms": 0, "duration_ms": duration}) + "\n"
+                for phase, duration in records
+            ), encoding="utf-8")
+            return str(path)
+        
+        standard = write("standard.log", [("SystemUpdate", 6000), ("SsmAgent", 1500), ("BasicTools", 2000),
+                                          ("Completion", 500)])
+        baked = write("baked.log", [("SsmAgent", 400), ("Completion", 100)])
+        
+        exit_code = main([baked, "--baseline", standard, "--json"])
+        
+        assert exit_code == 0
+        result = json.loads(capsys.readouterr().out)
+        assert result[BOOT_TOTAL] == {"baseline": 10000, "candidate": 500, "speedup": 20.0}
+        assert result["SsmAgent"]["speedup"] == 3.75
+        assert INSTALL_TOTAL not in result
+    
+    def test_compare(self):
+        """ベースラインとの比較で共通フェーズの短縮率を算出するテスト"""
+        baseline = {INSTALL_TOTAL: [9000, 10000, 11000], "SsmAgent": [1000], "BasicTools": [3000]}
+        candidate = {INSTALL_TOTAL: [4000, 5000, 6000], "SsmAgent": [1000], "Packages": [2000]}
+        
+        result = compare(baseline, candidate)
+        
+        assert set(result) == {INSTALL_TOTAL, "SsmAgent"}
+        assert result[INSTALL_TOTAL]["baseline"] == 10000
+        assert result[INSTALL_TOTAL]["candidate"] == 5000
+        assert result[INSTALL_TOTAL]["speedup"] == 2.0
+        assert result["SsmAgent"]["speedup"] == 1.0
+    
+    def test_main_compare_with_baseline(self, tmp_path, capsys):
+        """--baseline指定時にインストールフェーズ合計の短縮率を出力するテスト"""
+        def write(name, records):
+            path = tmp_path / name
+            path.write_text("".join(
+                json.dumps({"phase": phase, "event": "end", "timestamp_ms": 0, "duration_ms": duration}) + "\n"
+                for phase, duration in records
+            ), encoding="utf-8")
+            return str(path)
+        
+        baseline = write("standard.log", [("SystemUpdate", 6000), ("BasicTools", 2000), ("InstallPackages", 2000)])
+        candidate = write("accelerated.log", [("PackageManagerConfig", 100), ("SystemUpdate", 3000),
+                                              ("Packages", 1900)])
+        
+        exit_code = main([candidate, "--baseline", baseline, "--json"])
+        
+        assert exit_code == 0
+        result = json.loads(capsys.readouterr().out)
+        assert result[INSTALL_TOTAL]["baseline"] == 10000
+        assert result[INSTALL_TOTAL]["candidate"] == 5000
+        assert result[INSTALL_TOTAL]["speedup"] == 2.0
+    
+    def test_main_no_phases(self, tmp_path, capsys):
+        """集計対象がない場合のエラーテスト"""
+        path = tmp_path / "empty.log"
+        path.write_text("", encoding="utf-8")
+        
+        assert main([str(path)]) == 1
@@ -211,6 +211,21 @@ class TestConfigurationManager:
         assert is_complete is True
         assert missing_keys == []
     
+    def test_validate_context_completeness_ami_region_map(self):
+        """ami-region-mapのみのAMI設定での完全性チェックテスト"""
+        # モックの設定（AMI設定はリージョン別マップのみ）
+        def mock_has_context_value(key):
+            return key in ['instance-type', 'ami-region-map']
+        
+        self.manager.has_context_value = Mock(side_effect=mock_has_context_value)
+        
+        # テスト実行
+        is_complete, missing_keys = self.manager.validate_context_completeness()
+        
+        # 検証
+        assert is_complete is True
+        assert missing_keys == []
+    
     def test_validate_context_completeness_missing_instance_type(self):
         """インスタンスタイプ不足での完全性チェックテスト"""
         # モックの設定（インスタンスタイプなし）
@@ -239,7 +254,7 @@ class TestConfigurationManager:
         
         # 検証
         assert is_complete is False
-        assert 'ami-id または ami-parameter' in missing_keys
+        assert 'ami-id、ami-parameter または ami-region-map' in missing_keys
     
     def test_validate_context_completeness_missing_all(self):
         """全設定不足での完全性チェックテスト"""
@@ -252,7 +267,7 @@ class TestConfigurationManager:
         # 検証
         assert is_complete is False
         assert 'instance-type' in missing_keys
-        assert 'ami-id または ami-parameter' in missing_keys
+        assert 'ami-id、ami-parameter または ami-region-map' in missing_keys
         assert len(missing_keys) == 2
     
     def test_print_help(self, capsys):
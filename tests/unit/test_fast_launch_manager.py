@@ -0,0 +1,84 @@
+"""
+FastLaunchManagerのユニットテスト
+"""
+import pytest
+from aws_cdk import Stack, App
+import aws_cdk.assertions as assertions
+from ssm_ec2_rdp.fast_launch_manager import FastLaunchManager
+from ssm_ec2_rdp.types import AMIConfiguration, AMIInfo, OSType, InvalidValueError
+
+
+class TestFastLaunchManager:
+    """FastLaunchManagerクラスのテスト"""
+    
+    def setup_method(self):
+        """各テストメソッドの前に実行される初期化処理"""
+        self.app = App()
+        self.stack = Stack(self.app, "TestStack")
+        self.manager = FastLaunchManager(self.stack)
+    
+    def test_initialization(self):
+        """初期化のテスト"""
+        assert self.manager.stack is self.stack
+    
+    PARAMETER = "/aws/service/ami-windows-latest/Windows_Server-2022-Japanese-Full-Base"
+    
+    def test_validate_fast_launch_windows(self):
+        """Windows AMIでは検証が成功することのテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        self.manager.validate_fast_launch(ami_info, AMIConfiguration(ami_parameter=self.PARAMETER, image_baking=True))
+    
+    def test_validate_fast_launch_requires_image_baking(self):
+        """AWS公式AMIを直接対象にできないよう、ami-parameterでimage-bakingなしではエラーになることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        with pytest.raises(InvalidValueError) as exc_info:
+            self.manager.validate_fast_launch(ami_info, AMIConfiguration(ami_parameter=self.PARAMETER))
+        
+        assert "image-baking" in str(exc_info.value)
+    
+    @pytest.mark.parametrize("os_type", [OSType.WINDOWS, OSType.UNKNOWN])
+    def test_validate_fast_launch_custom_ami(self, os_type):
+        """ami-idで指定したカスタムAMIはimage-bakingなしで検証が成功することのテスト"""
+        ami_info = AMIInfo(ami_id="ami-0123456789abcdef0", os_type=os_type, description="Custom AMI")
+        
+        self.manager.validate_fast_launch(ami_info, AMIConfiguration(ami_id="ami-0123456789abcdef0"))
+    
+    @pytest.mark.parametrize("os_type", [OSType.LINUX, OSType.UNKNOWN])
+    def test_validate_fast_launch_non_windows(self, os_type):
+        """Windows以外（判定不可を含む）のAMIではエラーになることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=os_type, description="Test AMI")
+        
+        with pytest.raises(InvalidValueError) as exc_info:
+            self.manager.validate_fast_launch(ami_info, AMIConfiguration(ami_parameter="/test/ami", image_baking=True))
+        
+        assert "Windows AMIでのみ使用できます" in str(exc_info.value)
+    
+    def test_validate_fast_launch_linux_custom_ami(self):
+        """Linuxと判定されたカスタムAMIではエラーになることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-0123456789abcdef0", os_type=OSType.LINUX, description="Amazon Linux")
+        
+        with pytest.raises(InvalidValueError):
+            self.manager.validate_fast_launch(ami_info, AMIConfiguration(ami_id="ami-0123456789abcdef0"))
+    
+    def test_enable_fast_launch(self):
+        """Fast Launch有効化カスタムリソースの作成テスト"""
+        self.manager.enable_fast_launch(
+            "ami-0123456789abcdef0",
+            instance_type="t3.medium",
+            subnet_id="subnet-12345678",
+            security_group_id="sg-12345678",
+            snapshot_count=10,
+            max_parallel_launches=8
+        )
+        template = assertions.Template.from_stack(self.stack)
+        
+        template.has_resource_properties("AWS::EC2::LaunchTemplate", {
+            "LaunchTemplateData": {"InstanceType": "t3.medium"}
+        })
+        custom = template.find_resources("Custom::AWS")
+        assert len(custom) == 1
+        create = str(list(custom.values())[0]["Properties"]["Create"])
+        assert "enableFastLaunch" in create
+        assert "TargetResourceCount" in create
@@ -0,0 +1,118 @@
+"""
+ImageBuilderManagerのユニットテスト
+"""
+import json
+import pytest
+from aws_cdk import Stack, App
+import aws_cdk.assertions as assertions
+from ssm_ec2_rdp.image_builder_manager import ImageBuilderManager
+from ssm_ec2_rdp.user_data_manager import UserDataManager
+from ssm_ec2_rdp.types import AMIInfo, OSType
+
+
+class TestImageBuilderManager:
+    """ImageBuilderManagerクラスのテスト"""
+    
+    def setup_method(self):
+        """各テストメソッドの前に実行される初期化処理"""
+        self.app = App()
+        self.stack = Stack(self.app, "TestStack")
+        self.manager = ImageBuilderManager(self.stack)
+        self.user_data_manager = UserDataManager()
+        self.linux_ami = AMIInfo(
+            ami_id="ami-0123456789abcdef0",
+            os_type=OSType.LINUX,
+            description="Amazon Linux 2023"
+        )
+        self.windows_ami = AMIInfo(
+            ami_id="ami-0123456789abcdef0",
+            os_type=OSType.WINDOWS,
+            description="Windows Server 2022"
+        )
+    
+    def test_initialization(self):
+        """初期化のテスト"""
+        assert self.manager.stack is self.stack
+    
+    def test_build_component_document_linux(self):
+        """Linux用コンポーネントドキュメントがユーザーデータと同じステップから生成されるテスト"""
+        steps = self.user_data_manager.get_setup_steps(self.linux_ami)
+        
+        document = json.loads(self.manager.build_component_document(self.linux_ami, steps))
+        
+        build_steps = document["phases"][0]["steps"]
+        assert [step["name"] for step in build_steps] == [step.name for step in steps]
+        assert all(step["action"] == "ExecuteBash" for step in build_steps)
+        assert build_steps[0]["inputs"]["commands"] == steps[0].commands
+    
+    def test_build_component_document_windows(self):
+        """Windows用コンポーネントドキュメントのテスト"""
+        steps = self.user_data_manager.get_setup_steps(self.windows_ami)
+        
+        document = json.loads(self.manager.build_component_document(self.windows_ami, steps))
+        
+        assert all(step["action"] == "ExecutePowerShell" for step in document["phases"][0]["steps"])
+    
+    def test_create_golden_image(self):
+        """Image Builderリソース一式の作成テスト"""
+        steps = self.user_data_manager.get_setup_steps(self.windows_ami)
+        
+        image = self.manager.create_golden_image(
+            self.windows_ami, steps,
+            parent_image="ami-0123456789abcdef0",
+            instance_type="t3.medium",
+            subnet_id="subnet-12345678",
+            security_group_id="sg-12345678"
+        )
+        template = assertions.Template.from_stack(self.stack)
+        
+        assert image is not None
+        template.has_resource_properties("AWS::ImageBuilder::Component", {"Platform": "Windows"})
+        template.has_resource_properties("AWS::ImageBuilder::ImageRecipe", {
+            "ParentImage": "ami-0123456789abcdef0"
+        })
+        template.has_resource_properties("AWS::ImageBuilder::InfrastructureConfiguration", {
+            "InstanceTypes": ["t3.medium"],
+            "SubnetId": "subnet-12345678"
+        })
+        template.resource_count_is("AWS::ImageBuilder::Image", 1)
+        template.resource_count_is("AWS::ImageBuilder::ImagePipeline", 1)
+    
+    def test_golden_image_names_follow_content(self):
+        """内容の変更で置き換えられるコンポーネント・レシピの名前が内容ごとに変わることのテスト"""
+        steps = self.user_data_manager.get_setup_steps(self.windows_ami)
+        self.manager.create_golden_image(
+            self.windows_ami, steps,
+            parent_image="ami-0123456789abcdef0",
+            instance_type="t3.medium",
+            subnet_id="subnet-12345678",
+            security_group_id="sg-12345678"
+        )
+        other_stack = Stack(self.app, "OtherStack")
+        ImageBuilderManager(other_stack).create_golden_image(
+            self.windows_ami, steps[:-1],
+            parent_image="ami-0123456789abcdef0",
+            instance_type="t3.medium",
+            subnet_id="subnet-12345678",
+            security_group_id="sg-12345678"
+        )
+        
+        def names(stack, resource_type):
+            resource = list(assertions.Template.from_stack(stack).find_resources(resource_type).values())[0]
+            properties = resource["Properties"]
+            return properties["Name"].replace(stack.stack_name, ""), properties["Version"]
+        
+        for resource_type in ["AWS::ImageBuilder::Component", "AWS::ImageBuilder::ImageRecipe"]:
+            name, version = names(self.stack, resource_type)
+            other_name, _ = names(other_stack, resource_type)
+            assert name.endswith("-" + version.split(".")[-1])
+            assert name != other_name
+    
+    def test_content_version_changes_with_content(self):
+        """内容に応じてバージョンが変わることのテスト"""
+        version_a = ImageBuilderManager._content_version("a")
+        version_b = ImageBuilderManager._content_version("b")
+        
+        assert version_a != version_b
+        assert version_a == ImageBuilderManager._content_version("a")
+        assert version_a.startswith("1.0.")
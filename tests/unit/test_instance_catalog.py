@@ -0,0 +1,79 @@
+"""
+InstanceCatalogのユニットテスト
+"""
+import pytest
+from ssm_ec2_rdp.instance_catalog import InstanceCatalog
+from ssm_ec2_rdp.types import InstanceSpec
+
+
+class TestInstanceCatalog:
+    """InstanceCatalogクラスのテスト"""
+    
+    def setup_method(self):
+        """各テストメソッドの前に実行される初期化処理"""
+        self.catalog = InstanceCatalog()
+    
+    @pytest.mark.parametrize("instance_type,vcpus,memory_mib", [
+        ("t3.micro", 2, 1024),
+        ("t3.small", 2, 2048),
+        ("t3a.medium", 2, 4096),
+        ("t3.2xlarge", 8, 32768),
+        ("t2.micro", 1, 1024),
+        ("t2.medium", 2, 4096),
+    ])
+    def test_burstable_specs(self, instance_type, vcpus, memory_mib):
+        """バースト可能インスタンスのスペック取得テスト"""
+        spec = self.catalog.get_spec(instance_type)
+        
+        assert spec == InstanceSpec(instance_type=instance_type, vcpus=vcpus, memory_mib=memory_mib)
+    
+    @pytest.mark.parametrize("instance_type,vcpus,memory_gib", [
+        ("m5.large", 2, 8),
+        ("m6i.xlarge", 4, 16),
+        ("c5.2xlarge", 8, 16),
+        ("r5.4xlarge", 16, 128),
+        ("m6g.medium", 1, 4),
+        ("g4dn.xlarge", 4, 16),
+        ("trn1.2xlarge", 8, 32),
+    ])
+    def test_derived_specs(self, instance_type, vcpus, memory_gib):
+        """ファミリーとサイズからスペックを算出するテスト"""
+        spec = self.catalog.get_spec(instance_type)
+        
+        assert spec.vcpus == vcpus
+        assert spec.memory_gib() == memory_gib
+    
+    @pytest.mark.parametrize("instance_type", ["m5.metal", "f1.2xlarge", "t3.huge", "t9.micro", "invalid", None])
+    def test_unknown_instance_types(self, instance_type):
+        """スペックを求められないインスタンスタイプでNoneを返すテスト"""
+        assert self.catalog.get_spec(instance_type) is None
+    
+    @pytest.mark.parametrize("instance_type,instance_store", [
+        ("m5.large", False),
+        ("m5d.large", True),
+        ("c6id.xlarge", True),
+        ("r6idn.2xlarge", True),
+        ("g4dn.xlarge", True),
+        ("g5.xlarge", True),
+        ("i4i.large", True),
+        ("i3en.large", True),
+        ("d3.xlarge", False),
+        ("inf1.xlarge", False),
+        ("trn1.2xlarge", True),
+        ("trn1n.32xlarge", True),
+        ("t3.small", False),
+    ])
+    def test_instance_store(self, instance_type, instance_store):
+        """NVMeインスタンスストアの有無の判定テスト"""
+        assert self.catalog.get_spec(instance_type).instance_store is instance_store
+    
+    @pytest.mark.parametrize("instance_type,gpu", [
+        ("g4dn.xlarge", True),
+        ("g5.2xlarge", True),
+        ("p3.2xlarge", True),
+        ("m5.large", False),
+        ("t3.small", False),
+    ])
+    def test_gpu(self, instance_type, gpu):
+        """GPU搭載の有無の判定テスト"""
+        assert self.catalog.get_spec(instance_type).gpu is gpu
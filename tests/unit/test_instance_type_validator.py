@@ -182,7 +182,7 @@ class TestInstanceTypeValidator:
     
     def test_is_burstable_instance_false_cases(self):
         """Burstableインスタンス判定（False）のテスト"""
-        non_burstable_types = ['m5.large', 'c5.xlarge', 'r5.2xlarge', 'invalid']
+        non_burstable_types = ['m5.large', 'c5.xlarge', 'r5.2xlarge', 'trn1.2xlarge', 'trn1n.32xlarge', 'invalid']
         
         for instance_type in non_burstable_types:
             assert self.validator.is_burstable_instance(instance_type) is False
@@ -198,6 +198,7 @@ class TestInstanceTypeValidator:
             ('p3.2xlarge', 'Accelerated Computing'),
             ('g4dn.xlarge', 'Accelerated Computing'),
             ('hpc6a.48xlarge', 'High Performance Computing'),
+            ('trn1.2xlarge', 'Accelerated Computing'),
             ('invalid', 'Unknown')
         ]
         
@@ -205,6 +206,18 @@ class TestInstanceTypeValidator:
             category = self.validator.get_instance_category(instance_type)
             assert category == expected_category, f"Failed for {instance_type}: got {category}, expected {expected_category}"
     
+    @pytest.mark.parametrize("instance_type,expected_category", [
+        ('hpc6a.48xlarge', 'High Performance Computing'),
+        ('hpc7g.16xlarge', 'High Performance Computing'),
+        ('inf2.xlarge', 'Accelerated Computing'),
+        ('vt1.3xlarge', 'Accelerated Computing'),
+        ('h1.2xlarge', 'Storage Optimized'),
+        ('i4i.large', 'Storage Optimized'),
+    ])
+    def test_get_instance_category_longest_prefix(self, instance_type, expected_category):
+        """複数文字のプレフィックスが1文字のプレフィックスより優先されることのテスト"""
+        assert self.validator.get_instance_category(instance_type) == expected_category
+    
     def test_validate_and_get_info_valid_instance(self):
         """有効なインスタンスタイプでの詳細情報取得テスト"""
         info = self.validator.validate_and_get_info('t3.medium')
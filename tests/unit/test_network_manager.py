@@ -0,0 +1,82 @@
+"""
+NetworkManagerのユニットテスト
+"""
+import pytest
+from aws_cdk import Stack, App, Fn, Token
+import aws_cdk.assertions as assertions
+from ssm_ec2_rdp.network_manager import NetworkManager
+from ssm_ec2_rdp.types import NetworkConfiguration, InvalidValueError
+
+
+class TestNetworkManager:
+    """NetworkManagerクラスのテスト"""
+    
+    def setup_method(self):
+        """各テストメソッドの前に実行される初期化処理"""
+        self.app = App()
+        self.stack = Stack(self.app, "TestStack")
+        self.manager = NetworkManager(self.stack)
+    
+    def test_initialization(self):
+        """初期化のテスト"""
+        assert self.manager.stack is self.stack
+    
+    def test_create_network(self):
+        """VPC・SSMエンドポイント・EICEが作成されることのテスト"""
+        vpc, network = self.manager.create_network("private")
+        
+        template = assertions.Template.from_stack(self.stack)
+        template.resource_count_is("AWS::EC2::VPC", 1)
+        template.resource_count_is("AWS::EC2::Subnet", 4)
+        template.resource_count_is("AWS::EC2::VPCEndpoint", 2)
+        template.resource_count_is("AWS::EC2::InstanceConnectEndpoint", 1)
+        
+        assert network.vpc_id == vpc.vpc_id
+        assert network.subnet_id == vpc.isolated_subnets[0].subnet_id
+        assert Token.is_unresolved(network.eice_security_group_id)
+    
+    def test_create_network_optional_endpoints(self):
+        """publicサブネットの選択と、オプションのエンドポイントが作成されることのテスト"""
+        vpc, network = self.manager.create_network("public", s3_gateway_endpoint=True, cloudwatch_endpoint=True)
+        
+        template = assertions.Template.from_stack(self.stack)
+        template.resource_count_is("AWS::EC2::VPCEndpoint", 4)
+        assert network.subnet_id == vpc.public_subnets[0].subnet_id
+    
+    def test_import_vpc(self):
+        """既存VPCのインポートではネットワークリソースが作成されないことのテスト"""
+        network = NetworkConfiguration(
+            vpc_id="vpc-0123456789abcdef0",
+            subnet_id="subnet-0123456789abcdef0",
+            eice_security_group_id="sg-0123456789abcdef0"
+        )
+        
+        vpc = self.manager.import_vpc(network)
+        
+        assert vpc.vpc_id == "vpc-0123456789abcdef0"
+        template = assertions.Template.from_stack(self.stack)
+        template.resource_count_is("AWS::EC2::VPC", 0)
+        template.resource_count_is("AWS::EC2::InstanceConnectEndpoint", 0)
+    
+    def test_import_vpc_token_values(self):
+        """トークン（共有ネットワークスタックの出力等）は形式を検証しないことのテスト"""
+        network = NetworkConfiguration(
+            vpc_id=Fn.import_value("SharedVpcId"),
+            subnet_id=Fn.import_value("SharedSubnetId"),
+            eice_security_group_id=Fn.import_value("SharedEiceSecurityGroupId")
+        )
+        
+        vpc = self.manager.import_vpc(network)
+        
+        assert Token.is_unresolved(vpc.vpc_id)
+    
+    def test_import_vpc_invalid_ids(self):
+        """トークンでない値はインポート時にIDの形式を検証することのテスト"""
+        network = NetworkConfiguration(
+            vpc_id="vpc-0123456789abcdef0",
+            subnet_id="subnet-xyz",
+            eice_security_group_id=Fn.import_value("SharedEiceSecurityGroupId")
+        )
+        
+        with pytest.raises(InvalidValueError, match="subnet-id"):
+            self.manager.import_vpc(network)
@@ -0,0 +1,50 @@
+"""
+SsmEc2RdpNetworkStackのユニットテスト
+"""
+from aws_cdk import App
+import aws_cdk.assertions as assertions
+from ssm_ec2_rdp.network_stack import SsmEc2RdpNetworkStack
+from ssm_ec2_rdp.types import EC2Configuration, AMIConfiguration, InstanceConfiguration
+
+
+class TestSsmEc2RdpNetworkStack:
+    """SsmEc2RdpNetworkStackクラスのテスト"""
+    
+    def setup_method(self):
+        """各テストメソッドの前に実行される初期化処理"""
+        self.app = App()
+        self.config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="t3.medium")
+        )
+    
+    def test_network_resources(self):
+        """ネットワークスタックがVPC・エンドポイント・EICEのみを持つことのテスト"""
+        stack = SsmEc2RdpNetworkStack(self.app, "NetworkStack", self.config)
+        
+        template = assertions.Template.from_stack(stack)
+        template.resource_count_is("AWS::EC2::VPC", 1)
+        template.resource_count_is("AWS::EC2::VPCEndpoint", 2)
+        template.resource_count_is("AWS::EC2::InstanceConnectEndpoint", 1)
+        template.resource_count_is("AWS::EC2::Instance", 0)
+        assert stack.network.vpc_id == stack.vpc.vpc_id
+    
+    def test_exports(self):
+        """参照の有無に関わらず、ネットワーク設定の値と両方のサブネットがエクスポートされることのテスト"""
+        stack = SsmEc2RdpNetworkStack(self.app, "NetworkStack", self.config)
+        
+        outputs = assertions.Template.from_stack(stack).find_outputs("*")
+        exported = [output["Value"] for output in outputs.values() if "Export" in output]
+        
+        # VPC・EICEセキュリティグループ・パブリック/プライベートサブネット
+        assert len(exported) == 4
+        assert stack.resolve(stack.vpc.vpc_id) in exported
+        assert stack.resolve(stack.network.eice_security_group_id) in exported
+    
+    def test_cloudwatch_endpoint_for_boot_metrics(self):
+        """privateサブネットでboot_metrics指定時にCloudWatchエンドポイントが作成されることのテスト"""
+        self.config.user_data = {"boot_metrics": True}
+        stack = SsmEc2RdpNetworkStack(self.app, "NetworkStack", self.config)
+        
+        template = assertions.Template.from_stack(stack)
+        template.resource_count_is("AWS::EC2::VPCEndpoint", 3)
@@ -1,21 +1,41 @@
 """
 SsmEc2RdpStackの統合テスト
 """
+import base64
+import gzip
+import json
 import pytest
+from typing import Optional
 from unittest.mock import Mock, patch
 import aws_cdk as core
 import aws_cdk.assertions as assertions
 from ssm_ec2_rdp.ssm_ec2_rdp_stack import SsmEc2RdpStack
+from ssm_ec2_rdp.network_stack import SsmEc2RdpNetworkStack
 from ssm_ec2_rdp.types import (
     EC2Configuration, 
     AMIConfiguration, 
     InstanceConfiguration,
+    NetworkConfiguration,
     AMIInfo,
     OSType,
     ConfigurationError
 )
 
 
+def _synth(config: EC2Configuration, os_type: OSType = OSType.WINDOWS,
+           app: Optional[core.App] = None, **kwargs) -> SsmEc2RdpStack:
+    """AMIの解決をモックしてスタックを作成（os_typeで解決されるAMIのOSを指定）"""
+    ami_id = config.ami.ami_id or config.ami.ami_parameter
+    description = "Windows Server" if os_type == OSType.WINDOWS else "Amazon Linux"
+    
+    with patch('ssm_ec2_rdp.ami_resolver.AMIResolver.resolve_ami') as mock_resolve:
+        mock_resolve.return_value = (
+            Mock(), 
+            AMIInfo(ami_id=ami_id, os_type=os_type, description=description)
+        )
+        return SsmEc2RdpStack(app or core.App(), "test-stack", config, **kwargs)
+
+
 class TestSsmEc2RdpStack:
     """SsmEc2RdpStackクラスのテスト"""
     
@@ -76,6 +96,398 @@ class TestSsmEc2RdpStack:
             # EC2インスタンスが作成されることを確認
             template.has_resource("AWS::EC2::Instance", {})
     
+    def test_stack_ssm_parameter_uses_dynamic_reference(self):
+        """SSMパラメータ指定時にImageIdが動的参照になることのテスト"""
+        parameter = "/aws/service/ami-windows-latest/Windows_Server-2022-Japanese-Full-Base"
+        
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_parameter=parameter),
+            instance=InstanceConfiguration(instance_type="t3.medium")
+        )
+        
+        stack = _synth(config)
+        template = assertions.Template.from_stack(stack)
+        
+        # ハードコードされたAMI IDではなくSSM動的参照が使用されることを確認
+        template.has_resource_properties("AWS::EC2::Instance", {
+            "ImageId": f"{{{{resolve:ssm:{parameter}}}}}"
+        })
+    
+    def test_stack_region_map_uses_find_in_map(self):
+        """リージョン別AMIマッピング指定時にCfnMappingとFn::FindInMapが使用されることのテスト"""
+        app = core.App()
+        
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_region_map={
+                "ap-northeast-1": "ami-0123456789abcdef0",
+                "us-east-1": "ami-0fedcba9876543210"
+            }),
+            instance=InstanceConfiguration(instance_type="t3.medium")
+        )
+        
+        stack = SsmEc2RdpStack(app, "test-stack", config)
+        template = assertions.Template.from_stack(stack)
+        
+        template.has_mapping("AmiRegionMap", {
+            "ap-northeast-1": {"ami": "ami-0123456789abcdef0"},
+            "us-east-1": {"ami": "ami-0fedcba9876543210"}
+        })
+        template.has_resource_properties("AWS::EC2::Instance", {
+            "ImageId": {"Fn::FindInMap": ["AmiRegionMap", {"Ref": "AWS::Region"}, "ami"]}
+        })
+    
+    def test_stack_image_baking_mode(self):
+        """イメージ焼き込みモードでImage Builderのイメージが使用されることのテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0", image_baking=True),
+            instance=InstanceConfiguration(instance_type="t3.medium")
+        )
+        
+        stack = _synth(config)
+        template = assertions.Template.from_stack(stack)
+        
+        template.resource_count_is("AWS::ImageBuilder::Image", 1)
+        template.has_resource_properties("AWS::ImageBuilder::ImageRecipe", {
+            "ParentImage": "ami-0123456789abcdef0"
+        })
+        template.has_resource_properties("AWS::EC2::Instance", {
+            "ImageId": {"Fn::GetAtt": [assertions.Match.any_value(), "ImageId"]}
+        })
+    
+    def test_stack_fast_launch_windows(self):
+        """焼き込み後のWindows AMIでFast Launchを有効化するスタック作成テスト"""
+        parameter = "/aws/service/ami-windows-latest/Windows_Server-2022-Japanese-Full-Base"
+        
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_parameter=parameter, image_baking=True, fast_launch=True),
+            instance=InstanceConfiguration(instance_type="t3.medium")
+        )
+        
+        stack = _synth(config)
+        template = assertions.Template.from_stack(stack)
+        
+        template.resource_count_is("Custom::AWS", 1)
+        template.resource_count_is("AWS::EC2::LaunchTemplate", 1)
+        # 公式AMIではなく焼き込み後のAMIを対象とする
+        fast_launch = list(template.find_resources("Custom::AWS").values())[0]
+        image = list(template.find_resources("AWS::ImageBuilder::Image"))[0]
+        assert {"Fn::GetAtt": [image, "ImageId"]} in fast_launch["Properties"]["Create"]["Fn::Join"][1]
+    
+    def test_stack_fast_launch_custom_ami(self):
+        """ami-idのカスタムAMIでimage-bakingなしにFast Launchを有効化するスタック作成テスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0", fast_launch=True),
+            instance=InstanceConfiguration(instance_type="t3.medium")
+        )
+        
+        stack = _synth(config)
+        template = assertions.Template.from_stack(stack)
+        
+        template.resource_count_is("Custom::AWS", 1)
+        template.resource_count_is("AWS::ImageBuilder::Image", 0)
+        # 事前プロビジョニングの開始後にインスタンスを起動する
+        fast_launch = list(template.find_resources("Custom::AWS"))[0]
+        instance = list(template.find_resources("AWS::EC2::Instance").values())[0]
+        assert fast_launch in instance["DependsOn"]
+    
+    def test_stack_fast_launch_requires_image_baking(self):
+        """image-bakingなしでFast Launchを指定した場合に合成時エラーになることのテスト"""
+        parameter = "/aws/service/ami-windows-latest/Windows_Server-2022-Japanese-Full-Base"
+        
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_parameter=parameter, fast_launch=True),
+            instance=InstanceConfiguration(instance_type="t3.medium")
+        )
+        
+        with pytest.raises(ConfigurationError) as exc_info:
+            _synth(config)
+        
+        assert "image-baking" in str(exc_info.value)
+    
+    def test_stack_fast_launch_rejects_linux(self):
+        """Linux AMIでFast Launchを指定した場合のエラーテスト"""
+        app = core.App()
+        parameter = "/aws/service/ami-amazon-linux-latest/al2023-ami-kernel-6.1-x86_64"
+        
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_parameter=parameter, fast_launch=True),
+            instance=InstanceConfiguration(instance_type="t3.medium")
+        )
+        
+        with pytest.raises(ConfigurationError) as exc_info:
+            SsmEc2RdpStack(app, "test-stack", config)
+        
+        assert "fast-launch" in str(exc_info.value)
+    
+    def test_stack_invalid_user_data_config(self):
+        """不正なuser-data設定でのエラーテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="t3.medium"),
+            user_data={'boot_profile': 'turbo'}
+        )
+        
+        with pytest.raises(ConfigurationError) as exc_info:
+            _synth(config, OSType.LINUX)
+        
+        assert "user-data設定が不正です" in str(exc_info.value)
+    
+    def test_stack_private_subnet_skips_package_installation(self):
+        """privateサブネットでユーザーデータがパッケージインストールをスキップすることのテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="t3.medium", subnet_type="private")
+        )
+        
+        stack = _synth(config, OSType.LINUX)
+        template_json = json.dumps(assertions.Template.from_stack(stack).to_json())
+        
+        assert "Skipping SystemUpdate" in template_json
+        assert "yum update -y" not in template_json
+    
+    def test_stack_compressed_user_data(self):
+        """compress指定時にgzip圧縮済みユーザーデータが埋め込まれることのテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="t3.medium"),
+            user_data={'compress': True}
+        )
+        
+        stack = _synth(config, OSType.LINUX)
+        template = assertions.Template.from_stack(stack)
+        
+        instances = template.find_resources("AWS::EC2::Instance")
+        user_data = list(instances.values())[0]["Properties"]["UserData"]
+        # Fn::Base64を介さず、Base64エンコード済みのgzipデータが直接指定される
+        assert isinstance(user_data, str)
+        assert gzip.decompress(base64.b64decode(user_data)).startswith(b"Content-Type: multipart/mixed")
+        
+        annotations = assertions.Annotations.from_stack(stack)
+        annotations.has_info("*", assertions.Match.string_like_regexp("圧縮後"))
+    
+    def test_stack_offload_user_data_to_s3(self):
+        """offload_to_s3指定時にスクリプトがS3アセットに退避されることのテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="t3.medium", subnet_type="public"),
+            user_data={'offload_to_s3': True, 'install_packages': ['git']}
+        )
+        
+        stack = _synth(config, OSType.LINUX)
+        template_json = json.dumps(assertions.Template.from_stack(stack).to_json())
+        
+        # インラインのユーザーデータはフェッチャーのみ
+        assert "aws s3 cp" in template_json
+        assert "sha256sum -c -" in template_json
+        assert "yum install -y git" not in template_json
+    
+    def test_stack_boot_metrics(self):
+        """boot_metrics指定時のIAM権限とCloudWatchエンドポイントのテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="t3.medium"),
+            user_data={'boot_metrics': True}
+        )
+        
+        stack = _synth(config, OSType.LINUX)
+        template = assertions.Template.from_stack(stack)
+        
+        template.has_resource_properties("AWS::IAM::Policy", {
+            "PolicyDocument": {
+                "Statement": assertions.Match.array_with([
+                    assertions.Match.object_like({
+                        "Action": "cloudwatch:PutMetricData",
+                        "Condition": {"StringEquals": {"cloudwatch:namespace": "SsmEc2Rdp/Boot"}}
+                    })
+                ])
+            }
+        })
+        assert "monitoring" in json.dumps(template.find_resources("AWS::EC2::VPCEndpoint"))
+    
+    def test_stack_cloud_config_user_data(self):
+        """format: cloud-config指定時に#cloud-configがユーザーデータになることのテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="t3.medium", subnet_type="public"),
+            user_data={'format': 'cloud-config', 'install_packages': ['git']}
+        )
+        
+        stack = _synth(config, OSType.LINUX)
+        template = assertions.Template.from_stack(stack)
+        
+        instances = template.find_resources("AWS::EC2::Instance")
+        user_data = list(instances.values())[0]["Properties"]["UserData"]["Fn::Base64"]
+        assert user_data.startswith("#cloud-config")
+    
+    def test_stack_ec2launch_v2_user_data(self):
+        """format: ec2launch-v2指定時にEC2Launch v2のタスクドキュメントがユーザーデータになることのテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="t3.medium", subnet_type="public"),
+            user_data={'format': 'ec2launch-v2'}
+        )
+        
+        stack = _synth(config)
+        template = assertions.Template.from_stack(stack)
+        
+        instances = template.find_resources("AWS::EC2::Instance")
+        user_data = list(instances.values())[0]["Properties"]["UserData"]["Fn::Base64"]
+        assert user_data.startswith("version: 1.0\ntasks:\n")
+        assert "<powershell>" not in user_data
+        assert "setAdminAccount" not in user_data
+    
+    def test_stack_windows_slimming_small_instance(self):
+        """小さいインスタンスタイプでwindows_slimmingの軽量化設定がユーザーデータに含まれることのテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="t3.small"),
+            user_data={'windows_slimming': True}
+        )
+        
+        stack = _synth(config)
+        template = assertions.Template.from_stack(stack)
+        
+        instances = template.find_resources("AWS::EC2::Instance")
+        user_data = list(instances.values())[0]["Properties"]["UserData"]["Fn::Base64"]
+        assert "Start-UserDataPhase 'WindowsSlimming'" in user_data
+    
+    def test_stack_windows_slimming_unknown_instance(self):
+        """メモリ量が不明なインスタンスタイプでwindows_slimmingの警告を出すテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="f1.2xlarge"),
+            user_data={'windows_slimming': True}
+        )
+        
+        stack = _synth(config)
+        
+        assertions.Annotations.from_stack(stack).has_warning(
+            "*", assertions.Match.string_like_regexp("windows_slimming")
+        )
+    
+    def test_stack_dcv(self):
+        """dcv指定時にEICEからのDCVポートの許可とポートフォワードのコマンドが出力されることのテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="g4dn.xlarge", subnet_type="public"),
+            user_data={'dcv': True}
+        )
+        
+        stack = _synth(config)
+        template = assertions.Template.from_stack(stack)
+        
+        template.has_resource_properties("AWS::EC2::SecurityGroup", {
+            "SecurityGroupIngress": assertions.Match.array_with([
+                assertions.Match.object_like({
+                    "IpProtocol": "tcp",
+                    "FromPort": 8443,
+                    "ToPort": 8443,
+                    "SourceSecurityGroupId": assertions.Match.any_value()
+                })
+            ])
+        })
+        outputs = template.find_outputs("DcvPortForwardCommand")
+        command = json.dumps(outputs["DcvPortForwardCommand"]["Value"])
+        assert "aws ec2-instance-connect open-tunnel --instance-id" in command
+        assert "--remote-port 8443 --local-port 18443" in command
+        template.has_resource_properties("AWS::IAM::Policy", {
+            "PolicyDocument": {
+                "Statement": assertions.Match.array_with([
+                    assertions.Match.object_like({"Action": "s3:GetObject"})
+                ])
+            }
+        })
+    
+    def test_stack_dcv_private_subnet(self):
+        """privateサブネットではdcvが合成時エラーになることのテスト（image-bakingのビルドも同じサブネットで行う）"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="g4dn.xlarge", subnet_type="private"),
+            user_data={'dcv': True}
+        )
+        
+        with pytest.raises(ConfigurationError) as exc_info:
+            _synth(config)
+        assert "'dcv'" in str(exc_info.value)
+        
+        config.ami.image_baking = True
+        with pytest.raises(ConfigurationError):
+            _synth(config)
+    
+    def test_stack_existing_network(self):
+        """既存ネットワーク指定時にVPC・エンドポイント・EICEを作成せず、指定IDを参照することのテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="t3.small"),
+            network=NetworkConfiguration(
+                vpc_id="vpc-0123456789abcdef0",
+                subnet_id="subnet-0123456789abcdef0",
+                eice_security_group_id="sg-0123456789abcdef0"
+            )
+        )
+        
+        stack = _synth(config)
+        template = assertions.Template.from_stack(stack)
+        
+        template.resource_count_is("AWS::EC2::VPC", 0)
+        template.resource_count_is("AWS::EC2::Subnet", 0)
+        template.resource_count_is("AWS::EC2::VPCEndpoint", 0)
+        template.resource_count_is("AWS::EC2::InstanceConnectEndpoint", 0)
+        template.has_resource_properties("AWS::EC2::Instance", {
+            "SubnetId": "subnet-0123456789abcdef0"
+        })
+        template.has_resource_properties("AWS::EC2::SecurityGroup", {
+            "VpcId": "vpc-0123456789abcdef0",
+            "SecurityGroupIngress": assertions.Match.array_with([
+                assertions.Match.object_like({
+                    "FromPort": 3389,
+                    "SourceSecurityGroupId": "sg-0123456789abcdef0"
+                })
+            ])
+        })
+    
+    def test_stack_image_baking_uses_instance_subnet(self):
+        """image-bakingのビルド用インスタンスがインスタンスと同じサブネット・到達性でセットアップすることのテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0", image_baking=True),
+            instance=InstanceConfiguration(instance_type="t3.small", subnet_type="private"),
+            network=NetworkConfiguration(
+                vpc_id="vpc-0123456789abcdef0",
+                subnet_id="subnet-0123456789abcdef0",
+                eice_security_group_id="sg-0123456789abcdef0"
+            )
+        )
+        
+        stack = _synth(config, OSType.LINUX)
+        template = assertions.Template.from_stack(stack)
+        
+        template.has_resource_properties("AWS::ImageBuilder::InfrastructureConfiguration", {
+            "SubnetId": "subnet-0123456789abcdef0"
+        })
+        component = list(template.find_resources("AWS::ImageBuilder::Component").values())[0]
+        assert "Skipping SystemUpdate" in component["Properties"]["Data"]
+        assert "yum update -y" not in component["Properties"]["Data"]
+    
+    def test_stack_with_network_stack(self):
+        """ネットワークスタックを参照する場合に、コンピュートスタックがネットワークリソースを持たないことのテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="t3.small")
+        )
+        
+        app = core.App()
+        network_stack = SsmEc2RdpNetworkStack(app, "network-stack", config)
+        stack = _synth(config, app=app, network=network_stack.network)
+        template = assertions.Template.from_stack(stack)
+        
+        template.resource_count_is("AWS::EC2::VPC", 0)
+        template.resource_count_is("AWS::EC2::VPCEndpoint", 0)
+        template.resource_count_is("AWS::EC2::InstanceConnectEndpoint", 0)
+        template.has_resource_properties("AWS::EC2::Instance", {
+            "SubnetId": {"Fn::ImportValue": assertions.Match.string_like_regexp("^network-stack:")}
+        })
+        assert network_stack in stack.dependencies
+    
     def test_stack_creation_with_linux_ami(self):
         """Linux AMIでのスタック作成テスト"""
         app = core.App()
@@ -171,6 +583,41 @@ class TestSsmEc2RdpStack:
             # VPCエンドポイントが作成されることを確認
             template.has_resource("AWS::EC2::VPCEndpoint", {})
     
+    def test_stack_s3_gateway_endpoint(self):
+        """S3ゲートウェイエンドポイント作成とリポジトリ設定のテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(
+                instance_type="t3.medium", subnet_type="private", s3_gateway_endpoint=True
+            )
+        )
+        
+        stack = _synth(config, OSType.LINUX)
+        template = assertions.Template.from_stack(stack)
+        
+        template.has_resource_properties("AWS::EC2::VPCEndpoint", {
+            "VpcEndpointType": "Gateway",
+            "ServiceName": assertions.Match.any_value()
+        })
+        template_json = json.dumps(template.to_json())
+        assert "yum update -y" in template_json
+        assert "awsregion" in template_json
+    
+    def test_stack_without_s3_gateway_endpoint(self):
+        """デフォルトではS3ゲートウェイエンドポイントを作成しないことのテスト"""
+        config = EC2Configuration(
+            ami=AMIConfiguration(ami_id="ami-0123456789abcdef0"),
+            instance=InstanceConfiguration(instance_type="t3.medium")
+        )
+        
+        stack = _synth(config, OSType.LINUX)
+        template = assertions.Template.from_stack(stack)
+        
+        gateway_endpoints = template.find_resources("AWS::EC2::VPCEndpoint", {
+            "Properties": {"VpcEndpointType": "Gateway"}
+        })
+        assert gateway_endpoints == {}
+    
     def test_stack_security_group_configuration(self):
         """セキュリティグループ設定のテスト"""
         app = core.App()
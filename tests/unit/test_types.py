@@ -15,6 +15,9 @@ from ssm_ec2_rdp.types import (
     EC2Configuration,
     AMIInfo,
     UserDataConfig,
+    NetworkReachability,
+    NetworkConfiguration,
+    InstanceSpec,
     validate_configuration,
     get_configuration_help
 )
@@ -90,6 +93,59 @@ class TestAMIConfiguration:
             AMIConfiguration(ami_parameter="invalid-parameter")
         assert "無効なSSMパラメータパス形式" in str(exc_info.value)
     
+    def test_valid_ami_region_map(self):
+        """有効なリージョン別AMIマッピングでの正常作成テスト"""
+        region_map = {
+            "ap-northeast-1": "ami-0123456789abcdef0",
+            "us-east-1": "ami-0fedcba9876543210"
+        }
+        config = AMIConfiguration(ami_region_map=region_map)
+        assert config.ami_region_map == region_map
+        assert config.ami_id is None
+        assert config.ami_parameter is None
+    
+    def test_ami_region_map_conflict_error(self):
+        """ami-region-mapと他のAMI設定の同時指定でConfigConflictErrorが発生することをテスト"""
+        with pytest.raises(ConfigConflictError) as exc_info:
+            AMIConfiguration(
+                ami_id="ami-0123456789abcdef0",
+                ami_region_map={"us-east-1": "ami-0fedcba9876543210"}
+            )
+        assert "ami-region-map" in str(exc_info.value)
+    
+    def test_ami_region_map_invalid_values(self):
+        """ami-region-mapの無効なリージョン名・AMI IDでInvalidValueErrorが発生することをテスト"""
+        with pytest.raises(InvalidValueError) as exc_info:
+            AMIConfiguration(ami_region_map={"tokyo": "ami-0123456789abcdef0"})
+        assert "無効なリージョン名" in str(exc_info.value)
+        
+        with pytest.raises(InvalidValueError) as exc_info:
+            AMIConfiguration(ami_region_map={"us-east-1": "ami-123"})
+        assert "無効なAMI ID形式" in str(exc_info.value)
+        
+        with pytest.raises(InvalidValueError):
+            AMIConfiguration(ami_region_map=["ami-0123456789abcdef0"])
+    
+    def test_fast_launch_defaults(self):
+        """Fast Launch設定のデフォルト値テスト"""
+        config = AMIConfiguration(ami_id="ami-0123456789abcdef0")
+        assert config.fast_launch is False
+        assert config.fast_launch_snapshot_count == 5
+        assert config.fast_launch_max_parallel_launches == 6
+    
+    def test_fast_launch_invalid_values(self):
+        """Fast Launch設定の無効値でInvalidValueErrorが発生することをテスト"""
+        with pytest.raises(InvalidValueError):
+            AMIConfiguration(ami_id="ami-0123456789abcdef0", fast_launch="yes")
+        
+        with pytest.raises(InvalidValueError) as exc_info:
+            AMIConfiguration(ami_id="ami-0123456789abcdef0", fast_launch_snapshot_count=0)
+        assert "fast-launch-snapshot-count" in str(exc_info.value)
+        
+        with pytest.raises(InvalidValueError) as exc_info:
+            AMIConfiguration(ami_id="ami-0123456789abcdef0", fast_launch_max_parallel_launches=5)
+        assert "fast-launch-max-parallel-launches" in str(exc_info.value)
+    
     def test_ami_id_validation_edge_cases(self):
         """AMI ID形式の境界値テスト"""
         # 正しい形式
@@ -226,6 +282,15 @@ class TestInstanceConfiguration:
                 subnet_type="invalid"
             )
         assert "無効なサブネットタイプ" in str(exc_info.value)
+    
+    def test_invalid_s3_gateway_endpoint_raise_error(self):
+        """bool以外のs3-gateway-endpointでInvalidValueErrorが発生することをテスト"""
+        with pytest.raises(InvalidValueError) as exc_info:
+            InstanceConfiguration(
+                instance_type="t3.medium",
+                s3_gateway_endpoint="yes"
+            )
+        assert "s3-gateway-endpoint" in str(exc_info.value)
 
 
 class TestEC2Configuration:
@@ -269,6 +334,82 @@ class TestEC2Configuration:
         }
         with pytest.raises(ConfigConflictError):
             EC2Configuration.from_context(context)
+    
+    def test_from_context_existing_network(self):
+        """existing-network指定でのfrom_contextテスト"""
+        context = {
+            "ami-id": "ami-0123456789abcdef0",
+            "instance-type": "t3.medium",
+            "existing-network": {
+                "vpc-id": "vpc-0123456789abcdef0",
+                "subnet-id": "subnet-0123456789abcdef0",
+                "eice-security-group-id": "sg-0123456789abcdef0"
+            }
+        }
+        config = EC2Configuration.from_context(context)
+        
+        assert config.network == NetworkConfiguration(
+            vpc_id="vpc-0123456789abcdef0",
+            subnet_id="subnet-0123456789abcdef0",
+            eice_security_group_id="sg-0123456789abcdef0"
+        )
+        assert EC2Configuration.from_context({
+            "ami-id": "ami-0123456789abcdef0",
+            "instance-type": "t3.medium"
+        }).network is None
+
+
+class TestNetworkConfiguration:
+    """NetworkConfigurationデータクラスのテスト"""
+    
+    def test_valid_configuration(self):
+        """有効な既存ネットワーク設定のテスト"""
+        network = NetworkConfiguration.from_context({
+            "vpc-id": "vpc-12345678",
+            "subnet-id": "subnet-0123456789abcdef0",
+            "eice-security-group-id": "sg-0123456789abcdef0"
+        })
+        
+        assert network.vpc_id == "vpc-12345678"
+        assert network.subnet_id == "subnet-0123456789abcdef0"
+    
+    def test_missing_values(self):
+        """必須のIDが指定されていない場合のテスト"""
+        with pytest.raises(MissingConfigError):
+            NetworkConfiguration.from_context({"vpc-id": "vpc-12345678", "subnet-id": "subnet-12345678"})
+    
+    @pytest.mark.parametrize("key,value", [
+        ("vpc-id", "subnet-12345678"),
+        ("subnet-id", "subnet-xyz"),
+        ("eice-security-group-id", "sg-123"),
+    ])
+    def test_invalid_ids(self, key, value):
+        """無効なID形式のテスト"""
+        context = {
+            "vpc-id": "vpc-12345678",
+            "subnet-id": "subnet-12345678",
+            "eice-security-group-id": "sg-12345678",
+            key: value
+        }
+        with pytest.raises(InvalidValueError):
+            NetworkConfiguration.from_context(context)
+    
+    def test_invalid_format(self):
+        """辞書以外を指定した場合のテスト"""
+        with pytest.raises(InvalidValueError):
+            NetworkConfiguration.from_context("vpc-12345678")
+    
+    def test_constructor_checks_required_values_only(self):
+        """コンストラクタでは必須項目のみ検証し、IDの形式は検証しないことのテスト"""
+        network = NetworkConfiguration(
+            vpc_id="shared-vpc",
+            subnet_id="shared-subnet",
+            eice_security_group_id="shared-sg"
+        )
+        
+        assert network.subnet_id == "shared-subnet"
+        with pytest.raises(MissingConfigError):
+            NetworkConfiguration(vpc_id="vpc-12345678", subnet_id="", eice_security_group_id="sg-12345678")
 
 
 class TestAMIInfo:
@@ -302,6 +443,44 @@ class TestAMIInfo:
         assert ami_info.is_linux() is True
 
 
+class TestNetworkReachability:
+    """NetworkReachabilityデータクラスのテスト"""
+    
+    def test_for_public_subnet(self):
+        """publicサブネットはパッケージリポジトリに到達できることのテスト"""
+        network = NetworkReachability.for_subnet_type("public")
+        
+        assert network.internet_access is True
+        assert network.can_reach_package_repositories() is True
+    
+    def test_for_private_subnet(self):
+        """privateサブネット（PRIVATE_ISOLATED）は到達できないことのテスト"""
+        network = NetworkReachability.for_subnet_type("private")
+        
+        assert network.subnet_type == "private"
+        assert network.internet_access is False
+        assert network.can_reach_package_repositories() is False
+        assert network.can_reach_amazon_linux_repositories() is False
+    
+    def test_for_private_subnet_with_s3_gateway_endpoint(self):
+        """S3ゲートウェイエンドポイントがあればAmazon Linuxのリポジトリのみ到達できることのテスト"""
+        network = NetworkReachability.for_subnet_type("private", s3_gateway_endpoint=True)
+        
+        assert network.can_reach_package_repositories() is False
+        assert network.can_reach_amazon_linux_repositories() is True
+
+
+class TestInstanceSpec:
+    """InstanceSpecクラスのテスト"""
+    
+    def test_memory_gib(self):
+        """メモリ量をGiBで取得するテスト"""
+        spec = InstanceSpec(instance_type="t3.small", vcpus=2, memory_mib=2048)
+        
+        assert spec.memory_gib() == 2
+        assert spec.instance_store is False
+
+
 class TestUserDataConfig:
     """UserDataConfigデータクラスのテスト"""
     
@@ -339,6 +518,20 @@ class TestUtilityFunctions:
         assert config.ami.ami_id == "ami-0123456789abcdef0"
         assert config.instance.instance_type == "t3.medium"
     
+    def test_validate_configuration_user_data(self):
+        """user-data設定付きのvalidate_configurationテスト"""
+        context = {
+            "ami-id": "ami-0123456789abcdef0",
+            "instance-type": "t3.medium",
+            "user-data": {"boot_profile": "fast-boot"}
+        }
+        config = validate_configuration(context)
+        
+        assert config.user_data == {"boot_profile": "fast-boot"}
+        
+        with pytest.raises(ConfigurationError):
+            validate_configuration({**context, "user-data": ["fast-boot"]})
+    
     def test_validate_configuration_error(self):
         """エラー時のvalidate_configurationテスト"""
         context = {
@@ -0,0 +1,67 @@
+"""
+UserDataAssetManagerのユニットテスト
+"""
+import os
+from aws_cdk import Stack, App, aws_iam as iam
+import aws_cdk.assertions as assertions
+from ssm_ec2_rdp.user_data_asset_manager import UserDataAssetManager
+from ssm_ec2_rdp.types import AMIInfo, OSType
+
+
+class TestUserDataAssetManager:
+    """UserDataAssetManagerクラスのテスト"""
+    
+    def setup_method(self):
+        """各テストメソッドの前に実行される初期化処理"""
+        self.app = App()
+        self.stack = Stack(self.app, "TestStack")
+        self.role = iam.Role(
+            self.stack, "TestRole",
+            assumed_by=iam.ServicePrincipal("ec2.amazonaws.com")
+        )
+        self.manager = UserDataAssetManager(self.stack)
+    
+    def test_initialization(self):
+        """初期化のテスト"""
+        assert self.manager.stack is self.stack
+    
+    def test_create_bootstrap_asset_linux(self):
+        """Linux用スクリプトのアセット作成と読み取り権限付与のテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        script = "#!/bin/bash\necho 'hello'"
+        
+        asset = self.manager.create_bootstrap_asset(ami_info, script, self.role)
+        
+        assert asset.s3_object_key is not None
+        assert asset.is_file
+        template = assertions.Template.from_stack(self.stack)
+        template.has_resource_properties("AWS::IAM::Policy", {
+            "PolicyDocument": {
+                "Statement": assertions.Match.array_with([
+                    assertions.Match.object_like({
+                        "Action": assertions.Match.array_with(["s3:GetObject*"])
+                    })
+                ])
+            }
+        })
+    
+    def test_create_bootstrap_asset_same_content_same_hash(self):
+        """同じスクリプトからは同じアセットハッシュが得られることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        other_stack = Stack(self.app, "OtherStack")
+        other_role = iam.Role(other_stack, "TestRole", assumed_by=iam.ServicePrincipal("ec2.amazonaws.com"))
+        
+        first = self.manager.create_bootstrap_asset(ami_info, "echo same", self.role)
+        second = UserDataAssetManager(other_stack).create_bootstrap_asset(ami_info, "echo same", other_role)
+        
+        assert first.asset_hash == second.asset_hash
+    
+    def test_create_bootstrap_asset_written_under_outdir(self):
+        """スクリプトが一時ディレクトリではなくクラウドアセンブリの出力先に書き出されることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        self.manager.create_bootstrap_asset(ami_info, "Write-Host 'hello'", self.role)
+        
+        script_path = os.path.join(self.app.outdir, "TestStack.userdata", "bootstrap.ps1")
+        with open(script_path, encoding="utf-8") as f:
+            assert f.read() == "Write-Host 'hello'"
@@ -1,11 +1,19 @@
 """
 UserDataManagerのユニットテスト
 """
+import base64
+import gzip
+import hashlib
+import json
+import random
+import shutil
+import subprocess
 import pytest
 from unittest.mock import Mock
-from aws_cdk import aws_ec2 as ec2
+from aws_cdk import App, Stack, aws_ec2 as ec2, aws_s3 as s3
+from ssm_ec2_rdp.instance_catalog import InstanceCatalog
 from ssm_ec2_rdp.user_data_manager import UserDataManager
-from ssm_ec2_rdp.types import AMIInfo, OSType
+from ssm_ec2_rdp.types import AMIInfo, InvalidValueError, LinuxDistro, NetworkReachability, OSType, UserDataStep
 
 
 class TestUserDataManager:
@@ -94,6 +102,1209 @@ class TestUserDataManager:
         
         assert isinstance(user_data, ec2.UserData)
     
+    def test_get_setup_steps_linux(self):
+        """Linux用セットアップステップ取得のテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890",
+            os_type=OSType.LINUX,
+            description="Amazon Linux 2023"
+        )
+        
+        steps = self.manager.get_setup_steps(ami_info, {'install_packages': ['git']})
+        names = [step.name for step in steps]
+        
+        assert names[0] == "SystemUpdate"
+        assert "SsmAgent" in names
+        assert "InstallPackages" in names
+        assert names[-1] == "Completion"
+    
+    def test_get_setup_steps_windows(self):
+        """Windows用セットアップステップ取得のテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-12345",
+            os_type=OSType.WINDOWS,
+            description="Windows Server 2022"
+        )
+        
+        steps = self.manager.get_setup_steps(ami_info, {'enable_iis': True})
+        names = [step.name for step in steps]
+        
+        assert "EnableRemoteDesktop" in names
+        assert "EnableIis" in names
+        assert names[-1] == "Completion"
+    
+    def test_generate_baked_image_user_data(self):
+        """ゴールデンイメージ用の最小ユーザーデータ生成のテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890",
+            os_type=OSType.LINUX,
+            description="Amazon Linux 2023"
+        )
+        
+        rendered = self.manager.generate_baked_image_user_data(ami_info).render()
+        
+        assert "amazon-ssm-agent" in rendered
+        assert "yum update" not in rendered
+        # 通常モードと比較できるよう同じフェーズ名でタイムラインを記録する
+        assert "userdata_phase_start 'SsmAgent'" in rendered
+        assert "userdata_phase_start 'Completion'" in rendered
+        assert "userdata_step_pending" not in rendered
+    
+    def test_fast_boot_profile_linux(self):
+        """fast-bootプロファイルでSSM Agentが最優先・パッケージが1トランザクションになることのテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890",
+            os_type=OSType.LINUX,
+            description="Amazon Linux 2023"
+        )
+        config = {
+            'boot_profile': 'fast-boot',
+            'enable_docker': True,
+            'install_packages': ['git', 'htop']
+        }
+        
+        steps = self.manager.get_setup_steps(ami_info, config)
+        rendered = self.manager.generate_user_data(ami_info, config).render()
+        
+        assert steps[0].name == "SsmAgent"
+        assert "DeferredSetup" in [step.name for step in steps]
+        # フルアップグレードは指定時のみ
+        assert "yum update -y" not in rendered
+        assert "apt-get upgrade -y" not in rendered
+        # パッケージは1回のインストールにまとめられ、重複しない
+        assert "yum install -y htop curl wget unzip docker git" in rendered
+        assert rendered.count("yum install -y htop") == 1
+        assert "systemctl start --no-block userdata-deferred.service" in rendered
+    
+    def test_fast_boot_profile_full_upgrade(self):
+        """fast-bootプロファイルでfull_upgrade指定時はアップグレードを実行することのテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890",
+            os_type=OSType.LINUX,
+            description="Amazon Linux 2023"
+        )
+        
+        rendered = self.manager.generate_user_data(
+            ami_info, {'boot_profile': 'fast-boot', 'full_upgrade': True}
+        ).render()
+        
+        assert "yum update -y" in rendered
+        assert "apt-get upgrade -y" in rendered
+    
+    def test_fast_boot_profile_windows(self):
+        """Windowsのfast-bootプロファイルでSSM Agent・RDP設定を先に実行し、その他を遅延実行するテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        config = {'boot_profile': 'fast-boot', 'enable_iis': True, 'custom_commands': ['Write-Host custom']}
+        
+        steps = self.manager.get_setup_steps(ami_info, config)
+        names = [step.name for step in steps]
+        deferred = next(step for step in steps if step.name == "DeferredSetup")
+        deferred_script = "\n".join(deferred.commands)
+        
+        assert names == UserDataManager.WINDOWS_CRITICAL_STEPS + ["DeferredSetup", "Completion"]
+        assert "Enable-WindowsOptionalFeature -Online -FeatureName IIS-WebServerRole -All" in deferred_script
+        assert "Write-Host custom" in deferred_script
+        assert "NoAutoUpdate" in deferred_script
+        assert f"Register-ScheduledTask -TaskName '{UserDataManager.WINDOWS_DEFERRED_TASK}'" in deferred_script
+        assert f"Start-ScheduledTask -TaskName '{UserDataManager.WINDOWS_DEFERRED_TASK}'" in deferred_script
+        assert f"'@ | Set-Content -Path '{UserDataManager.WINDOWS_DEFERRED_SCRIPT}'" in deferred_script
+    
+    def test_windows_ssm_agent_not_restarted(self):
+        """WindowsのSSM Agentを再起動せず、停止時のみ起動することのテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        for config in [None, {'boot_profile': 'fast-boot'}]:
+            rendered = self.manager.generate_user_data(ami_info, config).render()
+            assert "Restart-Service" not in rendered
+            assert "Start-Service AmazonSSMAgent" in rendered
+    
+    def test_validate_boot_profile(self):
+        """boot_profileの検証テスト"""
+        linux_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        windows_ami = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        assert self.manager.validate_additional_config(linux_ami, {'boot_profile': 'fast-boot'}) == []
+        assert len(self.manager.validate_additional_config(linux_ami, {'boot_profile': 'turbo'})) == 1
+        assert self.manager.validate_additional_config(windows_ami, {'boot_profile': 'fast-boot'}) == []
+        assert len(self.manager.validate_additional_config(windows_ami, {'boot_profile': 'turbo'})) == 1
+        assert len(self.manager.validate_additional_config(linux_ami, {'full_upgrade': 'yes'})) == 1
+    
+    def test_isolated_subnet_skips_internet_steps(self):
+        """パッケージリポジトリに到達できないサブネットでインターネットが必要なステップをスキップするテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890",
+            os_type=OSType.LINUX,
+            description="Amazon Linux 2023"
+        )
+        config = {'enable_docker': True, 'install_packages': ['git']}
+        network = NetworkReachability.for_subnet_type("private")
+        
+        steps = self.manager.get_setup_steps(ami_info, config, network)
+        rendered = self.manager.generate_user_data(ami_info, config, network).render()
+        
+        step_names = [step.name for step in steps]
+        assert step_names[0] == "SystemUpdate"
+        assert "SsmAgent" in step_names
+        assert "yum update -y" not in rendered
+        assert "yum install -y htop" not in rendered
+        assert "yum install -y git" not in rendered
+        assert "Skipping SystemUpdate" in rendered
+        assert "Skipping Docker" in rendered
+        # インターネット不要なステップはそのまま残る
+        assert "systemctl reload sshd" in rendered
+    
+    def test_public_subnet_keeps_internet_steps(self):
+        """インターネットに到達できるサブネットでは全ステップを実行するテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890",
+            os_type=OSType.LINUX,
+            description="Amazon Linux 2023"
+        )
+        network = NetworkReachability.for_subnet_type("public")
+        
+        with_network = self.manager.generate_user_data(ami_info, None, network).render()
+        without_network = self.manager.generate_user_data(ami_info).render()
+        
+        assert with_network == without_network
+        assert "Skipping" not in with_network
+    
+    def test_isolated_subnet_fast_boot_profile(self):
+        """到達不可サブネットでのfast-bootプロファイルがパッケージインストールを省略するテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890",
+            os_type=OSType.LINUX,
+            description="Amazon Linux 2023"
+        )
+        config = {'boot_profile': 'fast-boot', 'custom_commands': ['echo custom']}
+        
+        rendered = self.manager.generate_user_data(
+            ami_info, config, NetworkReachability.for_subnet_type("private")
+        ).render()
+        
+        assert "yum install -y htop" not in rendered
+        assert "Skipping package installation" in rendered
+        assert "echo custom" in rendered
+    
+    def test_isolated_subnet_windows_unchanged(self):
+        """Windowsのステップはネットワーク到達性の影響を受けないことのテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-12345",
+            os_type=OSType.WINDOWS,
+            description="Windows Server 2022"
+        )
+        
+        isolated = self.manager.generate_user_data(
+            ami_info, None, NetworkReachability.for_subnet_type("private")
+        ).render()
+        
+        assert isolated == self.manager.generate_user_data(ami_info).render()
+    
+    def test_s3_gateway_endpoint_enables_amazon_linux_repositories(self):
+        """S3ゲートウェイエンドポイントありの隔離サブネットでAmazon Linuxのリポジトリを使用するテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890",
+            os_type=OSType.LINUX,
+            description="Amazon Linux 2023"
+        )
+        config = {'install_packages': ['git']}
+        network = NetworkReachability.for_subnet_type("private", s3_gateway_endpoint=True)
+        
+        steps = self.manager.get_setup_steps(ami_info, config, network)
+        rendered = self.manager.generate_user_data(ami_info, config, network).render()
+        
+        step_names = [step.name for step in steps]
+        # リポジトリ設定は最初のパッケージ操作の前に1回だけ実行
+        assert step_names.count("RepositoryConfig") == 1
+        assert step_names.index("RepositoryConfig") < step_names.index("SystemUpdate")
+        assert "yum install -y git" in rendered
+        assert "/awsregion" in rendered
+        assert "skip_if_unavailable=True" in rendered
+        # apt系ディストリビューションではスキップ
+        assert "Skipping InstallPackages: only Amazon Linux repositories" in rendered
+    
+    def test_s3_gateway_endpoint_fast_boot_profile(self):
+        """S3ゲートウェイエンドポイントありでのfast-bootプロファイルのテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890",
+            os_type=OSType.LINUX,
+            description="Amazon Linux 2023"
+        )
+        network = NetworkReachability.for_subnet_type("private", s3_gateway_endpoint=True)
+        
+        rendered = self.manager.generate_user_data(
+            ami_info, {'boot_profile': 'fast-boot'}, network
+        ).render()
+        
+        assert "yum install -y htop curl wget unzip" in rendered
+        assert "/awsregion" in rendered
+        assert "Skipping package installation: only Amazon Linux repositories" in rendered
+    
+    def test_generate_compressed_user_data(self):
+        """gzip圧縮したマルチパートMIMEユーザーデータ生成のテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890",
+            os_type=OSType.LINUX,
+            description="Amazon Linux 2023"
+        )
+        config = {'compress': True, 'install_packages': ['git']}
+        
+        compressed = self.manager.generate_compressed_user_data(ami_info, config)
+        document = gzip.decompress(base64.b64decode(compressed.content_base64)).decode("utf-8")
+        
+        assert compressed.compressed_size < compressed.uncompressed_size
+        assert compressed.uncompressed_size == len(document.encode("utf-8"))
+        assert 0 < compressed.compression_ratio() < 1
+        assert "multipart/mixed" in document
+        assert "Content-Type: text/cloud-config" in document
+        assert "#cloud-config" in document
+        assert "Content-Type: text/x-shellscript" in document
+        assert "yum install -y git" in document
+    
+    def test_generate_compressed_user_data_is_deterministic(self):
+        """同じ入力から同じ圧縮結果が得られることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        
+        first = self.manager.generate_compressed_user_data(ami_info)
+        second = self.manager.generate_compressed_user_data(ami_info)
+        
+        assert first.content_base64 == second.content_base64
+    
+    def test_generate_compressed_user_data_windows(self):
+        """Windows AMIでは圧縮ユーザーデータを生成できないことのテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        with pytest.raises(InvalidValueError):
+            self.manager.generate_compressed_user_data(ami_info)
+    
+    def test_generate_compressed_user_data_size_limit(self):
+        """圧縮後も上限を超える場合のエラーテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        # 圧縮が効かない内容で上限を超えさせる
+        noise = base64.b64encode(random.Random(0).randbytes(16000)).decode("ascii")
+        config = {'custom_commands': [f"echo {noise[i:i + 64]}{i}" for i in range(0, len(noise), 64)]}
+        
+        with pytest.raises(InvalidValueError) as exc_info:
+            self.manager.generate_compressed_user_data(ami_info, config)
+        
+        assert "上限を超えています" in str(exc_info.value)
+    
+    def test_validate_compress(self):
+        """compress設定の検証テスト"""
+        linux_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        windows_ami = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        assert self.manager.validate_additional_config(linux_ami, {'compress': True}) == []
+        assert len(self.manager.validate_additional_config(linux_ami, {'compress': 'yes'})) == 1
+        assert len(self.manager.validate_additional_config(windows_ami, {'compress': True})) == 1
+    
+    def test_should_offload_to_s3(self):
+        """S3アセットへの退避判定のテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023",
+            distro=LinuxDistro.AMAZON_LINUX_2023
+        )
+        large_commands = [f"echo {'x' * 100} {i}" for i in range(50)]
+        isolated = NetworkReachability.for_subnet_type("private")
+        
+        assert self.manager.should_offload_to_s3(ami_info, {'custom_commands': ['echo small']}) is False
+        assert self.manager.should_offload_to_s3(ami_info, {'custom_commands': large_commands}) is True
+        # 明示指定が優先
+        assert self.manager.should_offload_to_s3(
+            ami_info, {'custom_commands': large_commands, 'offload_to_s3': False}
+        ) is False
+        assert self.manager.should_offload_to_s3(ami_info, {'offload_to_s3': True}) is True
+        # S3に到達できない場合は自動では退避しない
+        assert self.manager.should_offload_to_s3(ami_info, {'custom_commands': large_commands}, isolated) is False
+        with pytest.raises(InvalidValueError):
+            self.manager.should_offload_to_s3(ami_info, {'offload_to_s3': True}, isolated)
+    
+    def test_should_offload_to_s3_without_aws_cli(self):
+        """AWS CLIを含まないUbuntu、ディストリビューション不明のAMIでは自動で退避しないテスト"""
+        ubuntu_ami = AMIInfo(
+            ami_id="ami-67890", os_type=OSType.LINUX, description="Ubuntu 22.04", distro=LinuxDistro.UBUNTU
+        )
+        unknown_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Custom Linux")
+        large_commands = [f"echo {'x' * 100} {i}" for i in range(50)]
+        
+        assert self.manager.should_offload_to_s3(ubuntu_ami, {'custom_commands': large_commands}) is False
+        with pytest.raises(InvalidValueError, match="AWS CLI"):
+            self.manager.should_offload_to_s3(ubuntu_ami, {'offload_to_s3': True})
+        # ディストリビューション不明のAMIは明示指定時のみ退避する
+        assert self.manager.should_offload_to_s3(unknown_ami, {'custom_commands': large_commands}) is False
+        assert self.manager.should_offload_to_s3(unknown_ami, {'offload_to_s3': True}) is True
+    
+    def test_generate_bootstrap_script_windows(self):
+        """Windows用スクリプトに<powershell>タグが含まれないことのテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        script = self.manager.generate_bootstrap_script(ami_info, {'custom_commands': ['Write-Host custom']})
+        
+        assert "<powershell>" not in script
+        assert "Write-Host custom" in script
+    
+    def test_generate_asset_fetcher_user_data_linux(self):
+        """Linux用フェッチャーがダウンロード・チェックサム検証・実行を行うことのテスト"""
+        stack = Stack(App(), "TestStack")
+        bucket = s3.Bucket(stack, "Bucket")
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        script = self.manager.generate_bootstrap_script(ami_info)
+        
+        user_data = self.manager.generate_asset_fetcher_user_data(ami_info, bucket, "bootstrap.sh", script)
+        rendered = str(stack.resolve(user_data.render()))
+        
+        assert "aws s3 cp" in rendered
+        assert hashlib.sha256(script.encode("utf-8")).hexdigest() in rendered
+        assert "sha256sum -c -" in rendered
+        assert "yum update -y" not in rendered
+    
+    def test_generate_asset_fetcher_user_data_windows(self):
+        """Windows用フェッチャーのテスト"""
+        stack = Stack(App(), "TestStack")
+        bucket = s3.Bucket(stack, "Bucket")
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        user_data = self.manager.generate_asset_fetcher_user_data(ami_info, bucket, "bootstrap.ps1", "echo")
+        rendered = str(stack.resolve(user_data.render()))
+        
+        assert "Read-S3Object" in rendered
+        assert "Get-FileHash -Algorithm SHA256" in rendered
+    
+    def test_validate_offload_to_s3(self):
+        """offload_to_s3設定の検証テスト"""
+        linux_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        
+        assert self.manager.validate_additional_config(linux_ami, {'offload_to_s3': True}) == []
+        assert len(self.manager.validate_additional_config(linux_ami, {'offload_to_s3': 'yes'})) == 1
+        assert len(self.manager.validate_additional_config(
+            linux_ami, {'offload_to_s3': True, 'compress': True}
+        )) == 1
+    
+    def test_boot_timeline_linux(self):
+        """Linuxの各フェーズで開始・終了が記録されることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        
+        steps = self.manager.get_setup_steps(ami_info)
+        rendered = self.manager.generate_user_data(ami_info).render()
+        
+        assert UserDataManager.LINUX_TIMELINE_LOG in rendered
+        for step in steps:
+            assert f"userdata_phase_start '{step.name}'" in rendered
+        assert rendered.count("\nuserdata_phase_end\n") == len(steps)
+        # メトリクス送信は指定時のみ
+        assert "put-metric-data" not in rendered
+        # 完了ログの日時が展開されるようダブルクォートを使用
+        assert 'echo "User data setup completed successfully at $(date)"' in rendered
+    
+    def test_boot_timeline_windows(self):
+        """Windowsの各フェーズで開始・終了が記録されることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        steps = self.manager.get_setup_steps(ami_info)
+        rendered = self.manager.generate_user_data(ami_info).render()
+        
+        assert UserDataManager.WINDOWS_TIMELINE_LOG in rendered
+        for step in steps:
+            assert f"Start-UserDataPhase '{step.name}'" in rendered
+        assert rendered.count("\nComplete-UserDataPhase\n") == len(steps)
+        assert "Write-CWMetricData" not in rendered
+    
+    def test_boot_metrics(self):
+        """boot_metrics指定時にCloudWatchメトリクスを送信することのテスト"""
+        linux_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        windows_ami = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        linux = self.manager.generate_user_data(linux_ami, {'boot_metrics': True}).render()
+        windows = self.manager.generate_user_data(windows_ami, {'boot_metrics': True}).render()
+        
+        assert "aws cloudwatch put-metric-data" in linux
+        assert UserDataManager.BOOT_METRIC_NAMESPACE in linux
+        assert "Write-CWMetricData" in windows
+        # CloudWatchの型を使用する前にAWSPowerShellモジュールを読み込む
+        assert windows.index("Import-Module AWSPowerShell") < windows.index("New-Object Amazon.CloudWatch.Model")
+        assert "if ($script:UserDataBootMetrics) {" in windows
+        assert len(self.manager.validate_additional_config(linux_ami, {'boot_metrics': 'yes'})) == 1
+    
+    @pytest.mark.skipif(shutil.which("bash") is None, reason="bashが必要")
+    def test_boot_metrics_without_aws_cli(self, tmp_path):
+        """AWS CLIがない環境では警告を出力し、タイムラインの記録を継続することのテスト"""
+        self.manager.LINUX_TIMELINE_LOG = str(tmp_path / "timeline.log")
+        functions = [line for line in self.manager._build_linux_timeline_functions(boot_metrics=True)
+                     if "169.254.169.254" not in line]
+        script = "\n".join(functions + ["userdata_phase_start 'StepA'", "userdata_phase_end"])
+        
+        # bashのみを含むPATHでAWS CLIが見つからない状態を再現
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        for tool in ["bash", "date"]:
+            (bin_dir / tool).symlink_to(shutil.which(tool))
+        result = subprocess.run([str(bin_dir / "bash"), "-c", script], capture_output=True, text=True,
+                                env={"PATH": str(bin_dir)})
+        
+        assert result.returncode == 0
+        assert "aws CLI is not installed" in result.stderr
+        assert '"phase":"StepA","event":"end"' in (tmp_path / "timeline.log").read_text()
+    
+    def test_generate_cloud_config(self):
+        """#cloud-config形式のユーザーデータ生成テスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        config = {
+            'format': 'cloud-config',
+            'install_packages': ['git', 'htop'],
+            'enable_docker': True,
+            'custom_commands': ['echo custom']
+        }
+        
+        rendered = self.manager.generate_user_data(ami_info, config).render()
+        document = self.manager.build_cloud_config_document(ami_info, config)
+        
+        assert rendered.startswith("#cloud-config\n")
+        assert json.loads(rendered.split("\n", 1)[1]) == document
+        # パッケージは重複なく1つのリストにまとめられる
+        assert document["packages"] == ['htop', 'curl', 'wget', 'unzip', 'git']
+        assert document["package_upgrade"] is True
+        assert document["ssh_pwauth"] is False
+        assert "amazon-ssm-agent" in document["bootcmd"][1]
+        assert document["runcmd"][-1] == 'echo custom'
+        assert ["systemctl", "enable", "--now", "docker"] in document["runcmd"]
+        assert "command -v" not in " ".join(document["bootcmd"])
+    
+    def test_generate_cloud_config_fast_boot(self):
+        """fast-bootプロファイルではfull_upgrade指定時のみアップグレードすることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        
+        default = self.manager.build_cloud_config_document(
+            ami_info, {'format': 'cloud-config', 'boot_profile': 'fast-boot'}
+        )
+        upgraded = self.manager.build_cloud_config_document(
+            ami_info, {'format': 'cloud-config', 'boot_profile': 'fast-boot', 'full_upgrade': True}
+        )
+        
+        assert default["package_upgrade"] is False
+        assert upgraded["package_upgrade"] is True
+    
+    def test_generate_cloud_config_isolated_subnet(self):
+        """パッケージリポジトリに到達できない場合はパッケージ操作を行わないことのテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        config = {'format': 'cloud-config', 'install_packages': ['git'], 'enable_docker': True}
+        
+        document = self.manager.build_cloud_config_document(
+            ami_info, config, NetworkReachability.for_subnet_type("private")
+        )
+        
+        assert "packages" not in document
+        assert document["package_update"] is False
+        assert "runcmd" not in document
+    
+    def test_cloud_config_falls_back_to_shell(self):
+        """Amazon Linuxのリポジトリのみ到達できる場合はbashスクリプトにフォールバックすることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        
+        rendered = self.manager.generate_user_data(
+            ami_info, {'format': 'cloud-config'},
+            NetworkReachability.for_subnet_type("private", s3_gateway_endpoint=True)
+        ).render()
+        
+        assert rendered.startswith("#!/bin/bash")
+    
+    def test_compressed_cloud_config(self):
+        """cloud-config形式の圧縮ユーザーデータは#cloud-configパートのみになることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        
+        compressed = self.manager.generate_compressed_user_data(
+            ami_info, {'format': 'cloud-config', 'compress': True}
+        )
+        document = gzip.decompress(base64.b64decode(compressed.content_base64)).decode("utf-8")
+        
+        assert "text/cloud-config" in document
+        assert "text/x-shellscript" not in document
+    
+    def test_validate_format(self):
+        """format設定の検証テスト"""
+        linux_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        windows_ami = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        assert self.manager.validate_additional_config(linux_ami, {'format': 'cloud-config'}) == []
+        assert self.manager.validate_additional_config(linux_ami, {'format': 'shell'}) == []
+        assert len(self.manager.validate_additional_config(linux_ami, {'format': 'yaml'})) == 1
+        assert len(self.manager.validate_additional_config(windows_ami, {'format': 'cloud-config'})) == 1
+        assert len(self.manager.validate_additional_config(
+            linux_ami, {'format': 'cloud-config', 'boot_metrics': True}
+        )) == 1
+    
+    @pytest.mark.parametrize("distro,install,absent", [
+        (LinuxDistro.AMAZON_LINUX_2023, "dnf install -y htop curl wget unzip", "apt-get"),
+        (LinuxDistro.AMAZON_LINUX_2, "yum install -y htop curl wget unzip", "apt-get"),
+        (LinuxDistro.UBUNTU, "apt-get install -y htop curl wget unzip", "yum"),
+    ])
+    def test_distro_specialization(self, distro, install, absent):
+        """ディストリビューションが判明している場合に実行時判定を行わないことのテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Linux", distro=distro)
+        
+        rendered = self.manager.generate_user_data(ami_info, {'install_packages': ['git']}).render()
+        generic = self.manager.generate_user_data(
+            AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Linux"), {'install_packages': ['git']}
+        ).render()
+        
+        assert install in rendered
+        assert "command -v yum" not in rendered
+        assert "command -v apt-get" not in rendered
+        assert absent not in rendered
+        assert len(rendered) < len(generic)
+    
+    def test_distro_specialization_keeps_custom_commands(self):
+        """カスタムコマンドは特殊化の対象外であることのテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890", os_type=OSType.LINUX, description="Linux", distro=LinuxDistro.UBUNTU
+        )
+        custom = [UserDataManager.LINUX_RPM_BRANCH, "    yum install -y foo", "fi"]
+        
+        rendered = self.manager.generate_user_data(ami_info, {'custom_commands': custom}).render()
+        
+        assert "\n".join(custom) in rendered
+    
+    def test_distro_specialization_unterminated_branch(self):
+        """閉じるfiがない分岐は展開せずそのまま残すテスト"""
+        commands = ["echo start", UserDataManager.LINUX_RPM_BRANCH, "    yum install -y foo", "    fi"]
+        
+        specialized = self.manager._specialize_commands(commands, LinuxDistro.UBUNTU)
+        
+        assert specialized == commands
+    
+    def test_distro_specialization_fast_boot_ubuntu(self):
+        """Ubuntuのfast-bootプロファイルでapt系のコマンドのみになることのテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890", os_type=OSType.LINUX, description="Linux", distro=LinuxDistro.UBUNTU
+        )
+        
+        rendered = self.manager.generate_user_data(
+            ami_info, {'boot_profile': 'fast-boot', 'enable_docker': True}
+        ).render()
+        
+        assert "apt-get install -y htop curl wget unzip docker.io" in rendered
+        assert "rpm -q" not in rendered
+    
+    def test_distro_specialization_ubuntu_with_s3_gateway_endpoint(self):
+        """UbuntuではS3ゲートウェイエンドポイントがあってもパッケージ操作をスキップすることのテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890", os_type=OSType.LINUX, description="Linux", distro=LinuxDistro.UBUNTU
+        )
+        
+        rendered = self.manager.generate_user_data(
+            ami_info, None, NetworkReachability.for_subnet_type("private", s3_gateway_endpoint=True)
+        ).render()
+        
+        assert "Skipping SystemUpdate" in rendered
+        assert "RepositoryConfig" not in rendered
+        assert "awsregion" not in rendered
+    
+    def test_distro_specialization_cloud_config_docker(self):
+        """ディストリビューション判明時はDockerをpackagesに含めることのテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890", os_type=OSType.LINUX, description="Linux", distro=LinuxDistro.UBUNTU
+        )
+        
+        document = self.manager.build_cloud_config_document(
+            ami_info, {'format': 'cloud-config', 'enable_docker': True}
+        )
+        
+        assert "docker.io" in document["packages"]
+        assert document["runcmd"] == [["systemctl", "enable", "--now", "docker"]]
+    
+    def test_idempotent_steps_linux(self):
+        """Linuxの各ステップが内容ハッシュのマーカーファイルで保護されることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        
+        steps = self.manager.get_setup_steps(ami_info)
+        rendered = self.manager.generate_user_data(ami_info).render()
+        
+        assert UserDataManager.LINUX_STEP_MARKER_DIR in rendered
+        for step in steps:
+            checksum = self.manager.get_step_checksum(step)
+            if step.name in UserDataManager.UNGUARDED_STEPS:
+                assert f"userdata_step_pending '{step.name}'" not in rendered
+            else:
+                assert f"if userdata_step_pending '{step.name}' '{checksum}'; then" in rendered
+                assert f"    userdata_step_done '{step.name}' '{checksum}'" in rendered
+    
+    def test_idempotent_steps_windows(self):
+        """Windowsの各ステップが内容ハッシュのマーカーファイルで保護されることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        steps = self.manager.get_setup_steps(ami_info)
+        rendered = self.manager.generate_user_data(ami_info).render()
+        
+        assert UserDataManager.WINDOWS_STEP_MARKER_DIR in rendered
+        for step in steps:
+            if step.name not in UserDataManager.UNGUARDED_STEPS:
+                checksum = self.manager.get_step_checksum(step)
+                assert f"if (Test-UserDataStepPending '{step.name}' '{checksum}') {{" in rendered
+                assert f"Complete-UserDataStep '{step.name}' '{checksum}'" in rendered
+    
+    def test_idempotent_disabled(self):
+        """idempotent: false でマーカーファイルによる保護を行わないことのテスト"""
+        linux_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        windows_ami = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        linux = self.manager.generate_user_data(linux_ami, {'idempotent': False}).render()
+        windows = self.manager.generate_user_data(windows_ami, {'idempotent': False}).render()
+        
+        assert "userdata_step_pending" not in linux
+        assert "Test-UserDataStepPending" not in windows
+        assert len(self.manager.validate_additional_config(linux_ami, {'idempotent': 'yes'})) == 1
+        assert self.manager.validate_additional_config(linux_ami, {'idempotent': False}) == []
+    
+    def test_step_checksum_changes_with_commands(self):
+        """コマンドが変わった場合のみステップのハッシュが変わることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        
+        base = {step.name: self.manager.get_step_checksum(step)
+                for step in self.manager.get_setup_steps(ami_info, {'custom_commands': ['echo one']})}
+        changed = {step.name: self.manager.get_step_checksum(step)
+                   for step in self.manager.get_setup_steps(ami_info, {'custom_commands': ['echo two']})}
+        
+        assert base['CustomCommands'] != changed['CustomCommands']
+        assert all(base[name] == changed[name] for name in base if name != 'CustomCommands')
+    
+    @pytest.mark.skipif(shutil.which("bash") is None, reason="bashが必要")
+    def test_idempotent_steps_skip_on_rerun(self, tmp_path):
+        """再実行時に変更のないステップがスキップされ、変更したステップのみ実行されることのテスト"""
+        self.manager.LINUX_STEP_MARKER_DIR = str(tmp_path / "steps")
+        self.manager.LINUX_TIMELINE_LOG = str(tmp_path / "timeline.log")
+        output = tmp_path / "output.log"
+        
+        def run(step_b_command):
+            user_data = ec2.UserData.for_linux()
+            self.manager._render_steps(user_data, [
+                UserDataStep(name="StepA", description="A", commands=[f"echo a >> {output}"]),
+                UserDataStep(name="StepB", description="B", commands=[f"echo {step_b_command} >> {output}"]),
+            ])
+            subprocess.run(["bash", "-c", user_data.render()], check=True, capture_output=True)
+        
+        run("b1")
+        run("b1")
+        assert output.read_text().split() == ["a", "b1"]
+        run("b2")
+        assert output.read_text().split() == ["a", "b1", "b2"]
+    
+    @pytest.mark.skipif(shutil.which("bash") is None, reason="bashが必要")
+    def test_idempotent_failed_step_leaves_no_marker(self, tmp_path):
+        """最後のコマンドが失敗したステップはマーカーが書き込まれず、次回の実行時に再試行されることのテスト"""
+        self.manager.LINUX_STEP_MARKER_DIR = str(tmp_path / "steps")
+        self.manager.LINUX_TIMELINE_LOG = str(tmp_path / "timeline.log")
+        output = tmp_path / "output.log"
+        
+        user_data = ec2.UserData.for_linux()
+        self.manager._render_steps(user_data, [
+            UserDataStep(name="Failing", description="F", commands=[f"echo failing >> {output}", "false"]),
+            UserDataStep(name="Next", description="N", commands=[f"echo next >> {output}"]),
+        ])
+        for _ in range(2):
+            subprocess.run(["bash", "-c", user_data.render()], check=True, capture_output=True)
+        
+        # 失敗したステップは再実行され、後続のステップは変更がないためスキップされる
+        assert output.read_text().split() == ["failing", "next", "failing"]
+        assert not (tmp_path / "steps" / "Failing.sha256").exists()
+        assert (tmp_path / "steps" / "Next.sha256").exists()
+    
+    @pytest.mark.skipif(shutil.which("bash") is None, reason="bashが必要")
+    def test_idempotent_keeps_shell_semantics(self, tmp_path):
+        """idempotent有効時もエラーで中断せず、シェルの状態が後続のステップに引き継がれることのテスト"""
+        self.manager.LINUX_STEP_MARKER_DIR = str(tmp_path / "steps")
+        self.manager.LINUX_TIMELINE_LOG = str(tmp_path / "timeline.log")
+        output = tmp_path / "output.log"
+        
+        user_data = ec2.UserData.for_linux()
+        self.manager._render_steps(user_data, [
+            UserDataStep(name="StepA", description="A", commands=[
+                "false", f"cd {tmp_path}", "export USERDATA_TEST=exported", "echo best-effort >> output.log"
+            ]),
+            UserDataStep(name="StepB", description="B", commands=[f"echo \"$USERDATA_TEST $PWD\" >> {output}"]),
+        ])
+        subprocess.run(["bash", "-c", user_data.render()], check=True, capture_output=True)
+        
+        assert output.read_text().split() == ["best-effort", "exported", str(tmp_path)]
+        assert (tmp_path / "steps" / "StepA.sha256").exists()
+    
+    def test_idempotent_default_linux_script_unchanged(self):
+        """既定のLinuxスクリプトで、idempotent無効時のコマンドがそのままの順序・シェルで実行されることのテスト"""
+        ami_info = AMIInfo(
+            ami_id="ami-67890", os_type=OSType.LINUX, description="Ubuntu 22.04", distro=LinuxDistro.UBUNTU
+        )
+        
+        plain = self.manager.generate_user_data(ami_info, {'idempotent': False}).render().splitlines()
+        guarded = self.manager.generate_user_data(ami_info).render().splitlines()
+        
+        # サブシェルや set -e で囲まない
+        assert "set -e" not in guarded and "(" not in guarded
+        # idempotent無効時の全ての行が同じ順序で含まれる（ガードの行が追加されるのみ）
+        remaining = iter(guarded)
+        assert all(line in remaining for line in plain)
+        assert any("systemctl reload sshd" in line for line in guarded)
+    
+    def test_idempotent_windows_marker_only_on_success(self):
+        """Windowsで完了マーカーがエラー時に停止するtryブロック内でのみ書き込まれることのテスト"""
+        step = UserDataStep(name="StepA", description="A", commands=["Install-Something"])
+        
+        guarded = self.manager._guard_step_commands(step, is_windows=True)
+        
+        complete = guarded.index(f"Complete-UserDataStep 'StepA' '{self.manager.get_step_checksum(step)}'")
+        assert guarded.index("try {") < guarded.index("$ErrorActionPreference = 'Stop'") < guarded.index("Install-Something")
+        assert guarded.index("Install-Something") < complete < guarded.index("} catch {")
+    
+    def test_idempotent_windows_native_command_failure(self):
+        """Windowsでネイティブコマンドの終了コードが0以外の場合に完了マーカーを書き込まないテスト"""
+        step = UserDataStep(name="StepA", description="A", commands=["reg.exe add HKLM\\Software\\Test /f"])
+        
+        guarded = self.manager._guard_step_commands(step, is_windows=True)
+        
+        reset = guarded.index("$global:LASTEXITCODE = 0")
+        check = guarded.index('if ($LASTEXITCODE) { throw "StepA exited with code $LASTEXITCODE" }')
+        complete = guarded.index(f"Complete-UserDataStep 'StepA' '{self.manager.get_step_checksum(step)}'")
+        assert reset < guarded.index(step.commands[0]) < check < complete
+    
+    def test_package_acceleration_standard_profile(self):
+        """package_accelerationで設定ステップを追加し、インストールを1回のトランザクションにまとめるテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        config = {'package_acceleration': True, 'enable_docker': True, 'install_packages': ['git']}
+        
+        steps = self.manager.get_setup_steps(ami_info, config)
+        names = [step.name for step in steps]
+        rendered = self.manager.generate_user_data(ami_info, config).render()
+        
+        assert names[0] == "PackageManagerConfig"
+        assert names.index("Packages") == names.index("SsmAgent") + 1
+        assert not set(UserDataManager.LINUX_PACKAGE_STEPS) & set(names)
+        assert "yum install -y htop curl wget unzip docker git" in rendered
+        assert "apt-get install -y htop curl wget unzip docker.io git" in rendered
+        assert "max_parallel_downloads=10" in rendered
+        assert "fastestmirror=True" in rendered
+        assert 'APT::Install-Recommends "false";' in rendered
+        assert "man-db man-db/auto-update boolean false" in rendered
+        assert "path-exclude=/usr/share/doc/*" in rendered
+    
+    def test_package_acceleration_fast_boot_profile(self):
+        """fast-bootプロファイルでバックグラウンドのインストール前に高速化設定を行うテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        
+        rendered = self.manager.generate_user_data(
+            ami_info, {'boot_profile': 'fast-boot', 'package_acceleration': True}
+        ).render()
+        deferred = rendered.split("<<'USERDATA_DEFERRED'")[1].split("USERDATA_DEFERRED")[0]
+        
+        assert deferred.index("max_parallel_downloads=10") < deferred.index("yum install -y")
+        # バックグラウンドのインストールもタイムラインに記録する
+        assert '"phase":"DeferredPackages"' in deferred
+        assert UserDataManager.LINUX_TIMELINE_LOG in deferred
+    
+    def test_package_acceleration_disabled_by_default(self):
+        """package_acceleration未指定時は従来のステップ構成のままであることのテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        
+        names = [step.name for step in self.manager.get_setup_steps(ami_info, {'install_packages': ['git']})]
+        
+        assert "PackageManagerConfig" not in names
+        assert "BasicTools" in names
+        assert "InstallPackages" in names
+    
+    def test_package_acceleration_cloud_config(self):
+        """cloud-config形式でpackagesモジュールより先に高速化設定を行うテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        
+        document = self.manager.build_cloud_config_document(
+            ami_info, {'format': 'cloud-config', 'package_acceleration': True}
+        )
+        
+        assert document["bootcmd"][-1][:2] == ["bash", "-c"]
+        assert "max_parallel_downloads=10" in document["bootcmd"][-1][2]
+    
+    def test_package_acceleration_validation(self):
+        """package_accelerationの検証テスト"""
+        linux_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        windows_ami = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        assert self.manager.validate_additional_config(linux_ami, {'package_acceleration': True}) == []
+        assert len(self.manager.validate_additional_config(linux_ami, {'package_acceleration': 'yes'})) == 1
+        assert len(self.manager.validate_additional_config(windows_ami, {'package_acceleration': True})) == 1
+        assert 'package_acceleration' in self.manager.get_supported_configurations(linux_ami)
+    
+    def test_ec2launch_v2_document(self):
+        """format: ec2launch-v2 でEC2Launch v2のタスクドキュメントを生成するテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        config = {'format': 'ec2launch-v2', 'enable_iis': True}
+        
+        rendered = self.manager.generate_user_data(ami_info, config).render()
+        lines = rendered.splitlines()
+        
+        assert lines[:3] == ["version: 1.0", "tasks:", "  - task: executeScript"]
+        assert "<powershell>" not in rendered
+        assert "      - frequency: once" in lines
+        assert "        runAs: localSystem" in lines
+        assert "enableOpenSsh" not in rendered
+        # DNSサフィックスの設定に続けてセットアップスクリプトをブロックスカラーとしてインデントする
+        script = self.manager.generate_bootstrap_script(ami_info, config)
+        content = [line[10:] for line in lines[lines.index("        content: |-") + 1:]]
+        assert content == UserDataManager.EC2LAUNCH_DNS_SUFFIX_COMMANDS + [""] + script.splitlines()
+        assert "          Enable-WindowsOptionalFeature -Online -FeatureName IIS-WebServerRole -All" in lines
+    
+    def test_ec2launch_v2_userdata_stage_tasks_only(self):
+        """UserDataステージで実行できないタスクを出力しないテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        rendered = self.manager.generate_user_data(
+            ami_info, {'format': 'ec2launch-v2', 'enable_openssh': True}
+        ).render()
+        
+        tasks = [line.split(": ")[1] for line in rendered.splitlines() if line.startswith("  - task: ")]
+        assert tasks == ["enableOpenSsh", "executeScript"]
+        # setDnsSuffixはexecuteScript内のPowerShellで代替する
+        assert "          Set-DnsClientGlobalSetting -SuffixSearchList " in rendered
+        assert ".ec2-utilities.amazonaws.com" in rendered
+    
+    def test_ec2launch_v2_enable_openssh(self):
+        """enable_openssh指定時にenableOpenSshタスクを追加するテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        rendered = self.manager.generate_user_data(
+            ami_info, {'format': 'ec2launch-v2', 'enable_openssh': True}
+        ).render()
+        
+        assert rendered.index("  - task: enableOpenSsh") < rendered.index("  - task: executeScript")
+    
+    def test_ec2launch_v2_validation(self):
+        """ec2launch-v2形式の検証テスト"""
+        linux_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        windows_ami = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        assert self.manager.validate_additional_config(windows_ami, {'format': 'ec2launch-v2'}) == []
+        assert self.manager.validate_additional_config(windows_ami, {'format': 'powershell'}) == []
+        assert self.manager.validate_additional_config(
+            windows_ami, {'format': 'ec2launch-v2', 'enable_openssh': True}
+        ) == []
+        assert len(self.manager.validate_additional_config(linux_ami, {'format': 'ec2launch-v2'})) == 1
+        assert len(self.manager.validate_additional_config(windows_ami, {'enable_openssh': True})) == 1
+        assert len(self.manager.validate_additional_config(
+            windows_ami, {'format': 'ec2launch-v2', 'offload_to_s3': True}
+        )) == 1
+        assert not self.manager.should_offload_to_s3(
+            windows_ami, {'format': 'ec2launch-v2', 'custom_commands': ['x' * 5000]}
+        )
+    
+    def test_rdp_performance_defaults(self):
+        """rdp_performance: true で既定のRDPパフォーマンス設定を行うテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        rendered = self.manager.generate_user_data(ami_info, {'rdp_performance': True}).render()
+        
+        assert "Start-UserDataPhase 'RdpPerformance'" in rendered
+        assert UserDataManager.WINDOWS_TS_POLICY_KEY in rendered
+        assert "-Name 'SelectTransport' -PropertyType DWord -Value 0" in rendered
+        assert "Remote Desktop - User Mode (UDP-In)" in rendered
+        assert "-Name 'AVC444ModePreferred' -PropertyType DWord -Value 1" in rendered
+        # 60fpsはドキュメント記載の値15（10進）
+        assert "-Name 'DWMFRAMEINTERVAL' -PropertyType DWord -Value 15" in rendered
+        # VisualFXSettingはユーザーごとの値のため、HKLMではなく既定ユーザーのハイブに書き込む
+        assert f"reg load 'HKU\\SsmEc2RdpDefaultUser' '{UserDataManager.WINDOWS_DEFAULT_USER_HIVE}'" in rendered
+        assert ("reg add 'HKU\\SsmEc2RdpDefaultUser\\Software\\Microsoft\\Windows\\CurrentVersion\\Explorer"
+                "\\VisualEffects' /v VisualFXSetting /t REG_DWORD /d 2 /f") in rendered
+        assert "reg unload 'HKU\\SsmEc2RdpDefaultUser'" in rendered
+        assert "HKLM:\\SOFTWARE\\Microsoft\\Windows\\CurrentVersion\\Explorer\\VisualEffects" not in rendered
+        assert "fAllowDesktopCompositionOnServer" not in rendered
+        assert "Remove-ItemProperty -Path $TsPolicy -Name 'SelectNetworkDetect'" in rendered
+    
+    def test_rdp_performance_overrides(self):
+        """rdp_performanceの個別設定で既定値を上書きするテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        config = {'rdp_performance': {
+            'udp_transport': False, 'max_frame_rate': 30, 'reduce_visual_effects': False,
+            'bandwidth_autodetect': False
+        }}
+        
+        rendered = self.manager.generate_user_data(ami_info, config).render()
+        
+        assert "-Name 'SelectTransport' -PropertyType DWord -Value 1" in rendered
+        assert "UDP-In" not in rendered
+        # 30fpsはWindowsの既定のため値を削除する
+        assert "-Name 'DWMFRAMEINTERVAL' -ErrorAction SilentlyContinue" in rendered
+        assert "-Name 'DWMFRAMEINTERVAL' -PropertyType DWord" not in rendered
+        assert "VisualFXSetting" not in rendered
+        assert "-Name 'SelectNetworkDetect' -PropertyType DWord -Value 0" in rendered
+        # 指定しなかった設定は既定値
+        assert "-Name 'AVC444ModePreferred' -PropertyType DWord -Value 1" in rendered
+        assert "RdpPerformance" not in self.manager.generate_user_data(ami_info).render()
+    
+    def test_validate_rdp_performance(self):
+        """rdp_performanceの検証テスト"""
+        linux_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        windows_ami = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        assert self.manager.validate_additional_config(windows_ami, {'rdp_performance': True}) == []
+        assert self.manager.validate_additional_config(
+            windows_ami, {'rdp_performance': {'avc444': False, 'max_frame_rate': 60}}
+        ) == []
+        assert len(self.manager.validate_additional_config(windows_ami, {'rdp_performance': 'fast'})) == 1
+        assert len(self.manager.validate_additional_config(windows_ami, {'rdp_performance': {'turbo': True}})) == 1
+        assert len(self.manager.validate_additional_config(
+            windows_ami, {'rdp_performance': {'max_frame_rate': 120, 'udp_transport': 'yes'}}
+        )) == 2
+        assert len(self.manager.validate_additional_config(
+            windows_ami, {'rdp_performance': {'max_frame_rate': True}}
+        )) == 1
+        assert len(self.manager.validate_additional_config(
+            windows_ami, {'rdp_performance': {'max_frame_rate': 45}}
+        )) == 1
+        assert len(self.manager.validate_additional_config(
+            windows_ami, {'rdp_performance': {'desktop_composition': True}}
+        )) == 1
+        assert len(self.manager.validate_additional_config(linux_ami, {'rdp_performance': True})) == 1
+    
+    def test_windows_slimming_small_instance(self):
+        """メモリ量がしきい値未満のインスタンスタイプで軽量化設定を行うテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        manager = UserDataManager(InstanceCatalog().get_spec("t3.small"))
+        
+        rendered = manager.generate_user_data(ami_info, {'windows_slimming': True}).render()
+        
+        assert "Start-UserDataPhase 'WindowsSlimming'" in rendered
+        assert "Set-Service -Name $Name -StartupType Disabled" in rendered
+        assert "-TaskName 'ServerManager'" in rendered
+        assert "DoNotOpenServerManagerAtLogon" in rendered
+        assert "InitialSize = 2048; MaximumSize = 4096" in rendered
+        assert f"powercfg /setactive {UserDataManager.WINDOWS_HIGH_PERFORMANCE_PLAN}" in rendered
+        assert "Add-MpPreference -ExclusionPath" in rendered
+    
+    def test_windows_slimming_threshold(self):
+        """メモリ量がしきい値以上、または不明なインスタンスタイプでは軽量化設定を行わないテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        medium = UserDataManager(InstanceCatalog().get_spec("t3.medium"))
+        
+        assert not medium.should_apply_windows_slimming({'windows_slimming': True})
+        assert medium.should_apply_windows_slimming({'windows_slimming': {'memory_threshold_gib': 8}})
+        assert not UserDataManager().should_apply_windows_slimming({'windows_slimming': True})
+        assert "WindowsSlimming" not in medium.generate_user_data(ami_info, {'windows_slimming': True}).render()
+    
+    def test_validate_windows_slimming(self):
+        """windows_slimmingの検証テスト"""
+        linux_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        windows_ami = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        assert self.manager.validate_additional_config(windows_ami, {'windows_slimming': True}) == []
+        assert self.manager.validate_additional_config(
+            windows_ami, {'windows_slimming': {'memory_threshold_gib': 8}}
+        ) == []
+        assert len(self.manager.validate_additional_config(windows_ami, {'windows_slimming': 'yes'})) == 1
+        assert len(self.manager.validate_additional_config(
+            windows_ami, {'windows_slimming': {'memory_threshold_gib': 0, 'services': []}}
+        )) == 2
+        assert len(self.manager.validate_additional_config(linux_ami, {'windows_slimming': True})) == 1
+    
+    def test_linux_instance_store(self):
+        """NVMeインスタンスストアを持つインスタンスタイプでディスクをマウントするテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        manager = UserDataManager(InstanceCatalog().get_spec("m5d.large"))
+        
+        for config in [{}, {'boot_profile': 'fast-boot'}]:
+            rendered = manager.generate_user_data(ami_info, config).render()
+            
+            assert "userdata_phase_start 'InstanceStore'" in rendered
+            assert "/Instance Storage/" in rendered
+            assert f"MOUNT_POINT={UserDataManager.LINUX_INSTANCE_STORE_MOUNT}" in rendered
+            assert f"systemctl enable --now {UserDataManager.LINUX_INSTANCE_STORE_UNIT}" in rendered
+            assert rendered.index("'InstanceStore'") < rendered.index("'Completion'")
+        
+        document = manager.build_cloud_config_document(ami_info, {'format': 'cloud-config'})
+        assert any(UserDataManager.LINUX_INSTANCE_STORE_SCRIPT in command[2] for command in document["runcmd"])
+    
+    def test_windows_instance_store(self):
+        """WindowsでインスタンスストアをT:ドライブとして初期化するテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        manager = UserDataManager(InstanceCatalog().get_spec("c6id.xlarge"))
+        
+        rendered = manager.generate_user_data(ami_info).render()
+        
+        assert "Start-UserDataPhase 'InstanceStore'" in rendered
+        assert "New-Partition -DriveLetter T" in rendered
+        assert "[Environment]::SetEnvironmentVariable('TEMP', 'T:\\Temp', 'Machine')" in rendered
+        assert "Name = 'T:\\pagefile.sys'" in rendered
+        assert f"-TaskName '{UserDataManager.WINDOWS_INSTANCE_STORE_TASK}'" in rendered
+        assert "-Trigger (New-ScheduledTaskTrigger -AtStartup)" in rendered
+        # T:のページファイルに加え、C:にも小さいページファイルを残す
+        assert "Name = 'C:\\pagefile.sys'; InitialSize = [uint32]1024; MaximumSize = [uint32]1024" in rendered
+        assert "Where-Object { $_.Name -notlike 'C:*' } | Remove-CimInstance" in rendered
+    
+    def test_windows_instance_store_boot_script(self):
+        """停止・開始後の起動時に実行するスクリプトで、未初期化のT:を再作成するテスト"""
+        commands = UserDataManager(InstanceCatalog().get_spec("c6id.xlarge"))._build_windows_instance_store_commands()
+        
+        start = commands.index("@'")
+        end = next(i for i, command in enumerate(commands) if command.startswith("'@ | Set-Content"))
+        boot_script = "\n".join(commands[start + 1:end])
+        
+        assert "$_.PartitionStyle -eq 'RAW'" in boot_script
+        assert "New-Partition -DriveLetter T" in boot_script
+        assert "New-Item -ItemType Directory -Force -Path 'T:\\Temp'" in boot_script
+        # T:が存在しない場合はTEMP/TMPをシステム既定に戻す
+        assert "[Environment]::SetEnvironmentVariable('TEMP', \"$env:SystemRoot\\Temp\", 'Machine')" in boot_script
+        # ページファイルの変更は再起動が必要なため、起動時のスクリプトでは行わない
+        assert "Win32_PageFileSetting" not in boot_script
+    
+    def test_instance_store_not_applied(self):
+        """インスタンスストアがない、または無効化した場合はセットアップしないテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        with_store = UserDataManager(InstanceCatalog().get_spec("m5d.large"))
+        
+        assert not with_store.should_setup_instance_store({'instance_store': False})
+        assert not UserDataManager(InstanceCatalog().get_spec("m5.large")).should_setup_instance_store({})
+        assert not UserDataManager().should_setup_instance_store({})
+        assert "InstanceStore" not in with_store.generate_user_data(ami_info, {'instance_store': False}).render()
+        assert len(self.manager.validate_additional_config(ami_info, {'instance_store': 'yes'})) == 1
+    
+    def test_linux_memory_tuning_small_instance(self):
+        """小メモリインスタンスでzramスワップとカーネルパラメータを設定するテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        manager = UserDataManager(InstanceCatalog().get_spec("t3.small"))
+        config = {'memory_tuning': True}
+        
+        rendered = manager.generate_user_data(ami_info, config).render()
+        
+        assert "vm.swappiness = 100" in rendered
+        assert "vm.page-cluster = 0" in rendered
+        assert "net.ipv4.tcp_rmem = 4096 87380 16777216" in rendered
+        assert "zramctl --find --size 2048M --algorithm zstd" in rendered
+        assert f"systemctl enable --now {UserDataManager.LINUX_ZRAM_UNIT}" in rendered
+        # パッケージのインストールより先に実行する
+        assert rendered.index("'MemoryTuning'") < rendered.index("'SystemUpdate'")
+        
+        fast_boot = manager.generate_user_data(ami_info, {**config, 'boot_profile': 'fast-boot'}).render()
+        assert fast_boot.index("'SsmAgent'") < fast_boot.index("'MemoryTuning'") < fast_boot.index("'DeferredSetup'")
+        
+        document = manager.build_cloud_config_document(ami_info, {**config, 'format': 'cloud-config'})
+        assert any(UserDataManager.LINUX_TUNING_SYSCTL_CONF in command[2]
+                   for command in document["bootcmd"] if isinstance(command, list))
+    
+    def test_linux_memory_tuning_large_instance(self):
+        """メモリ量がしきい値以上のインスタンスではzramを設定しないテスト"""
+        ami_info = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        manager = UserDataManager(InstanceCatalog().get_spec("m5.xlarge"))
+        
+        rendered = manager.generate_user_data(ami_info, {'memory_tuning': True}).render()
+        
+        assert "vm.swappiness = 10" in rendered
+        assert "net.core.rmem_max = 16777216" in rendered
+        assert "zramctl" not in rendered
+        assert "zramctl --find --size 2048M" in "\n".join(
+            UserDataManager(InstanceCatalog().get_spec("t3.medium"))._build_linux_memory_tuning_commands()
+        )
+    
+    def test_memory_tuning_not_applied(self):
+        """既定、インスタンスタイプが不明、または無効化した場合はチューニングしないテスト"""
+        linux_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        windows_ami = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        manager = UserDataManager(InstanceCatalog().get_spec("t3.micro"))
+        
+        assert "MemoryTuning" not in manager.generate_user_data(linux_ami).render()
+        assert "MemoryTuning" not in manager.generate_user_data(linux_ami, {'memory_tuning': False}).render()
+        assert "MemoryTuning" not in UserDataManager().generate_user_data(linux_ami, {'memory_tuning': True}).render()
+        assert "MemoryTuning" not in manager.generate_user_data(windows_ami).render()
+        assert len(self.manager.validate_additional_config(linux_ami, {'memory_tuning': 'yes'})) == 1
+        assert len(self.manager.validate_additional_config(windows_ami, {'memory_tuning': True})) == 1
+    
+    def test_dcv_server(self):
+        """NICE DCVサーバーのインストール・設定のテスト"""
+        ami_info = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        manager = UserDataManager(InstanceCatalog().get_spec("g4dn.xlarge"))
+        
+        rendered = manager.generate_user_data(ami_info, {'dcv': True}).render()
+        
+        assert "Start-UserDataPhase 'DcvServer'" in rendered
+        assert UserDataManager.WINDOWS_DCV_SERVER_MSI_URL in rendered
+        assert "AUTOMATIC_SESSION_OWNER=Administrator" in rendered
+        assert "-Name 'web-port' -PropertyType DWord -Value 8443" in rendered
+        assert "-Name 'enable-quic-frontend' -PropertyType DWord -Value 1" in rendered
+        assert "-Protocol UDP -LocalPort 8443" in rendered
+        
+        custom = manager.generate_user_data(ami_info, {'dcv': {'port': 9443, 'quic': False}}).render()
+        assert "-Name 'web-port' -PropertyType DWord -Value 9443" in custom
+        assert "enable-quic-frontend" not in custom
+        
+        steps = manager.get_setup_steps(ami_info, {'dcv': True})
+        assert [step for step in steps if step.name == "DcvServer"][0].requires_internet
+    
+    def test_validate_dcv(self):
+        """dcvの検証テスト"""
+        linux_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023")
+        windows_ami = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        gpu = UserDataManager(InstanceCatalog().get_spec("g5.xlarge"))
+        
+        assert gpu.validate_additional_config(windows_ami, {'dcv': True}) == []
+        assert gpu.validate_additional_config(windows_ami, {'dcv': {'port': 9443, 'quic': False}}) == []
+        assert len(gpu.validate_additional_config(windows_ami, {'dcv': 'yes'})) == 1
+        assert len(gpu.validate_additional_config(windows_ami, {'dcv': {'port': 3389, 'quic': 'on'}})) == 2
+        assert len(gpu.validate_additional_config(windows_ami, {'dcv': {'port': 80, 'codec': 'h264'}})) == 2
+        assert len(gpu.validate_additional_config(linux_ami, {'dcv': True})) == 1
+        assert len(UserDataManager(InstanceCatalog().get_spec("m5.large")).validate_additional_config(
+            windows_ami, {'dcv': True}
+        )) == 1
+    
+    def test_validate_dcv_unreachable_subnet(self):
+        """インターネットに到達できないサブネットではdcvがエラーになることのテスト"""
+        windows_ami = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        gpu = UserDataManager(InstanceCatalog().get_spec("g5.xlarge"))
+        
+        private = NetworkReachability.for_subnet_type("private", s3_gateway_endpoint=True)
+        errors = gpu.validate_additional_config(windows_ami, {'dcv': True}, private)
+        
+        assert len(errors) == 1
+        assert "subnet-type: public" in errors[0]
+        assert gpu.validate_additional_config(windows_ami, {'dcv': False}, private) == []
+        assert gpu.validate_additional_config(
+            windows_ami, {'dcv': True}, NetworkReachability.for_subnet_type("public")
+        ) == []
+    
+    def test_linux_desktop(self):
+        """軽量デスクトップとxrdpのインストール・設定のテスト"""
+        ubuntu_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Ubuntu 22.04",
+                             distro=LinuxDistro.UBUNTU)
+        
+        rendered = self.manager.generate_user_data(ubuntu_ami, {'linux_desktop': True}).render()
+        
+        assert "userdata_phase_start 'LinuxDesktop'" in rendered
+        assert "apt-get install -y xfce4 dbus-x11 xrdp" in rendered
+        assert "amazon-linux-extras" not in rendered
+        assert "s/^#?max_bpp=.*/max_bpp=24/" in rendered
+        assert "s/^#?bitmap_cache=.*/bitmap_cache=true/" in rendered
+        assert "s/^#?bulk_compression=.*/bulk_compression=true/" in rendered
+        assert "systemctl restart xrdp" in rendered
+        
+        custom = self.manager.generate_user_data(
+            ubuntu_ami, {'boot_profile': 'fast-boot', 'linux_desktop': {'max_bpp': 16, 'bulk_compression': False}}
+        ).render()
+        assert "s/^#?max_bpp=.*/max_bpp=16/" in custom
+        assert "s/^#?bulk_compression=.*/bulk_compression=false/" in custom
+        assert custom.index("max_bpp=16") > custom.index(UserDataManager.LINUX_DEFERRED_SCRIPT)
+        
+        al2_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2",
+                          distro=LinuxDistro.AMAZON_LINUX_2)
+        assert "amazon-linux-extras install -y mate-desktop1.x epel" in self.manager.generate_user_data(
+            al2_ami, {'linux_desktop': True}
+        ).render()
+    
+    def test_validate_linux_desktop(self):
+        """linux_desktopの検証テスト"""
+        linux_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Ubuntu 22.04",
+                            distro=LinuxDistro.UBUNTU)
+        al2023_ami = AMIInfo(ami_id="ami-67890", os_type=OSType.LINUX, description="Amazon Linux 2023",
+                             distro=LinuxDistro.AMAZON_LINUX_2023)
+        windows_ami = AMIInfo(ami_id="ami-12345", os_type=OSType.WINDOWS, description="Windows Server 2022")
+        
+        assert self.manager.validate_additional_config(linux_ami, {'linux_desktop': True}) == []
+        assert self.manager.validate_additional_config(linux_ami, {'linux_desktop': {'max_bpp': 16}}) == []
+        assert len(self.manager.validate_additional_config(linux_ami, {'linux_desktop': 'xfce'})) == 1
+        assert len(self.manager.validate_additional_config(
+            linux_ami, {'linux_desktop': {'max_bpp': 12, 'bitmap_cache': 'yes', 'desktop': 'gnome'}}
+        )) == 3
+        assert len(self.manager.validate_additional_config(al2023_ami, {'linux_desktop': True})) == 1
+        assert len(self.manager.validate_additional_config(windows_ami, {'linux_desktop': True})) == 1
+    
     def test_get_default_windows_config(self):
         """Windows用デフォルト設定取得のテスト"""
         config = self.manager.get_default_windows_config()